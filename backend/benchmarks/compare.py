@@ -0,0 +1,60 @@
+"""
+Compara dois resultados de benchmarks.run e aponta regressões.
+
+Uso:
+    python -m benchmarks.compare base.json novo.json --threshold 0.10
+
+Sai com código 1 se algum caso ficou mais lento que o limite (pela mediana).
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Any, List, Tuple
+
+def _index(results: List[Dict[str, Any]]) -> Dict[Tuple[int, str], Dict[str, Any]]:
+    return {(item["scale"], item["name"]): item["stats"] for item in results}
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Retorna, para cada caso presente nos dois arquivos, a razão entre as medianas."""
+
+    base_index = _index(base["results"])
+    rows = []
+
+    for key, new_stats in _index(new["results"]).items():
+        base_stats = base_index.get(key)
+        if not base_stats or not base_stats["median_ms"]:
+            continue
+
+        ratio = new_stats["median_ms"] / base_stats["median_ms"]
+        rows.append({
+            "scale": key[0],
+            "name": key[1],
+            "base_ms": base_stats["median_ms"],
+            "new_ms": new_stats["median_ms"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + threshold,
+        })
+
+    return sorted(rows, key=lambda row: (row["scale"], row["name"]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara dois resultados de benchmark.")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Aumento relativo tolerado na mediana.")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as base_file, open(args.new, encoding="utf-8") as new_file:
+        base, new = json.load(base_file), json.load(new_file)
+
+    print(f"base: {base['meta'].get('git_commit')}  new: {new['meta'].get('git_commit')}")
+
+    rows = compare(base, new, args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"[{row['scale']}] {row['name']:<32} {row['base_ms']:>10.3f} -> {row['new_ms']:>10.3f} ms  x{row['ratio']:<6} {flag}")
+
+    sys.exit(1 if any(row["regression"] for row in rows) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Gerador de bases sintéticas no formato de revisu_data.db.
+
+Uso:
+    python -m benchmarks.datagen --topics 100000 --output /tmp/revisu_100k.db
+"""
+import argparse
+import json
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any
+
+from src import db
+
+WORDS = [
+    "memória", "revisão", "conceito", "processo", "sistema", "modelo", "rede", "dados",
+    "algoritmo", "estrutura", "função", "análise", "protocolo", "teoria", "prática", "exemplo",
+    "método", "resultado", "hipótese", "definição", "propriedade", "contexto", "aplicação", "ciclo",
+]
+
+BATCH_SIZE = 10_000
+
+def use_database(path: str):
+    """Aponta a camada de DB para o arquivo informado (ou db.MEMORY_DATABASE) e garante o esquema."""
+
+    db.configure_database(path)
+    db.init_db()
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def generate_database(
+    path: str,
+    topics: int,
+    topics_per_file: int = 5,
+    tags: int = 200,
+    tags_per_topic: int = 3,
+    content_chars: int = 256,
+    due_fraction: float = 0.1,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Popula o banco em `path` com `topics` tópicos distribuídos em arquivos,
+    tags e datas de revisão (uma fração `due_fraction` já vencida).
+    Retorna um resumo do que foi gerado.
+    """
+
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    now = datetime.now()
+
+    use_database(path)
+
+    conn = db.open_connection(db.get_db_path())
+    conn.execute("PRAGMA synchronous = OFF")
+    cursor = conn.cursor()
+
+    cursor.executemany(
+        "INSERT OR IGNORE INTO Tag (name) VALUES (?)",
+        [(f"tag-{i}",) for i in range(tags)]
+    )
+    tag_ids = [row[0] for row in cursor.execute("SELECT id FROM Tag ORDER BY id")]
+
+    first_file_id = (cursor.execute("SELECT MAX(id) FROM File").fetchone()[0] or 0) + 1
+    first_topic_id = (cursor.execute("SELECT MAX(id) FROM Topic").fetchone()[0] or 0) + 1
+
+    content = (_sentence(rng, content_chars) * 2)[:content_chars]
+    files_count = max(1, -(-topics // topics_per_file))
+
+    file_rows = []
+    for i in range(files_count):
+        processed_at = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+        file_rows.append((
+            f"nota-{i}.md",
+            f"nota-{i}.md",
+            "md",
+            content,
+            processed_at.strftime("%Y-%m-%d %H:%M:%S")
+        ))
+        if len(file_rows) >= BATCH_SIZE:
+            cursor.executemany(
+                "INSERT INTO File (file_path, file_name, file_type, original_content, processed_at) VALUES (?, ?, ?, ?, ?)",
+                file_rows
+            )
+            file_rows = []
+    if file_rows:
+        cursor.executemany(
+            "INSERT INTO File (file_path, file_name, file_type, original_content, processed_at) VALUES (?, ?, ?, ?, ?)",
+            file_rows
+        )
+
+    # Impressões digitais aleatórias: o índice de quase duplicatas tem o tamanho real, sem acertos.
+    fingerprint_rng = random.Random(seed + 1)
+    cursor.executemany(
+        "INSERT INTO FileFingerprint (file_id, simhash) VALUES (?, ?)",
+        [(first_file_id + i, fingerprint_rng.getrandbits(128).to_bytes(16, "little")) for i in range(files_count)]
+    )
+
+    topic_rows = []
+    link_rows = []
+    for i in range(topics):
+        if rng.random() < due_fraction:
+            next_review = now - timedelta(seconds=rng.randint(60, 30 * 24 * 3600))
+        else:
+            next_review = now + timedelta(seconds=rng.randint(60, 365 * 24 * 3600))
+
+        repetitions = rng.randint(0, 8)
+        last_reviewed = (now - timedelta(days=rng.randint(1, 60))).isoformat() if repetitions else None
+
+        topic_rows.append((
+            first_file_id + i // topics_per_file,
+            _sentence(rng, 4).capitalize(),
+            _sentence(rng, 30),
+            json.dumps([f"{_sentence(rng, 6)}?" for _ in range(3)], ensure_ascii=False),
+            next_review.isoformat(),
+            round(rng.uniform(1.3, 3.0), 2),
+            repetitions,
+            last_reviewed
+        ))
+        for tag_id in rng.sample(tag_ids, min(tags_per_topic, len(tag_ids))):
+            link_rows.append((first_topic_id + i, tag_id))
+
+        if len(topic_rows) >= BATCH_SIZE:
+            _flush_topics(cursor, topic_rows, link_rows)
+            topic_rows, link_rows = [], []
+    if topic_rows:
+        _flush_topics(cursor, topic_rows, link_rows)
+
+    # Um ano de agregados de revisão: o tamanho deles depende dos dias e das tags, não do histórico.
+    review_days = [(now - timedelta(days=offset)).date().isoformat() for offset in range(365)]
+    cursor.executemany(
+        "INSERT OR IGNORE INTO ReviewDaily (day, quality, reviews) VALUES (?, ?, ?)",
+        [(day, quality, rng.randint(0, max(1, topics // 1000))) for day in review_days for quality in range(6)]
+    )
+    tag_review_rows = []
+    for day in review_days:
+        for tag_id in tag_ids:
+            reviews = rng.randint(1, 20)
+            tag_review_rows.append((day, tag_id, reviews, rng.randint(0, reviews)))
+    cursor.executemany(
+        "INSERT OR IGNORE INTO TagReviewDaily (day, tag_id, reviews, correct) VALUES (?, ?, ?, ?)",
+        tag_review_rows
+    )
+
+    conn.commit()
+    conn.close()
+
+    return {
+        "path": path,
+        "files": files_count,
+        "topics": topics,
+        "tags": len(tag_ids),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+def _flush_topics(cursor: sqlite3.Cursor, topic_rows, link_rows):
+    cursor.executemany(
+        "INSERT INTO Topic (file_id, title, summary, questions, next_review_date, ease_factor, repetitions, last_reviewed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        topic_rows
+    )
+    cursor.executemany("INSERT OR IGNORE INTO TopicTag (topic_id, tag_id) VALUES (?, ?)", link_rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera uma base sintética do Revisu.")
+    parser.add_argument("--topics", type=int, required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--topics-per-file", type=int, default=5)
+    parser.add_argument("--content-chars", type=int, default=256)
+    parser.add_argument("--due-fraction", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    summary = generate_database(
+        args.output,
+        args.topics,
+        topics_per_file=args.topics_per_file,
+        content_chars=args.content_chars,
+        due_fraction=args.due_fraction,
+        seed=args.seed
+    )
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Micro-benchmarks das camadas de DB e de serviço em bases sintéticas.
+
+Uso:
+    python -m benchmarks.run --scales 1000 100000 --output bench.json
+    python -m benchmarks.run --scales 1000000 --workdir /tmp/revisu-bench --keep
+    python -m benchmarks.run --scales 1000 100000 --in-memory
+
+Os resultados são gravados em JSON para comparação entre commits (ver benchmarks.compare).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional
+
+from benchmarks.datagen import generate_database, use_database
+from src import db
+from src.db import get_all_files_db, get_file_by_id_db, get_topics_for_review_db
+from src.providers import LocalStubProvider, set_provider
+from src.resilience import CircuitBreaker, LLMGuard, set_llm_guard
+from src.services import (
+    review_topic_service,
+    get_review_session_service,
+    get_review_stats_service,
+    process_new_file,
+    find_duplicate_service,
+    _format_file_data_to_response
+)
+from src.similarity import SimilarityIndex
+
+DEFAULT_SCALES = [1_000, 100_000]
+
+# A listagem completa de arquivos faz uma consulta por arquivo; acima disso fica lenta demais para medir.
+FULL_SCAN_MAX_TOPICS = 10_000
+
+INGEST_CONTENT = "Notas de estudo sobre redes de computadores.\n" * 40
+
+def measure(
+    func: Callable[[], Any],
+    min_rounds: int = 5,
+    max_rounds: int = 1000,
+    min_time: float = 1.0,
+    max_time: float = 30.0
+) -> Dict[str, Any]:
+    """
+    Executa `func` repetidamente e retorna estatísticas em milissegundos.
+    Casos mais lentos que `max_time` param após a primeira medição (sem aquecimento),
+    para que um gargalo de escala apareça no resultado em vez de travar a execução.
+    """
+
+    timings: List[float] = []
+    started = time.perf_counter()
+    while len(timings) < max_rounds:
+        t0 = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - t0) * 1000)
+
+        elapsed = time.perf_counter() - started
+        if elapsed >= max_time or (len(timings) >= min_rounds and elapsed >= min_time):
+            break
+
+    # A primeira execução serve de aquecimento sempre que houver amostras suficientes.
+    if len(timings) > min_rounds:
+        timings = timings[1:]
+
+    timings.sort()
+    p95_index = min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))
+    mean = statistics.fmean(timings)
+
+    return {
+        "rounds": len(timings),
+        "min_ms": round(timings[0], 4),
+        "max_ms": round(timings[-1], 4),
+        "mean_ms": round(mean, 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "p95_ms": round(timings[p95_index], 4),
+        "stddev_ms": round(statistics.stdev(timings), 4) if len(timings) > 1 else 0.0,
+        "ops_per_second": round(1000 / mean, 2) if mean > 0 else None,
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _metadata() -> Dict[str, Any]:
+    return {
+        "git_commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+    }
+
+def build_cases(topics: int, files: int, rng: random.Random, full_scan_max: int = FULL_SCAN_MAX_TOPICS) -> Dict[str, Callable[[], Any]]:
+    """Monta os casos medidos para uma base já populada."""
+
+    loop = asyncio.new_event_loop()
+    sample_file = get_file_by_id_db(1)
+
+    # Índice com uma nota por tópico da escala, independente dos arquivos gerados.
+    index = SimilarityIndex()
+    for file_id in range(1, topics + 1):
+        index.add(file_id, rng.getrandbits(128).to_bytes(16, "little"))
+
+    cases: Dict[str, Callable[[], Any]] = {
+        "get_all_files_db[limit=20]": lambda: get_all_files_db(limit=20),
+        "get_file_by_id_db": lambda: get_file_by_id_db(rng.randint(1, files)),
+        "get_topics_for_review_db": get_topics_for_review_db,
+        "review_topic_service": lambda: review_topic_service(rng.randint(1, topics), rng.randint(0, 5)),
+        "get_review_session_service[size=20]": lambda: get_review_session_service(20),
+        "get_review_stats_service[days=30]": lambda: get_review_stats_service(30),
+        "SimilarityIndex.search": lambda: index.search(rng.getrandbits(128).to_bytes(16, "little"), 0.8),
+        "find_duplicate_service": lambda: find_duplicate_service(f"{INGEST_CONTENT}{rng.random()}"),
+        "_format_file_data_to_response": lambda: _format_file_data_to_response(sample_file),
+        "ingest[stub]": lambda: loop.run_until_complete(
+            process_new_file("bench.md", "md", f"{INGEST_CONTENT}{rng.random()}")
+        ),
+    }
+    if topics <= full_scan_max:
+        cases["get_all_files_db"] = lambda: get_all_files_db()
+
+    return cases
+
+def run_scale(
+    topics: int,
+    workdir: str,
+    rng: random.Random,
+    keep: bool,
+    only: Optional[List[str]],
+    min_time: float,
+    max_time: float,
+    full_scan_max: int,
+    in_memory: bool = False
+) -> List[Dict[str, Any]]:
+    path = db.MEMORY_DATABASE if in_memory else os.path.join(workdir, f"revisu_bench_{topics}.db")
+
+    if not in_memory and os.path.exists(path) and keep:
+        use_database(path)
+        files = sqlite3.connect(path).execute("SELECT COUNT(*) FROM File").fetchone()[0]
+        print(f"[{topics}] reusing {path}")
+    else:
+        if not in_memory and os.path.exists(path):
+            os.remove(path)
+        summary = generate_database(path, topics)
+        files = summary["files"]
+        print(f"[{topics}] generated {summary['files']} files / {summary['topics']} topics in {summary['seconds']}s")
+
+    results = []
+    for name, func in build_cases(topics, files, rng, full_scan_max).items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+
+        stats = measure(func, min_time=min_time, max_time=max_time)
+        results.append({"scale": topics, "name": name, "stats": stats})
+        print(f"[{topics}] {name:<32} median {stats['median_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms  ({stats['rounds']} rounds)")
+
+    if in_memory:
+        db.configure_database(None)
+    elif not keep:
+        db.close_writer()
+        os.remove(path)
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks do backend do Revisu.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="Número de tópicos por base (ex.: 1000 100000 1000000).")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--workdir", default=None, help="Diretório das bases geradas (padrão: temporário).")
+    parser.add_argument("--keep", action="store_true", help="Mantém (e reutiliza) as bases geradas.")
+    parser.add_argument("--only", nargs="*", help="Executa apenas os casos cujo nome contém um destes trechos.")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Tempo mínimo de medição por caso, em segundos.")
+    parser.add_argument("--max-time", type=float, default=30.0, help="Tempo máximo de medição por caso, em segundos.")
+    parser.add_argument("--full-scan-max", type=int, default=FULL_SCAN_MAX_TOPICS, help="Maior escala em que get_all_files_db sem limite é medido.")
+    parser.add_argument("--in-memory", action="store_true", help="Usa um banco em memória (isola o custo das consultas do disco).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    set_provider(LocalStubProvider())
+    # Sem limitador de taxa: ingest[stub] mede o pipeline, não a espera pelo token bucket.
+    set_llm_guard(LLMGuard(bucket=None, breaker=CircuitBreaker()))
+    rng = random.Random(args.seed)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="revisu-bench-")
+    os.makedirs(workdir, exist_ok=True)
+
+    results = []
+    for topics in args.scales:
+        results.extend(run_scale(
+            topics, workdir, rng, args.keep, args.only, args.min_time, args.max_time, args.full_scan_max, args.in_memory
+        ))
+
+    if not args.workdir and not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump({"meta": {**_metadata(), "in_memory": args.in_memory}, "results": results}, output, indent=2)
+
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
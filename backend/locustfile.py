@@ -1,42 +1,202 @@
-from locust import HttpUser, task, between
+"""
+Cenários de carga mistos para o backend do Revisu.
 
-class FastAPIUser(HttpUser):
+Modela sessões reais com classes de usuário ponderadas:
+- BrowsingUser: navega em /files e /files/{id};
+- ReviewerUser: esvazia /topics/for-review e envia revisões;
+- UploaderUser: envia, ocasionalmente, arquivos de tamanhos variados.
+
+Para não medir a API do Gemini, rode o backend com o provedor local e sem o limitador de
+taxa das chamadas ao modelo (senão os envios medem a espera pelo limitador):
+    REVISU_LLM_PROVIDER=stub REVISU_STUB_LATENCY_MS=800 REVISU_STUB_LATENCY_JITTER_MS=300 \\
+        REVISU_STUB_LATENCY_DISTRIBUTION=lognormal REVISU_LLM_RATE_PER_MINUTE=0 uvicorn main:app
+
+E o teste de carga, por exemplo:
+    locust -f locustfile.py --headless -u 50 -r 10 -t 2m --latency-budgets budgets.json
+
+Ao final, imprime p50/p95/p99 por endpoint e compara com os orçamentos de latência
+(LATENCY_BUDGETS, em ms); qualquer violação faz o locust sair com código 1.
+"""
+import json
+import random
+
+from locust import HttpUser, task, between, events
+
+# Orçamentos de latência por endpoint ("MÉTODO nome-no-locust"), em milissegundos.
+LATENCY_BUDGETS = {
+    "GET /files": {"p50": 50, "p95": 200, "p99": 500},
+    "GET /files/[id]": {"p50": 20, "p95": 100, "p99": 250},
+    "GET /topics/for-review": {"p50": 50, "p95": 200, "p99": 500},
+    "POST /topics/[id]/review": {"p50": 20, "p95": 100, "p99": 250},
+    "POST /files/process": {"p50": 2000, "p95": 5000, "p99": 8000},
+}
+
+# Fração máxima de falhas aceita por endpoint.
+MAX_FAILURE_RATIO = 0.01
+
+# Tamanhos de upload (em caracteres) e seus pesos.
+UPLOAD_SIZES = [(1_000, 6), (10_000, 3), (100_000, 1)]
+
+PARAGRAPHS = [
+    "A purely peer-to-peer version of electronic cash would allow online payments to be sent "
+    "directly from one party to another without going through a financial institution.",
+    "O algoritmo SM-2 ajusta o intervalo entre revisões de acordo com a qualidade da lembrança.",
+    "Redes de computadores dividem a comunicação em camadas, cada uma com seus protocolos.",
+    "Digital signatures provide part of the solution, but the main benefits are lost if a "
+    "trusted third party is still required to prevent double-spending.",
+    "A fotossíntese converte energia luminosa em energia química armazenada na glicose.",
+]
+
+@events.init_command_line_parser.add_listener
+def _add_arguments(parser):
+    parser.add_argument(
+        "--latency-budgets",
+        type=str,
+        default="",
+        help="Arquivo JSON que substitui os orçamentos de latência (mesmo formato de LATENCY_BUDGETS).",
+    )
+    parser.add_argument("--upload-seed", type=int, default=0, help="Semente para o conteúdo dos uploads.")
+
+def _build_document(rng: random.Random, size: int) -> str:
+    parts = []
+    length = 0
+    while length < size:
+        paragraph = f"{rng.choice(PARAGRAPHS)} ({rng.randint(0, 1_000_000)})"
+        parts.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(parts)[:size]
+
+class BrowsingUser(HttpUser):
+    host = "http://localhost:8000"
+    weight = 6
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        self.file_ids = []
+
+    @task(2)
+    def list_files(self):
+        with self.client.get("/files?limit=20", name="/files", catch_response=True) as response:
+            if response.status_code == 200:
+                self.file_ids = [file["id"] for file in response.json()]
+                response.success()
+            else:
+                response.failure(f"status {response.status_code}")
+
+    @task(5)
+    def file_details(self):
+        if not self.file_ids:
+            self.list_files()
+            return
+
+        file_id = random.choice(self.file_ids)
+        self.client.get(f"/files/{file_id}", name="/files/[id]")
+
+class ReviewerUser(HttpUser):
+    host = "http://localhost:8000"
+    weight = 3
+    wait_time = between(2, 5)
+
+    def on_start(self):
+        self.queue = []
+
+    @task
+    def review_session(self):
+        if not self.queue:
+            with self.client.get("/topics/for-review", name="/topics/for-review", catch_response=True) as response:
+                if response.status_code != 200:
+                    response.failure(f"status {response.status_code}")
+                    return
+                # Cada usuário pega uma fatia diferente da fila para não revisar os mesmos tópicos.
+                topics = response.json()
+                random.shuffle(topics)
+                self.queue = [topic["id"] for topic in topics[:10]]
+                response.success()
+
+        if self.queue:
+            topic_id = self.queue.pop()
+            self.client.post(
+                f"/topics/{topic_id}/review",
+                json={"quality": random.choices(range(6), weights=[1, 1, 2, 4, 4, 3])[0]},
+                name="/topics/[id]/review",
+            )
+
+class UploaderUser(HttpUser):
     host = "http://localhost:8000"
-    wait_time = between(1, 2)
+    weight = 1
+    wait_time = between(10, 30)
+
+    instances = 0
+
+    def on_start(self):
+        seed = self.environment.parsed_options.upload_seed if self.environment.parsed_options else 0
+        UploaderUser.instances += 1
+        self.rng = random.Random(seed + UploaderUser.instances)
 
     @task
-    def process_file_endpoint(self):
-        endpoint = "/files/process"
-
-        file_content = """
-            Bitcoin: A Peer-to-Peer Electronic Cash System
-
-            Satoshi Nakamoto
-            satoshin@gmx.com
-            www.bitcoin.org
-
-            Abstract. A purely peer-to-peer version of electronic cash would allow online
-            payments to be sent directly from one party to another without going through a
-            financial institution. Digital signatures provide part of the solution, but the main
-            benefits are lost if a trusted third party is still required to prevent double-spending.
-            We propose a solution to the double-spending problem using a peer-to-peer network.
-            The network timestamps transactions by hashing them into an ongoing chain of
-            hash-based proof-of-work, forming a record that cannot be changed without redoing
-            the proof-of-work. The longest chain not only serves as proof of the sequence of
-            events witnessed, but proof that it came from the largest pool of CPU power. As
-            long as a majority of CPU power is controlled by nodes that are not cooperating to
-            attack the network, they'll generate the longest chain and outpace attackers. The
-            network itself requires minimal structure. Messages are broadcast on a best effort
-            basis, and nodes can leave and rejoin the network at will, accepting the longest
-            proof-of-work chain as proof of what happened while they were gone.
-        """
-
-        files = {'file': ('test_locust_file.txt', file_content, 'text/plain')}
-        data = {'file_type': 'txt'}
-
-        response = self.client.post(endpoint, files=files, data=data)
-
-        if response.status_code == 200:
-            print(f"Request {endpoint} successful: {response.json()}")
-        else:
-            print(f"Request {endpoint} failed with status {response.status_code}: {response.text}")
+    def upload_file(self):
+        sizes, weights = zip(*UPLOAD_SIZES)
+        size = self.rng.choices(sizes, weights=weights)[0]
+
+        files = {"file": (f"locust_{size}.md", _build_document(self.rng, size), "text/markdown")}
+        # Os documentos gerados se repetem muito: sem "create", quase todo upload cairia no 409 de duplicata.
+        self.client.post("/files/process", files=files, data={"file_type": "md", "on_duplicate": "create"}, name="/files/process")
+
+def _load_budgets(environment):
+    budgets = dict(LATENCY_BUDGETS)
+    options = environment.parsed_options
+
+    if options and options.latency_budgets:
+        with open(options.latency_budgets, encoding="utf-8") as budgets_file:
+            budgets.update(json.load(budgets_file))
+
+    return budgets
+
+def evaluate_slos(stats, budgets, max_failure_ratio=MAX_FAILURE_RATIO):
+    """Compara as estatísticas do locust com os orçamentos. Retorna (linhas do relatório, violações)."""
+
+    lines = [f"{'endpoint':<28}{'reqs':>8}{'fail%':>8}{'p50':>8}{'p95':>8}{'p99':>8}  status"]
+    violations = []
+
+    for entry in sorted(stats.entries.values(), key=lambda e: (e.name, e.method)):
+        name = f"{entry.method} {entry.name}"
+        if entry.num_requests == 0:
+            continue
+
+        percentiles = {
+            "p50": entry.get_response_time_percentile(0.50),
+            "p95": entry.get_response_time_percentile(0.95),
+            "p99": entry.get_response_time_percentile(0.99),
+        }
+        failure_ratio = entry.num_failures / entry.num_requests
+
+        problems = [
+            f"{key} {percentiles[key]:.0f}ms > {limit}ms"
+            for key, limit in budgets.get(name, {}).items()
+            if percentiles.get(key) is not None and percentiles[key] > limit
+        ]
+        if failure_ratio > max_failure_ratio:
+            problems.append(f"falhas {failure_ratio:.1%} > {max_failure_ratio:.1%}")
+
+        status = "FAIL: " + "; ".join(problems) if problems else ("PASS" if name in budgets else "-")
+        violations.extend(f"{name}: {problem}" for problem in problems)
+
+        lines.append(
+            f"{name:<28}{entry.num_requests:>8}{failure_ratio * 100:>7.1f}%"
+            f"{percentiles['p50']:>8.0f}{percentiles['p95']:>8.0f}{percentiles['p99']:>8.0f}  {status}"
+        )
+
+    return lines, violations
+
+@events.quitting.add_listener
+def _report_slos(environment, **kwargs):
+    lines, violations = evaluate_slos(environment.stats, _load_budgets(environment))
+
+    print("\n--- SLO report (ms) ---")
+    print("\n".join(lines))
+
+    if violations:
+        print(f"\n{len(violations)} SLO violation(s).")
+        environment.process_exit_code = 1
+    else:
+        print("\nAll latency budgets met.")
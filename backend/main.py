@@ -1,39 +1,193 @@
-import uvicorn
+from src.startup import (
+    timed_import,
+    mark_ready,
+    mark_first_response,
+    get_startup_report
+)
+
+with timed_import("uvicorn"):
+    import uvicorn
 import sys
 
-from fastapi import (
-    FastAPI,
-    File,
-    UploadFile,
-    HTTPException,
-    Form
-)
+with timed_import("fastapi"):
+    from fastapi import (
+        FastAPI,
+        File,
+        UploadFile,
+        HTTPException,
+        Form,
+        Query,
+        Request
+    )
 
-from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import PlainTextResponse, StreamingResponse
+import os
+import time
+import asyncio
+from typing import List, Literal, Optional
 
-from src.db import init_db
-from src.models import (
-    FileResponse,
-    TopicResponse,
-    TagResponse,
-    ReviewFeedback
-)
+with timed_import("src.db"):
+    from src.db import init_db, close_writer
+with timed_import("src.models"):
+    from src.models import (
+        FileResponse,
+        TopicResponse,
+        TagResponse,
+        ReviewFeedback,
+        ReviewSessionResponse,
+        ReviewAnswersRequest,
+        StatsResponse
+    )
 
-from src.services import (
-    process_new_file,
-    get_all_files_service,
-    get_file_details_service,
-    get_topics_for_review_service,
-    review_topic_service,
-    get_all_tags_service
-)
+with timed_import("src.metrics"):
+    from src.metrics import (
+        stage,
+        start_trace,
+        end_trace,
+        record_request,
+        server_timing_header,
+        render_prometheus
+    )
+with timed_import("src.streaming"):
+    from src.streaming import format_sse
+
+with timed_import("src.backup"):
+    from src.backup import create_snapshot, BACKUP_INTERVAL_SECONDS
+with timed_import("src.transfer"):
+    from src.transfer import export_ndjson, export_anki, import_ndjson
+with timed_import("src.maintenance"):
+    from src.maintenance import run_maintenance, MAINTENANCE_INTERVAL_SECONDS
+with timed_import("src.events"):
+    from src.events import (
+        subscribe,
+        unsubscribe,
+        run_notifier,
+        library_changed,
+        load_counts,
+        KEEPALIVE_SECONDS
+    )
+
+with timed_import("src.memprofile"):
+    from src.memprofile import (
+        start_from_env as start_memory_profiler,
+        profile_request,
+        get_report as get_memory_report
+    )
+
+with timed_import("src.services"):
+    from src.services import (
+        process_new_file,
+        process_new_file_stream,
+        find_duplicate_service,
+        update_duplicate_file_service,
+        get_all_files_service,
+        get_file_details_service,
+        delete_file_service,
+        get_topics_for_review_service,
+        review_topic_service,
+        get_review_session_service,
+        submit_review_answers_service,
+        get_review_stats_service,
+        get_all_tags_service,
+        reprocess_pending_files_service
+    )
 
 app = FastAPI()
 
+# Intervalo do reprocessamento automático das extrações adiadas (0 desliga).
+REPROCESS_INTERVAL_SECONDS = float(os.getenv("REVISU_REPROCESS_INTERVAL_SECONDS", 300))
+
+background_tasks: List[asyncio.Task] = []
+
 @app.on_event("startup")
 def on_startup():
     init_db()
+    start_memory_profiler()
+    mark_ready()
+
+async def reprocess_pending_loop():
+    """Reprocessa periodicamente os arquivos cuja extração foi adiada."""
+
+    while True:
+        await asyncio.sleep(REPROCESS_INTERVAL_SECONDS)
+        try:
+            result = await asyncio.to_thread(reprocess_pending_files_service)
+            if result["processed"] or result["deferred"] or result["failed"]:
+                print(f"INFO: Reprocessing: {result}")
+        except Exception as e:
+            print(f"Erro no reprocessamento: {e}", file=sys.stderr)
+
+async def backup_loop():
+    """Grava snapshots periódicos do banco, sem bloquear as outras requisições."""
+
+    while True:
+        await asyncio.sleep(BACKUP_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(create_snapshot)
+        except Exception as e:
+            print(f"Erro no backup do banco de dados: {e}", file=sys.stderr)
+
+async def maintenance_loop():
+    """Roda periodicamente a manutenção do armazenamento (src/maintenance.py)."""
+
+    while True:
+        await asyncio.sleep(MAINTENANCE_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(run_maintenance)
+        except Exception as e:
+            print(f"Erro na manutenção do armazenamento: {e}", file=sys.stderr)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    # Sem clientes em /events, o laço de eventos só espera (não consulta o banco).
+    background_tasks.append(asyncio.create_task(run_notifier()))
+    if REPROCESS_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(reprocess_pending_loop()))
+    if BACKUP_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(backup_loop()))
+    if MAINTENANCE_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(maintenance_loop()))
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in background_tasks:
+        task.cancel()
+    background_tasks.clear()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    close_writer()
+
+@app.middleware("http")
+async def first_response_middleware(request: Request, call_next):
+    response = await call_next(request)
+    mark_first_response()
+    return response
+
+@app.middleware("http")
+async def memory_profile_middleware(request: Request, call_next):
+    with profile_request() as measurement:
+        measurement.size = int(request.headers.get("content-length") or 0)
+        response = await call_next(request)
+        route = request.scope.get("route")
+        measurement.endpoint = f"{request.method} {route.path}" if route else "unmatched"
+    return response
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    started = time.perf_counter()
+    trace, token = start_trace()
+    try:
+        response = await call_next(request)
+    finally:
+        end_trace(token)
+
+    elapsed = time.perf_counter() - started
+    route = request.scope.get("route")
+    record_request(request.method, route.path if route else "unmatched", response.status_code, elapsed, trace)
+    response.headers["Server-Timing"] = server_timing_header(trace, elapsed)
+    return response
 
 origins = [
     "http://localhost:3000",
@@ -51,19 +205,76 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
-@app.post("/files/process", response_model=FileResponse)
-async def process_file(file: UploadFile = File(...), file_type: str = Form(...)):
+@app.get("/health")
+async def health_endpoint():
     """
-    Processa um arquivo enviado, extrai tópicos e os salva no banco de dados.
+    Endpoint leve de prontidão, consultado pelo Electron para saber quando o backend está no ar.
+    """
+    return {"status": "ok", "startup": get_startup_report()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
     """
+    Endpoint com as métricas do backend no formato texto do Prometheus.
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/memory")
+async def debug_memory_endpoint(limit: int = 20):
+    """
+    Endpoint de debug com os maiores pontos de alocação e a memória por endpoint
+    (requer REVISU_MEMPROFILE=peak|snapshot).
+    """
+    return get_memory_report(limit=limit)
+
+async def _read_upload(file: UploadFile) -> str:
     try:
-        content = await file.read()
-        original_content = content.decode("utf-8")
+        with stage("decode"):
+            content = await file.read()
+            return content.decode("utf-8")
     except UnicodeDecodeError:
         raise HTTPException(
             status_code=400, detail="Não foi possível decodificar o arquivo. Certifique-se de que é um arquivo de texto válido (UTF-8)."
         )
 
+# O que fazer quando a nota enviada é quase igual a um arquivo já processado:
+# "ask" responde 409 com o arquivo parecido, "update" grava a nova versão sobre ele
+# (sem nova extração) e "create" processa como uma nota nova.
+OnDuplicate = Literal["ask", "update", "create"]
+
+async def _resolve_duplicate(file_name: str | None, file_type: str, original_content: str, on_duplicate: OnDuplicate) -> Optional[FileResponse]:
+    if on_duplicate == "create":
+        return None
+
+    duplicate = await asyncio.to_thread(find_duplicate_service, original_content)
+    if duplicate is None:
+        return None
+
+    if on_duplicate == "update":
+        return await asyncio.to_thread(update_duplicate_file_service, duplicate.file_id, file_name, file_type, original_content)
+
+    raise HTTPException(
+        status_code=409,
+        detail={
+            "message": "Já existe uma nota muito parecida.",
+            "file_id": duplicate.file_id,
+            "file_name": duplicate.file_name,
+            "similarity": duplicate.similarity,
+        }
+    )
+
+@app.post("/files/process", response_model=FileResponse)
+async def process_file(file: UploadFile = File(...), file_type: str = Form(...), on_duplicate: OnDuplicate = Form("ask")):
+    """
+    Processa um arquivo enviado, extrai tópicos e os salva no banco de dados.
+    Notas quase iguais a um arquivo existente seguem `on_duplicate`.
+    """
+    original_content = await _read_upload(file)
+
+    updated = await _resolve_duplicate(file.filename, file_type, original_content, on_duplicate)
+    if updated is not None:
+        return updated
+
     processed_file_response = await process_new_file(
         file_name=file.filename,
         file_type=file_type,
@@ -71,6 +282,106 @@ async def process_file(file: UploadFile = File(...), file_type: str = Form(...))
     )
     return processed_file_response
 
+@app.post("/files/process/stream")
+async def process_file_stream(file: UploadFile = File(...), file_type: str = Form(...), on_duplicate: OnDuplicate = Form("ask")):
+    """
+    Processa um arquivo enviado como /files/process, mas transmite o progresso via SSE:
+    eventos "file", "field" (título, resumo, tags e perguntas, à medida que o modelo os gera),
+    "done" com o FileResponse final ou "error". O 409 de quase duplicata sai antes do stream.
+    """
+    original_content = await _read_upload(file)
+    updated = await _resolve_duplicate(file.filename, file_type, original_content, on_duplicate)
+
+    async def event_stream():
+        if updated is not None:
+            yield format_sse("done", updated.model_dump(mode="json"))
+            return
+        try:
+            async for event, data in process_new_file_stream(file.filename, file_type, original_content):
+                if isinstance(data, FileResponse):
+                    data = data.model_dump(mode="json")
+                yield format_sse(event, data)
+        except Exception as e:
+            print(f"Erro no processamento em streaming: {e}", file=sys.stderr)
+            yield format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/files/reprocess")
+async def reprocess_files_endpoint(limit: int = 10):
+    """
+    Endpoint que tenta novamente a extração dos arquivos marcados para reprocessamento.
+    """
+    return await asyncio.to_thread(reprocess_pending_files_service, limit)
+
+@app.post("/backup")
+async def backup_endpoint():
+    """
+    Endpoint que grava um snapshot do banco agora (além dos automáticos).
+    """
+    result = await asyncio.to_thread(create_snapshot)
+    if result is None:
+        raise HTTPException(status_code=409, detail="Backup indisponível: já em andamento ou sem diretório configurado.")
+    return result
+
+@app.get("/export")
+async def export_endpoint(format: Literal["ndjson", "anki"] = "ndjson"):
+    """
+    Exporta a biblioteca inteira em streaming: NDJSON (arquivos, tópicos, tags e agendamento,
+    reimportável por /import) ou texto para importação no Anki.
+    """
+    if format == "anki":
+        body, media_type, filename = export_anki(), "text/tab-separated-values; charset=utf-8", "revisu-anki.txt"
+    else:
+        body, media_type, filename = export_ndjson(), "application/x-ndjson", "revisu-export.ndjson"
+
+    return StreamingResponse(body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.post("/import")
+async def import_endpoint(file: UploadFile = File(...)):
+    """
+    Importa uma exportação NDJSON, em lotes de arquivos por transação.
+    """
+    try:
+        return await asyncio.to_thread(import_ndjson, file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        # Mesmo uma importação interrompida pode ter gravado lotes.
+        library_changed()
+
+@app.get("/events")
+async def events_endpoint():
+    """
+    Stream SSE de eventos (topic_due, ingest_finished, counts_changed), para a interface não
+    precisar consultar os endpoints periodicamente. Começa com os totais atuais em counts_changed
+    e envia um comentário de keepalive a cada KEEPALIVE_SECONDS sem eventos.
+    """
+
+    async def event_stream():
+        queue = subscribe()
+        try:
+            yield format_sse("counts_changed", await asyncio.to_thread(load_counts))
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/files", response_model=List[FileResponse])
 async def get_all_files_api(limit: Optional[int] = None):
     """
@@ -89,6 +400,14 @@ async def get_file_by_id_api(file_id: int):
         raise HTTPException(status_code=404, detail="Arquivo não encontrado.")
     return file_data
 
+@app.delete("/files/{file_id}", status_code=204)
+def delete_file_endpoint(file_id: int):
+    """
+    Remove um arquivo com seus tópicos e tags associadas.
+    """
+    if not delete_file_service(file_id):
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado.")
+
 @app.get("/topics/for-review", response_model=List[TopicResponse])
 async def get_topics_for_review_endpoint():
     """
@@ -99,7 +418,7 @@ async def get_topics_for_review_endpoint():
     return get_topics_for_review_service()
 
 @app.post("/topics/{topic_id}/review")
-async def review_topic_endpoint(topic_id: int, feedback: ReviewFeedback):
+def review_topic_endpoint(topic_id: int, feedback: ReviewFeedback):
     """
     Endpoint que registra o feedback de revisão para um tópico e recalcula a próxima data de revisão.
     """
@@ -112,6 +431,27 @@ async def review_topic_endpoint(topic_id: int, feedback: ReviewFeedback):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao registrar revisão: {e}")
 
+@app.get("/review/session", response_model=ReviewSessionResponse)
+async def review_session_endpoint(size: int = Query(20, ge=1, le=200)):
+    """
+    Retorna os próximos tópicos a revisar com a próxima data já calculada para cada qualidade (0-5).
+    """
+    return get_review_session_service(size)
+
+@app.post("/review/answers", status_code=202)
+async def review_answers_endpoint(request: ReviewAnswersRequest):
+    """
+    Recebe revisões e as grava em segundo plano, respondendo antes do commit.
+    """
+    return {"accepted": submit_review_answers_service(request.answers)}
+
+@app.get("/stats", response_model=StatsResponse)
+async def stats_endpoint(days: int = Query(30, ge=1, le=3650)):
+    """
+    Estatísticas de revisão dos últimos `days` dias, lidas dos agregados diários.
+    """
+    return get_review_stats_service(days)
+
 @app.get("/tags", response_model=List[TagResponse])
 async def get_all_tags_endpoint():
     """
@@ -1,47 +1,71 @@
-import psutil
+"""
+Consulta o profiler de memória em processo do backend (GET /debug/memory).
+
+O backend precisa ser iniciado com REVISU_MEMPROFILE=peak (ou snapshot, para
+atribuir o crescimento de memória a linhas de código). Funciona igualmente com
+uvicorn e com o executável empacotado pelo PyInstaller.
+
+Uso:
+    python monitor_memory.py --url http://127.0.0.1:8000 --limit 15
+    python monitor_memory.py --watch 5 --duration 120
+"""
+import argparse
+import json
 import time
-import os
+import urllib.request
 from datetime import datetime
 
-def monitor_process_memory(process_name_keywords, duration_seconds=60):
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] Initializing memory monitoring for {duration_seconds} seconds...")
-    max_memory_mb = 0
-    target_pid = None
+def _mb(value):
+    return f"{value / (1024 * 1024):.2f} MB" if value is not None else "n/a"
+
+def fetch_report(url, limit):
+    with urllib.request.urlopen(f"{url}/debug/memory?limit={limit}", timeout=10) as response:
+        return json.load(response)
+
+def print_report(report):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Peak RSS: {_mb(report.get('peak_rss_bytes'))}")
 
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-        if 'uvicorn' in proc.name() and 'main:app' in ' '.join(proc.cmdline()):
-            target_pid = proc.pid
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Process Uvicorn/FastAPI found: PID {target_pid}")
-            break
+    if not report.get("enabled"):
+        print("Profiler disabled. Start the backend with REVISU_MEMPROFILE=peak or REVISU_MEMPROFILE=snapshot.")
+        return
 
-    if target_pid is None:
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Error: Uvicorn/FastAPI process not found. Make sure it is running.")
-        return None
+    print(f"Traced memory: current {_mb(report['traced_current_bytes'])}, peak {_mb(report['traced_peak_bytes'])} ({report['mode']} mode)")
+
+    print("\n--- Endpoints ---")
+    endpoints = sorted(report["endpoints"].items(), key=lambda item: item[1]["peak_bytes_max"], reverse=True)
+    for endpoint, stats in endpoints:
+        print(
+            f"{endpoint:<32} reqs {stats['requests']:>6}  "
+            f"peak max {_mb(stats['peak_bytes_max']):>10}  peak mean {_mb(stats['peak_bytes_mean']):>10}  "
+            f"growth total {_mb(stats['growth_bytes_total']):>10}  largest body {_mb(stats['largest_body_bytes'])}"
+        )
+        for site in stats.get("growth_sites", [])[:5]:
+            print(f"    +{_mb(site['size_diff_bytes']):>10}  {site['site']}")
+
+    print("\n--- Top allocation sites (live) ---")
+    for site in report["top_sites"]:
+        print(f"{_mb(site['size_bytes']):>10}  {site['count']:>8} blocks  {site['site']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatório de memória do backend do Revisu.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--limit", type=int, default=15)
+    parser.add_argument("--watch", type=float, default=0, help="Intervalo entre relatórios, em segundos (0 = uma vez).")
+    parser.add_argument("--duration", type=float, default=60, help="Duração total no modo --watch, em segundos.")
+    args = parser.parse_args()
 
     try:
-        process = psutil.Process(target_pid)
-        start_time = time.time()
-        while time.time() - start_time < duration_seconds:
-            current_memory_mb = process.memory_info().rss / (1024 * 1024) # RSS: Resident Set Size
-            if current_memory_mb > max_memory_mb:
-                max_memory_mb = current_memory_mb
-            time.sleep(1)
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Monitoring completed.")
-        return max_memory_mb
-    except psutil.NoSuchProcess:
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] The Uvicorn/FastAPI process (PID {target_pid}) no longer exists.")
-        return None
-    except Exception as e:
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] An error occurred during monitoring: {e}")
-        return None
+        if not args.watch:
+            print_report(fetch_report(args.url, args.limit))
+            return
+
+        started = time.time()
+        while time.time() - started < args.duration:
+            print_report(fetch_report(args.url, args.limit))
+            print()
+            time.sleep(args.watch)
+    except OSError as e:
+        print(f"Not possible to reach the backend at {args.url}: {e}")
 
 if __name__ == "__main__":
-    max_mem = monitor_process_memory(
-        process_name_keywords=['uvicorn', 'main:app'],
-        duration_seconds=120
-    )
-    if max_mem is not None:
-        print(f"\n--- Monitoring Results ---")
-        print(f"High usage of memory: {max_mem:.2f} MB")
-    else:
-        print("Not possible to monitor high usage memory.")
+    main()
@@ -0,0 +1,170 @@
+"""
+Snapshots online do banco pela API de backup do SQLite.
+
+A cópia é feita em passos de poucas páginas, com uma pausa entre eles, a partir de um
+snapshot de leitura do WAL: revisões e ingestões seguem normalmente durante o backup
+e não o fazem recomeçar. O snapshot é gravado num arquivo temporário e renomeado no final,
+de modo que um arquivo de backup nunca fica pela metade.
+
+O banco frio (conteúdo dos arquivos arquivados) é copiado no mesmo snapshot de leitura, para
+um arquivo com o mesmo nome e sufixo ARCHIVE_BACKUP_SUFFIX: o par é criado e removido junto.
+
+REVISU_BACKUP_DIR               diretório dos snapshots (padrão: backups/ ao lado do banco)
+REVISU_BACKUP_INTERVAL_SECONDS  intervalo entre snapshots automáticos (padrão 6 h; 0 desliga)
+REVISU_BACKUP_KEEP              quantos snapshots manter (padrão 7)
+REVISU_BACKUP_PAGES             páginas copiadas por passo (padrão 256)
+REVISU_BACKUP_SLEEP_MS          pausa entre os passos (padrão 5 ms)
+"""
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src import db
+from src.metrics import Counter, Histogram
+
+BACKUP_PREFIX = "revisu-"
+BACKUP_SUFFIX = ".db"
+ARCHIVE_BACKUP_SUFFIX = ".archive.db"
+
+BACKUP_INTERVAL_SECONDS = float(os.getenv("REVISU_BACKUP_INTERVAL_SECONDS", 6 * 3600))
+BACKUP_KEEP = int(os.getenv("REVISU_BACKUP_KEEP", 7))
+BACKUP_PAGES = int(os.getenv("REVISU_BACKUP_PAGES", 256))
+BACKUP_SLEEP_SECONDS = float(os.getenv("REVISU_BACKUP_SLEEP_MS", 5)) / 1000
+
+BACKUPS = Counter("revisu_backups_total", "Snapshots do banco de dados.", ("outcome",))
+BACKUP_DURATION = Histogram("revisu_backup_duration_seconds", "Duração dos snapshots do banco de dados.")
+
+_backup_lock = threading.Lock()
+
+def get_backup_dir() -> Optional[str]:
+    """Diretório dos snapshots; None quando não há onde gravar (banco em memória sem REVISU_BACKUP_DIR)."""
+
+    configured = os.getenv("REVISU_BACKUP_DIR")
+    if configured:
+        return os.path.abspath(configured)
+
+    db_path = db.get_db_path()
+    if db_path == db.MEMORY_DATABASE:
+        return None
+    return os.path.join(os.path.dirname(db_path), "backups")
+
+def archive_backup_path(backup_path: str) -> str:
+    """Snapshot do banco frio que acompanha o snapshot `backup_path`."""
+
+    return backup_path[:-len(BACKUP_SUFFIX)] + ARCHIVE_BACKUP_SUFFIX
+
+def backup_database(destination: str, pages: int = BACKUP_PAGES, sleep: float = BACKUP_SLEEP_SECONDS) -> Dict[str, Any]:
+    """
+    Copia o banco atual para `destination` (e o banco frio, se existir, para archive_backup_path),
+    `pages` páginas por vez, e retorna um resumo.
+    """
+
+    started = time.perf_counter()
+    steps = 0
+
+    def progress(status, remaining, total):
+        nonlocal steps
+        steps += 1
+        # O `sleep` de Connection.backup só vale quando o passo encontra o banco ocupado:
+        # a pausa entre passos é feita aqui, liberando o disco para as outras conexões.
+        if remaining and sleep > 0:
+            time.sleep(sleep)
+
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    archive_destination = archive_backup_path(destination)
+
+    source = db.open_connection(db.get_db_path())
+    with_archive = db.attach_archive(source, db.get_archive_path())
+    copies = [("main", destination)] + ([("archive", archive_destination)] if with_archive else [])
+    temporaries = []
+    try:
+        # Uma transação de leitura aberta fixa o snapshot do WAL dos dois bancos: escritas feitas
+        # por outras conexões durante a cópia não a reiniciam (nem são bloqueadas por ela), e o
+        # banco frio copiado corresponde exatamente ao principal.
+        source.execute("BEGIN")
+        for schema, _ in copies:
+            source.execute(f"SELECT COUNT(*) FROM {schema}.sqlite_master").fetchone()
+
+        for schema, path in copies:
+            temporary = f"{path}.partial"
+            temporaries.append(temporary)
+            target = sqlite3.connect(temporary)
+            try:
+                source.backup(target, pages=pages, progress=progress, name=schema)
+            finally:
+                target.close()
+    except BaseException:
+        for temporary in temporaries:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        raise
+    finally:
+        source.close()
+
+    # O principal é renomeado por último: um snapshot visível sempre tem o seu banco frio.
+    for (_, path), temporary in reversed(list(zip(copies, temporaries))):
+        os.replace(temporary, path)
+
+    return {
+        "path": destination,
+        "archive_path": archive_destination if with_archive else None,
+        "bytes": sum(os.path.getsize(path) for _, path in copies),
+        "steps": steps,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+def list_backups(directory: str) -> List[str]:
+    """Snapshots existentes em `directory`, do mais antigo para o mais novo."""
+
+    if not os.path.isdir(directory):
+        return []
+
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX) and not name.endswith(ARCHIVE_BACKUP_SUFFIX)
+    )
+    return [os.path.join(directory, name) for name in names]
+
+def rotate_backups(directory: str, keep: int) -> List[str]:
+    """Remove os snapshots mais antigos (com o seu banco frio), mantendo os `keep` mais recentes. Retorna os removidos."""
+
+    backups = list_backups(directory)
+    removed = backups[:max(0, len(backups) - keep)]
+    for path in removed:
+        os.remove(path)
+        if os.path.exists(archive_backup_path(path)):
+            os.remove(archive_backup_path(path))
+    return removed
+
+def create_snapshot(directory: Optional[str] = None, keep: int = BACKUP_KEEP) -> Optional[Dict[str, Any]]:
+    """
+    Grava um snapshot com data e hora no nome e aplica a rotação.
+    Retorna None se não houver diretório de backup ou se outro snapshot já estiver em andamento.
+    """
+
+    directory = directory or get_backup_dir()
+    if directory is None:
+        return None
+
+    if not _backup_lock.acquire(blocking=False):
+        return None
+
+    started = time.perf_counter()
+    try:
+        name = f"{BACKUP_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}{BACKUP_SUFFIX}"
+        result = backup_database(os.path.join(directory, name))
+        result["removed"] = rotate_backups(directory, keep)
+    except Exception:
+        BACKUPS.inc(outcome="error")
+        raise
+    else:
+        BACKUPS.inc(outcome="success")
+    finally:
+        BACKUP_DURATION.observe(time.perf_counter() - started)
+        _backup_lock.release()
+
+    print(f"INFO: Database snapshot {result['path']} ({result['bytes']} bytes, {result['steps']} steps, {result['seconds']}s).")
+    return result
@@ -1,24 +1,216 @@
 import sqlite3
 import os
-from typing import List, Dict, Any, Optional
+import sys
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Callable, Iterator, List, Dict, Any, Optional, Tuple
+
+from src.metrics import record_query
+from src.writer import DatabaseWriter
 
 DATABASE_FILE = "revisu_data.db"
+# Banco frio com o conteúdo original dos arquivos maduros, anexado às conexões como `archive`.
+ARCHIVE_FILE = "revisu_archive.db"
+
+# Valor de REVISU_DB_PATH (ou de configure_database) para usar um banco em memória,
+# compartilhado entre as conexões do processo (shared cache). Útil em testes e benchmarks.
+MEMORY_DATABASE = ":memory:"
+_MEMORY_URI = "file:revisu?mode=memory&cache=shared"
+
+# No SM-2, revisões com qualidade >= 3 contam como lembrança correta (nas estatísticas).
+PASSING_QUALITY = 3
+
+# Valor de PRAGMA auto_vacuum para o modo incremental.
+AUTO_VACUUM_INCREMENTAL = 2
+
+# Quanto tempo (s) uma conexão espera pelo lock de escrita de outro processo antes de falhar.
+BUSY_TIMEOUT_SECONDS = float(os.getenv("REVISU_DB_BUSY_TIMEOUT_MS", 5000)) / 1000
+# Janela (s) em que o escritor espera mais escritas para o mesmo commit (0 = só o que já está na fila).
+GROUP_COMMIT_WAIT_SECONDS = float(os.getenv("REVISU_DB_GROUP_COMMIT_WAIT_MS", 0)) / 1000
+
+_configured_path: Optional[str] = None
+_memory_keepalive: Optional[sqlite3.Connection] = None
+_memory_lock = threading.Lock()
+_generation = 0
+_writer: Optional[DatabaseWriter] = None
+_writer_lock = threading.Lock()
+
+def user_data_dir() -> str:
+    """Diretório de dados do usuário: REVISU_DATA_DIR ou o padrão da plataforma."""
+
+    configured = os.getenv("REVISU_DATA_DIR")
+    if configured:
+        return configured
+
+    if sys.platform == "win32":
+        base = os.getenv("APPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "Revisu")
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Application Support/Revisu")
+    return os.path.join(os.getenv("XDG_DATA_HOME") or os.path.expanduser("~/.local/share"), "revisu")
+
+def get_db_path() -> str:
+    """
+    Caminho do banco, na ordem: configure_database(), REVISU_DB_PATH, o diretório de dados
+    do usuário (executável do PyInstaller, onde src/ é temporário) e, por fim, src/DATABASE_FILE.
+    """
+
+    configured = _configured_path or os.getenv("REVISU_DB_PATH")
+    if configured:
+        return configured if configured == MEMORY_DATABASE else os.path.abspath(configured)
+
+    if getattr(sys, "frozen", False):
+        return os.path.join(user_data_dir(), DATABASE_FILE)
+
+    return os.path.join(os.path.dirname(__file__), DATABASE_FILE)
+
+def get_archive_path(db_path: Optional[str] = None) -> Optional[str]:
+    """
+    Caminho do banco frio: REVISU_ARCHIVE_PATH ou ARCHIVE_FILE ao lado do banco principal.
+    None com o banco em memória (sem camada fria).
+    """
+
+    configured = os.getenv("REVISU_ARCHIVE_PATH")
+    if configured:
+        return os.path.abspath(configured)
+
+    db_path = db_path or get_db_path()
+    if db_path == MEMORY_DATABASE:
+        return None
+    return os.path.join(os.path.dirname(db_path), ARCHIVE_FILE)
+
+def configure_database(path: Optional[str]):
+    """
+    Aponta a camada de DB para outro banco (um arquivo ou MEMORY_DATABASE); None volta ao padrão.
+    Encerra o escritor e descarta o banco em memória anterior.
+    """
+
+    global _configured_path, _memory_keepalive, _generation
+
+    close_writer()
+    with _memory_lock:
+        if _memory_keepalive is not None:
+            _memory_keepalive.close()
+            _memory_keepalive = None
+        _configured_path = path
+        _generation += 1
+
+def get_database_generation() -> int:
+    """Muda a cada configure_database: caches em memória derivados do banco devem ser refeitos."""
+
+    return _generation
+
+def open_connection(path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Abre uma conexão crua com o banco em `path` (arquivo ou MEMORY_DATABASE). Sem
+    `check_same_thread`, a conexão pode passar de uma thread a outra (ex.: geradores em streaming).
+    """
+
+    global _memory_keepalive
+
+    if path != MEMORY_DATABASE:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=check_same_thread)
+    else:
+        conn = sqlite3.connect(_MEMORY_URI, uri=True, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        # No cache compartilhado, leitores não travam as tabelas que o escritor está alterando.
+        conn.execute("PRAGMA read_uncommitted = 1")
+        with _memory_lock:
+            if _memory_keepalive is None:
+                # O banco em memória some quando a última conexão fecha; esta fica aberta até configure_database.
+                _memory_keepalive = sqlite3.connect(_MEMORY_URI, uri=True, check_same_thread=False)
+
+    # O SQLite só aplica as chaves estrangeiras (e o ON DELETE CASCADE) com o pragma ligado em cada conexão.
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
 
-def get_db_connection():
+def attach_archive(conn: sqlite3.Connection, archive_path: Optional[str], create: bool = False) -> bool:
+    """
+    Anexa o banco frio à conexão como `archive`. Com `create`, cria o arquivo e a tabela se
+    preciso; sem ele, só anexa um banco frio que já exista. Retorna se o banco foi anexado.
+    """
+
+    if archive_path is None or (not create and not os.path.exists(archive_path)):
+        return False
+
+    conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+    if create:
+        conn.execute("PRAGMA archive.auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA archive.journal_mode = WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS archive.ArchivedContent (
+                file_id INTEGER PRIMARY KEY,
+                original_content TEXT NOT NULL,
+                archived_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+    return True
+
+def _archive_attached(conn: sqlite3.Connection) -> bool:
+    return any(row[1] == "archive" for row in conn.execute("PRAGMA database_list"))
+
+def _open_writer_connection(db_path: str) -> sqlite3.Connection:
+    conn = open_connection(db_path)
+    attach_archive(conn, get_archive_path(db_path), create=True)
+    return conn
+
+def get_db_connection(check_same_thread: bool = True):
     """Obtém uma conexão com o banco de dados."""
 
-    db_path = os.path.join(os.path.dirname(__file__), DATABASE_FILE)
-    conn = sqlite3.connect(db_path)
+    conn = open_connection(get_db_path(), check_same_thread)
     conn.row_factory = sqlite3.Row
+    conn.set_trace_callback(record_query)
 
     return conn
 
+def get_writer() -> DatabaseWriter:
+    """Retorna o escritor único do processo, recriando-o se o caminho do banco mudou."""
+
+    global _writer
+
+    with _writer_lock:
+        db_path = get_db_path()
+        if _writer is not None and _writer.pid != os.getpid():
+            # Processo filho criado por fork: a thread do escritor herdado não existe aqui.
+            _writer = None
+        if _writer is None or _writer.path != db_path:
+            if _writer is not None:
+                _writer.close()
+            _writer = DatabaseWriter(db_path, lambda: _open_writer_connection(db_path), group_wait=GROUP_COMMIT_WAIT_SECONDS)
+
+        return _writer
+
+def close_writer():
+    """Encerra o escritor único, gravando as escritas pendentes."""
+
+    global _writer
+
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+
 def init_db():
     """Inicializa o esquema do banco de dados se não existir."""
 
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    # Com auto_vacuum incremental as páginas liberadas podem ser devolvidas aos poucos
+    # (incremental_vacuum_db). O modo só muda antes de criar as tabelas ou com um VACUUM,
+    # feito uma única vez nos bancos antigos.
+    if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        if cursor.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0]:
+            print("INFO: Converting database to incremental auto_vacuum (one-time VACUUM)...")
+            cursor.execute("VACUUM")
+
+    # WAL: leitores não bloqueiam o escritor (e vice-versa). O modo fica gravado no arquivo.
+    cursor.execute("PRAGMA journal_mode=WAL")
+
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS File (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -26,7 +218,10 @@ def init_db():
             file_name TEXT NOT NULL,
             file_type TEXT NOT NULL,
             original_content TEXT NOT NULL,
-            processed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            processed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            extraction_status TEXT NOT NULL DEFAULT 'done',
+            extraction_attempts INTEGER NOT NULL DEFAULT 0,
+            extraction_error TEXT DEFAULT NULL
         )
     """)
 
@@ -61,32 +256,170 @@ def init_db():
             FOREIGN KEY (tag_id) REFERENCES Tag(id) ON DELETE CASCADE
         )
     """)
+
+    # Impressão digital SimHash de cada arquivo, para achar notas quase duplicadas (src/similarity.py).
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS FileFingerprint (
+            file_id INTEGER PRIMARY KEY,
+            simhash BLOB NOT NULL,
+            FOREIGN KEY (file_id) REFERENCES File(id) ON DELETE CASCADE
+        )
+    """)
+
+    # Histórico de revisões, só de inserção: um registro por revisão, gravado na mesma transação
+    # que atualiza o tópico. Não tem chave estrangeira: o histórico sobrevive ao tópico.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ReviewLog (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic_id INTEGER NOT NULL,
+            reviewed_at DATETIME NOT NULL,
+            quality INTEGER NOT NULL,
+            previous_repetitions INTEGER NOT NULL,
+            previous_ease_factor REAL NOT NULL,
+            repetitions INTEGER NOT NULL,
+            ease_factor REAL NOT NULL,
+            next_review_date DATETIME NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS review_log_no_update BEFORE UPDATE ON ReviewLog
+        BEGIN SELECT RAISE(ABORT, 'ReviewLog aceita apenas inserções'); END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS review_log_no_delete BEFORE DELETE ON ReviewLog
+        BEGIN SELECT RAISE(ABORT, 'ReviewLog aceita apenas inserções'); END
+    """)
+
+    # Agregados diários mantidos a cada revisão: as estatísticas leem só estas tabelas,
+    # com custo proporcional aos dias consultados e não ao tamanho do histórico.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ReviewDaily (
+            day TEXT NOT NULL,
+            quality INTEGER NOT NULL,
+            reviews INTEGER NOT NULL,
+            PRIMARY KEY (day, quality)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS TagReviewDaily (
+            day TEXT NOT NULL,
+            tag_id INTEGER NOT NULL,
+            reviews INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            PRIMARY KEY (day, tag_id)
+        ) WITHOUT ROWID
+    """)
+
+    # Bancos criados antes do reprocessamento adiado não têm as colunas de extração.
+    _ensure_column(cursor, "File", "extraction_status", "TEXT NOT NULL DEFAULT 'done'")
+    _ensure_column(cursor, "File", "extraction_attempts", "INTEGER NOT NULL DEFAULT 0")
+    _ensure_column(cursor, "File", "extraction_error", "TEXT DEFAULT NULL")
+    # Quando o reprocessamento pegou o arquivo pela última vez (ver claim_file_extraction_db).
+    _ensure_column(cursor, "File", "extraction_claimed_at", "DATETIME DEFAULT NULL")
+    # Preenchida quando o conteúdo original foi movido para o banco frio.
+    _ensure_column(cursor, "File", "archived_at", "DATETIME DEFAULT NULL")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_file_extraction_status ON File (extraction_status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_topic_next_review ON Topic (next_review_date)")
+    # Usado pelo ON DELETE CASCADE e pela busca dos tópicos de cada arquivo.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_topic_file ON Topic (file_id)")
     conn.commit()
+
+    attach_archive(conn, get_archive_path(), create=True)
     conn.close()
 
     print("INFO: Database SQLite initialized.")
 
+def _ensure_column(cursor: sqlite3.Cursor, table: str, column: str, definition: str):
+    """Adiciona uma coluna à tabela caso ela ainda não exista."""
+
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in [row["name"] for row in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
 def insert_file(
     file_path: str | None,
     file_name: str | None,
     file_type: str,
-    original_content: str
+    original_content: str,
+    fingerprint: Optional[bytes] = None
     ) -> int | None:
-    """Insere um novo arquivo no DB e retorna seu ID."""
+    """Insere um novo arquivo no DB (com sua impressão digital, se dada) e retorna seu ID."""
+
+    def write(conn: sqlite3.Connection) -> int | None:
+        cursor = conn.execute(
+            "INSERT INTO File (file_path, file_name, file_type, original_content, extraction_status) VALUES (?, ?, ?, ?, 'processing')",
+            (file_path, file_name, file_type, original_content)
+        )
+        if fingerprint is not None:
+            conn.execute("INSERT INTO FileFingerprint (file_id, simhash) VALUES (?, ?)", (cursor.lastrowid, fingerprint))
+        return cursor.lastrowid
+
+    return get_writer().execute(write)
+
+def update_file_content_db(file_id: int, file_name: str | None, file_type: str, original_content: str, fingerprint: bytes) -> bool:
+    """
+    Substitui o conteúdo de um arquivo existente por uma nova versão, mantendo seus tópicos
+    (e o histórico de revisão). Retorna False se o arquivo não existir.
+    """
+
+    def write(conn: sqlite3.Connection) -> bool:
+        cursor = conn.execute(
+            """
+            UPDATE File
+            SET file_path = ?, file_name = ?, file_type = ?, original_content = ?,
+                processed_at = CURRENT_TIMESTAMP, archived_at = NULL
+            WHERE id = ?
+            """,
+            (file_name, file_name, file_type, original_content, file_id)
+        )
+        if cursor.rowcount == 0:
+            return False
+
+        if _archive_attached(conn):
+            conn.execute("DELETE FROM archive.ArchivedContent WHERE file_id = ?", (file_id,))
+        conn.execute("INSERT OR REPLACE INTO FileFingerprint (file_id, simhash) VALUES (?, ?)", (file_id, fingerprint))
+        return True
+
+    return get_writer().execute(write)
+
+def set_file_fingerprints_db(fingerprints: List[Tuple[int, bytes]]):
+    """Grava as impressões digitais (file_id, simhash) de vários arquivos numa só escrita."""
+
+    def write(conn: sqlite3.Connection):
+        conn.executemany("INSERT OR REPLACE INTO FileFingerprint (file_id, simhash) VALUES (?, ?)", fingerprints)
+
+    get_writer().execute(write)
+
+def get_fingerprints_db(after_file_id: int = 0) -> List[Tuple[int, bytes]]:
+    """Impressões digitais dos arquivos com ID maior que `after_file_id`, em ordem de ID."""
 
     conn = get_db_connection()
-    cursor = conn.cursor()
+    rows = conn.execute(
+        "SELECT file_id, simhash FROM FileFingerprint WHERE file_id > ? ORDER BY file_id",
+        (after_file_id,)
+    ).fetchall()
+    conn.close()
 
-    cursor.execute(
-        "INSERT INTO File (file_path, file_name, file_type, original_content) VALUES (?, ?, ?, ?)",
-        (file_path, file_name, file_type, original_content)
-    )
-    file_id = cursor.lastrowid
-    conn.commit()
+    return [(row["file_id"], row["simhash"]) for row in rows]
 
+def get_files_without_fingerprint_db(limit: int) -> List[int]:
+    """IDs de arquivos gravados antes das impressões digitais existirem."""
+
+    conn = get_db_connection()
+    rows = conn.execute(
+        """
+        SELECT f.id FROM File f
+        LEFT JOIN FileFingerprint fp ON fp.file_id = f.id
+        WHERE fp.file_id IS NULL
+        ORDER BY f.id
+        LIMIT ?
+        """,
+        (limit,)
+    ).fetchall()
     conn.close()
 
-    return file_id
+    return [row["id"] for row in rows]
 
 def insert_topic(
     file_id: int | None,
@@ -100,51 +433,140 @@ def insert_topic(
 ) -> int | None:
     """Insere um novo tópico no DB e retorna seu ID."""
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "INSERT INTO Topic (file_id, title, summary, questions, next_review_date, ease_factor, repetitions, last_reviewed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-        (file_id, title, summary, questions_json, next_review_date, ease_factor, repetitions, last_reviewed)
-    )
-
-    topic_id = cursor.lastrowid
-    conn.commit()
-
-    conn.close()
+    def write(conn: sqlite3.Connection) -> int | None:
+        cursor = conn.execute(
+            "INSERT INTO Topic (file_id, title, summary, questions, next_review_date, ease_factor, repetitions, last_reviewed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (file_id, title, summary, questions_json, next_review_date, ease_factor, repetitions, last_reviewed)
+        )
+        return cursor.lastrowid
 
-    return topic_id
+    return get_writer().execute(write)
 
 def get_or_create_tag(tag_name: str) -> int:
     """Busca um tag existente ou cria um novo, retornando seu ID."""
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    def write(conn: sqlite3.Connection) -> int:
+        conn.execute("INSERT OR IGNORE INTO Tag (name) VALUES (?)", (tag_name,))
+        return conn.execute("SELECT id FROM Tag WHERE name = ?", (tag_name,)).fetchone()["id"]
 
-    cursor.execute("INSERT OR IGNORE INTO Tag (name) VALUES (?)", (tag_name,))
-    conn.commit()
+    return get_writer().execute(write)
 
-    cursor.execute("SELECT id FROM Tag WHERE name = ?", (tag_name,))
-    tag_id = cursor.fetchone()["id"]
+def link_topic_to_tag(topic_id: int | None, tag_id: int):
+    """Associa um tópico a uma tag."""
 
-    conn.close()
+    def write(conn: sqlite3.Connection):
+        conn.execute(
+            "INSERT OR IGNORE INTO TopicTag (topic_id, tag_id) VALUES (?, ?)", # Usar IGNORE para evitar duplicatas
+            (topic_id, tag_id),
+        )
 
-    return tag_id
+    get_writer().execute(write)
 
-def link_topic_to_tag(topic_id: int | None, tag_id: int):
-    """Associa um tópico a uma tag."""
+def store_extraction_db(
+    file_id: int | None,
+    title: Optional[str],
+    summary: str,
+    questions_json: str,
+    next_review_date: str,
+    tags: List[str]
+) -> int | None:
+    """
+    Grava numa só transação do escritor o tópico extraído de um arquivo, as tags e os vínculos,
+    e marca a extração do arquivo como concluída. Retorna o ID do tópico.
+    """
+
+    def write(conn: sqlite3.Connection) -> int | None:
+        topic_id = conn.execute(
+            "INSERT INTO Topic (file_id, title, summary, questions, next_review_date, ease_factor, repetitions, last_reviewed) VALUES (?, ?, ?, ?, ?, 2.5, 0, NULL)",
+            (file_id, title, summary, questions_json, next_review_date)
+        ).lastrowid
+
+        for tag_name in tags:
+            conn.execute("INSERT OR IGNORE INTO Tag (name) VALUES (?)", (tag_name,))
+            tag_id = conn.execute("SELECT id FROM Tag WHERE name = ?", (tag_name,)).fetchone()["id"]
+            conn.execute("INSERT OR IGNORE INTO TopicTag (topic_id, tag_id) VALUES (?, ?)", (topic_id, tag_id))
+
+        conn.execute(
+            "UPDATE File SET extraction_status = 'done', extraction_error = NULL WHERE id = ?",
+            (file_id,)
+        )
+        return topic_id
+
+    return get_writer().execute(write)
+
+def update_file_extraction_db(file_id: int | None, status: str, error: Optional[str] = None):
+    """
+    Atualiza o estado de extração de um arquivo ('processing', 'pending', 'done' ou 'failed').
+    Falhas (estado com erro) contam como uma tentativa.
+    """
+
+    def write(conn: sqlite3.Connection):
+        conn.execute(
+            """
+            UPDATE File
+            SET extraction_status = ?,
+                extraction_error = ?,
+                extraction_attempts = extraction_attempts + ?
+            WHERE id = ?
+            """,
+            (status, error, 1 if error else 0, file_id)
+        )
+
+    get_writer().execute(write)
+
+def claim_file_extraction_db(file_id: int, status: str, claimed_at: Optional[str]) -> bool:
+    """
+    Marca como 'processing' um arquivo lido por get_pending_files_db, desde que ele continue no
+    estado lido (`status` e `claimed_at`). Com vários processos, só um consegue pegar cada
+    arquivo; retorna False se outro já o pegou.
+    """
+
+    def write(conn: sqlite3.Connection) -> bool:
+        return conn.execute(
+            """
+            UPDATE File
+            SET extraction_status = 'processing', extraction_claimed_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND extraction_status = ? AND extraction_claimed_at IS ?
+            """,
+            (file_id, status, claimed_at)
+        ).rowcount > 0
+
+    return get_writer().execute(write)
+
+def get_pending_files_db(limit: int, max_attempts: int, stale_minutes: int = 10) -> List[Dict[str, Any]]:
+    """
+    Retorna arquivos com extração adiada que ainda podem ser reprocessados, incluindo os que
+    ficaram presos em 'processing' há mais de `stale_minutes` (ex.: o processo caiu no meio).
+    """
 
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    try:
-        cursor.execute(
-            "INSERT OR IGNORE INTO TopicTag (topic_id, tag_id) VALUES (?, ?)", # Usar IGNORE para evitar duplicatas
-            (topic_id, tag_id),
-        )
-        conn.commit()
-    finally:
-        conn.close()
+    cursor.execute(
+        """
+        SELECT id, file_name, original_content, extraction_attempts, extraction_status, extraction_claimed_at
+        FROM File
+        WHERE extraction_attempts < ?
+          AND (
+            extraction_status = 'pending'
+            OR (
+              extraction_status = 'processing'
+              AND COALESCE(extraction_claimed_at, processed_at) <= datetime('now', ?)
+            )
+          )
+        ORDER BY extraction_attempts ASC, id ASC
+        LIMIT ?
+        """,
+        (max_attempts, f"-{stale_minutes} minutes", limit)
+    )
+    files_db = cursor.fetchall()
+
+    conn.close()
+
+    return [dict(file_row) for file_row in files_db]
+
+# Colunas de File usadas nas listagens: o conteúdo original só é lido por get_file_content_db.
+FILE_COLUMNS = "id, file_path, file_name, file_type, processed_at, extraction_status, extraction_attempts, extraction_error, archived_at"
 
 def get_all_files_db(limit: Optional[int] = None) -> List[Dict[str, Any]]:
     """Busca todos os arquivos do DB, com seus tópicos e tags."""
@@ -152,7 +574,7 @@ def get_all_files_db(limit: Optional[int] = None) -> List[Dict[str, Any]]:
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    query = "SELECT * FROM File ORDER BY processed_at DESC"
+    query = f"SELECT {FILE_COLUMNS} FROM File ORDER BY processed_at DESC"
     if limit is not None:
         query += f" LIMIT {limit}"
 
@@ -175,7 +597,7 @@ def get_file_by_id_db(file_id: int | None) -> Optional[Dict[str, Any]]:
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    cursor.execute("SELECT * FROM File WHERE id = ?", (file_id,))
+    cursor.execute(f"SELECT {FILE_COLUMNS} FROM File WHERE id = ?", (file_id,))
     file_data = cursor.fetchone()
 
     conn.close()
@@ -187,6 +609,238 @@ def get_file_by_id_db(file_id: int | None) -> Optional[Dict[str, Any]]:
 
     return None
 
+def get_file_content_db(file_id: int | None) -> Optional[str]:
+    """Retorna o conteúdo original de um arquivo, buscando-o no banco frio se já foi arquivado."""
+
+    conn = get_db_connection()
+    row = conn.execute("SELECT original_content, archived_at FROM File WHERE id = ?", (file_id,)).fetchone()
+
+    content = None
+    if row is not None:
+        content = row["original_content"]
+        if row["archived_at"] is not None and attach_archive(conn, get_archive_path()):
+            archived = conn.execute("SELECT original_content FROM archive.ArchivedContent WHERE file_id = ?", (file_id,)).fetchone()
+            if archived is not None:
+                content = archived["original_content"]
+
+    conn.close()
+
+    return content
+
+def delete_file_db(file_id: int) -> bool:
+    """Remove um arquivo; seus tópicos e associações com tags saem junto pelo ON DELETE CASCADE."""
+
+    def write(conn: sqlite3.Connection) -> bool:
+        if _archive_attached(conn):
+            conn.execute("DELETE FROM archive.ArchivedContent WHERE file_id = ?", (file_id,))
+        return conn.execute("DELETE FROM File WHERE id = ?", (file_id,)).rowcount > 0
+
+    return get_writer().execute(write)
+
+def archive_mature_files_db(min_repetitions: int, min_interval_days: float, limit: int) -> List[int]:
+    """
+    Move para o banco frio o conteúdo original de até `limit` arquivos maduros: todos os tópicos
+    com pelo menos `min_repetitions` revisões e intervalo atual de `min_interval_days` dias ou mais.
+    Retorna os IDs arquivados (nenhum se não houver banco frio).
+    """
+
+    # Em WAL, uma transação sobre bancos anexados só é atômica em cada arquivo, e o SQLite
+    # grava o `main` antes do `archive`. Por isso a cópia e a limpeza são duas escritas:
+    # primeiro o conteúdo é gravado no banco frio e só depois é apagado do principal, e apenas
+    # dos arquivos cuja cópia já está lá. Uma falha entre as duas deixa o conteúdo nos dois
+    # bancos, e a próxima rodada repete as duas escritas sem efeito colateral.
+
+    def copy(conn: sqlite3.Connection) -> List[int]:
+        if not _archive_attached(conn):
+            return []
+
+        rows = conn.execute(
+            """
+            SELECT f.id
+            FROM File f
+            WHERE f.archived_at IS NULL
+              AND f.extraction_status = 'done'
+              AND EXISTS (SELECT 1 FROM Topic t WHERE t.file_id = f.id)
+              AND NOT EXISTS (
+                SELECT 1 FROM Topic t
+                WHERE t.file_id = f.id
+                  AND (
+                    t.repetitions < ?
+                    OR t.last_reviewed IS NULL
+                    OR julianday(t.next_review_date) - julianday(t.last_reviewed) < ?
+                  )
+              )
+            ORDER BY f.id
+            LIMIT ?
+            """,
+            (min_repetitions, min_interval_days, limit)
+        ).fetchall()
+        file_ids = [row["id"] for row in rows]
+        if not file_ids:
+            return []
+
+        placeholders = ", ".join("?" for _ in file_ids)
+        conn.execute(
+            f"INSERT OR REPLACE INTO archive.ArchivedContent (file_id, original_content) SELECT id, original_content FROM File WHERE id IN ({placeholders})",
+            file_ids
+        )
+        return file_ids
+
+    def clear(conn: sqlite3.Connection) -> List[int]:
+        placeholders = ", ".join("?" for _ in copied_ids)
+        # Só apaga o que tem no banco frio uma cópia idêntica: um arquivo editado entre as duas
+        # escritas (o que remove a cópia antiga) continua no banco principal.
+        rows = conn.execute(
+            f"""
+            SELECT f.id
+            FROM File f
+            JOIN archive.ArchivedContent a ON a.file_id = f.id
+            WHERE f.id IN ({placeholders})
+              AND f.archived_at IS NULL
+              AND a.original_content = f.original_content
+            """,
+            copied_ids
+        ).fetchall()
+        file_ids = [row["id"] for row in rows]
+        if not file_ids:
+            return []
+
+        placeholders = ", ".join("?" for _ in file_ids)
+        conn.execute(
+            f"UPDATE File SET original_content = '', archived_at = CURRENT_TIMESTAMP WHERE id IN ({placeholders})",
+            file_ids
+        )
+        return file_ids
+
+    copied_ids = get_writer().execute(copy)
+    if not copied_ids:
+        return []
+    return get_writer().execute(clear)
+
+def incremental_vacuum_db(max_pages: int) -> int:
+    """Devolve ao sistema até `max_pages` páginas livres de cada banco. Retorna quantas foram liberadas."""
+
+    def write(conn: sqlite3.Connection) -> int:
+        freed = 0
+        for schema in ("main", "archive") if _archive_attached(conn) else ("main",):
+            # Fora do modo INCREMENTAL (ex.: um banco frio antigo em REVISU_ARCHIVE_PATH) o pragma não faz nada.
+            if conn.execute(f"PRAGMA {schema}.auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+                continue
+            free_pages = conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+            if not free_pages:
+                continue
+            # O pragma libera uma página a cada passo e o sqlite3 do Python só dá um passo
+            # em comandos sem colunas de resultado: uma execução por página.
+            for _ in range(min(free_pages, max_pages)):
+                conn.execute(f"PRAGMA {schema}.incremental_vacuum(1)")
+            freed += free_pages - conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+        return freed
+
+    return get_writer().execute(write)
+
+def _fetch_in_batches(cursor: sqlite3.Cursor, batch_size: int) -> Iterator[sqlite3.Row]:
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+def iter_library_db(batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+    """
+    Percorre a biblioteca inteira, um arquivo por vez (com conteúdo original, tópicos e tags),
+    num único snapshot de leitura e com memória constante: os arquivos e os tópicos (ordenados
+    por file_id) são lidos por dois cursores em lotes de `batch_size` e intercalados.
+    """
+
+    conn = get_db_connection(check_same_thread=False)
+    try:
+        archived = attach_archive(conn, get_archive_path())
+        content = "COALESCE(a.original_content, f.original_content)" if archived else "f.original_content"
+        archive_join = "LEFT JOIN archive.ArchivedContent a ON a.file_id = f.id" if archived else ""
+
+        conn.execute("BEGIN")
+        files = conn.execute(f"""
+            SELECT f.id, f.file_path, f.file_name, f.file_type, f.processed_at, f.extraction_status,
+                   {content} AS original_content
+            FROM File f
+            {archive_join}
+            ORDER BY f.id
+        """)
+        topics = conn.cursor()
+        # As tags vêm de uma subconsulta por tópico: sem GROUP BY, os tópicos saem direto de idx_topic_file.
+        topics.execute("""
+            SELECT t.id, t.file_id, t.title, t.summary, t.questions, t.next_review_date,
+                   t.ease_factor, t.repetitions, t.last_reviewed,
+                   (
+                     SELECT GROUP_CONCAT(tg.name)
+                     FROM TopicTag tt JOIN Tag tg ON tg.id = tt.tag_id
+                     WHERE tt.topic_id = t.id
+                   ) AS tags_names
+            FROM Topic t
+            ORDER BY t.file_id, t.id
+        """)
+
+        topic_rows = _fetch_in_batches(topics, batch_size)
+        pending = next(topic_rows, None)
+        for file_row in _fetch_in_batches(files, batch_size):
+            file_data = dict(file_row)
+            file_data["topics"] = []
+            while pending is not None and pending["file_id"] <= file_data["id"]:
+                if pending["file_id"] == file_data["id"]:
+                    file_data["topics"].append(dict(pending))
+                pending = next(topic_rows, None)
+            yield file_data
+    finally:
+        conn.close()
+
+def submit_import_files_db(files: List[Dict[str, Any]]) -> Future:
+    """
+    Enfileira no escritor um lote de arquivos importados, com tópicos, tags e impressões digitais,
+    gravado numa só transação. Cada arquivo traz os campos de File e uma lista "topics" (questions
+    já em JSON, tags como lista). O Future retorna quantos tópicos foram gravados.
+    """
+
+    def write(conn: sqlite3.Connection) -> int:
+        tag_ids: Dict[str, int] = {}
+        topics = 0
+
+        for file_data in files:
+            file_id = conn.execute(
+                """
+                INSERT INTO File (file_path, file_name, file_type, original_content, processed_at, extraction_status)
+                VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?)
+                """,
+                (
+                    file_data["file_path"], file_data["file_name"], file_data["file_type"],
+                    file_data["original_content"], file_data["processed_at"], file_data["extraction_status"]
+                )
+            ).lastrowid
+            if file_data.get("fingerprint") is not None:
+                conn.execute("INSERT INTO FileFingerprint (file_id, simhash) VALUES (?, ?)", (file_id, file_data["fingerprint"]))
+
+            for topic in file_data["topics"]:
+                topic_id = conn.execute(
+                    "INSERT INTO Topic (file_id, title, summary, questions, next_review_date, ease_factor, repetitions, last_reviewed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        file_id, topic["title"], topic["summary"], topic["questions"], topic["next_review_date"],
+                        topic["ease_factor"], topic["repetitions"], topic["last_reviewed"]
+                    )
+                ).lastrowid
+                topics += 1
+
+                for tag_name in topic["tags"]:
+                    if tag_name not in tag_ids:
+                        conn.execute("INSERT OR IGNORE INTO Tag (name) VALUES (?)", (tag_name,))
+                        tag_ids[tag_name] = conn.execute("SELECT id FROM Tag WHERE name = ?", (tag_name,)).fetchone()["id"]
+                conn.executemany(
+                    "INSERT OR IGNORE INTO TopicTag (topic_id, tag_id) VALUES (?, ?)",
+                    [(topic_id, tag_ids[tag_name]) for tag_name in topic["tags"]]
+                )
+
+        return topics
+
+    return get_writer().submit(write)
+
 def get_topics_for_file_db(file_id: int) -> List[Dict[str, Any]]:
     """Busca todos os tópicos e suas tags para um dado file_id."""
 
@@ -209,27 +863,64 @@ def get_topics_for_file_db(file_id: int) -> List[Dict[str, Any]]:
 
     return [dict(topic_row) for topic_row in topics_db]
 
-def get_topics_for_review_db() -> List[Dict[str, Any]]:
-    """Retorna tópicos prontos para revisão do DB."""
+def get_topics_for_review_db(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Retorna tópicos prontos para revisão do DB (os mais atrasados primeiro), opcionalmente limitado."""
 
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    # O limite é aplicado antes do JOIN com as tags, percorrendo idx_topic_next_review.
+    # As datas são gravadas em ISO local (datetime.isoformat): a comparação usa o mesmo formato,
+    # e não o CURRENT_TIMESTAMP do SQLite (UTC, com espaço no lugar do "T").
     cursor.execute("""
         SELECT t.*, GROUP_CONCAT(tg.name) AS tags_names
-        FROM Topic t
+        FROM (
+            SELECT * FROM Topic
+            WHERE next_review_date <= ?
+            ORDER BY next_review_date ASC
+            LIMIT ?
+        ) t
         LEFT JOIN TopicTag tt ON t.id = tt.topic_id
         LEFT JOIN Tag tg ON tt.tag_id = tg.id
-        WHERE t.next_review_date <= CURRENT_TIMESTAMP
         GROUP BY t.id
         ORDER BY t.next_review_date ASC
-    """)
+    """, (datetime.now().isoformat(), -1 if limit is None else limit))
     topics_db = cursor.fetchall()
 
     conn.close()
 
     return [dict(topic_row) for topic_row in topics_db]
 
+def count_topics_for_review_db() -> int:
+    """Conta os tópicos prontos para revisão."""
+
+    conn = get_db_connection()
+    count = conn.execute("SELECT COUNT(*) FROM Topic WHERE next_review_date <= ?", (datetime.now().isoformat(),)).fetchone()[0]
+    conn.close()
+
+    return count
+
+def get_topics_due_between_db(start: str, end: str) -> List[Tuple[int, str]]:
+    """Retorna (id, next_review_date) dos tópicos que vencem depois de `start` e até `end` (ISO)."""
+
+    conn = get_db_connection()
+    rows = conn.execute(
+        "SELECT id, next_review_date FROM Topic WHERE next_review_date > ? AND next_review_date <= ?",
+        (start, end)
+    ).fetchall()
+    conn.close()
+
+    return [(row["id"], row["next_review_date"]) for row in rows]
+
+def count_files_db() -> int:
+    """Conta os arquivos da biblioteca."""
+
+    conn = get_db_connection()
+    count = conn.execute("SELECT COUNT(*) FROM File").fetchone()[0]
+    conn.close()
+
+    return count
+
 def get_topic_review_data_db(topic_id: int) -> Optional[Dict[str, Any]]:
     """Busca dados de revisão de um tópico específico."""
 
@@ -243,21 +934,100 @@ def get_topic_review_data_db(topic_id: int) -> Optional[Dict[str, Any]]:
 
     return dict(data) if data else None
 
-def update_topic_review_data_db(topic_id: int, next_review_date: str, repetitions: int, ease_factor: float, last_reviewed: str):
-    """Atualiza os dados de revisão de um tópico no DB."""
-
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def _log_review(
+    conn: sqlite3.Connection,
+    topic_id: int,
+    quality: int,
+    reviewed_at: str,
+    previous: sqlite3.Row,
+    repetitions: int,
+    ease_factor: float,
+    next_review_date: str
+):
+    """Acrescenta a revisão ao ReviewLog e atualiza os agregados do dia (dentro da transação corrente)."""
+
+    conn.execute(
+        """
+        INSERT INTO ReviewLog (topic_id, reviewed_at, quality, previous_repetitions, previous_ease_factor, repetitions, ease_factor, next_review_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (topic_id, reviewed_at, quality, previous["repetitions"], previous["ease_factor"], repetitions, ease_factor, next_review_date)
+    )
 
-    cursor.execute(
-        "UPDATE Topic SET next_review_date = ?, repetitions = ?, ease_factor = ?, last_reviewed = ? WHERE id = ?",
-        (next_review_date, repetitions, ease_factor, last_reviewed, topic_id)
+    # reviewed_at é um ISO local: o dia é o prefixo YYYY-MM-DD.
+    day = reviewed_at[:10]
+    conn.execute(
+        """
+        INSERT INTO ReviewDaily (day, quality, reviews) VALUES (?, ?, 1)
+        ON CONFLICT (day, quality) DO UPDATE SET reviews = reviews + 1
+        """,
+        (day, quality)
+    )
+    conn.execute(
+        """
+        INSERT INTO TagReviewDaily (day, tag_id, reviews, correct)
+        SELECT ?, tag_id, 1, ? FROM TopicTag WHERE topic_id = ?
+        ON CONFLICT (day, tag_id) DO UPDATE SET reviews = reviews + 1, correct = correct + excluded.correct
+        """,
+        (day, 1 if quality >= PASSING_QUALITY else 0, topic_id)
     )
 
-    conn.commit()
+def submit_topic_review_db(
+    topic_id: int,
+    quality: int,
+    schedule: Callable[[int, float], Tuple[str, int, float]],
+    last_reviewed: str
+) -> Future:
+    """
+    Enfileira a revisão de um tópico no escritor, sem esperar o commit. A leitura dos dados atuais,
+    a atualização do tópico e o registro no ReviewLog (com os agregados diários) acontecem na mesma
+    transação; `schedule(repetitions, ease_factor)` retorna (next_review_date, repetitions, ease_factor).
+    O Future retorna a next_review_date e falha com ValueError se o tópico não existir.
+    """
+
+    def write(conn: sqlite3.Connection) -> str:
+        current = conn.execute("SELECT repetitions, ease_factor FROM Topic WHERE id = ?", (topic_id,)).fetchone()
+        if current is None:
+            raise ValueError(f"Tópico {topic_id} não encontrado.")
+
+        next_review_date, repetitions, ease_factor = schedule(current["repetitions"], current["ease_factor"])
+        conn.execute(
+            "UPDATE Topic SET next_review_date = ?, repetitions = ?, ease_factor = ?, last_reviewed = ? WHERE id = ?",
+            (next_review_date, repetitions, ease_factor, last_reviewed, topic_id)
+        )
+        _log_review(conn, topic_id, quality, last_reviewed, current, repetitions, ease_factor, next_review_date)
+        return next_review_date
+
+    return get_writer().submit(write)
+
+def get_review_stats_db(since_day: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Lê os agregados de revisão a partir de `since_day` (YYYY-MM-DD): revisões por dia e qualidade
+    ("daily") e, somadas no período, revisões e acertos por tag ("tags"). Não toca no ReviewLog.
+    """
+
+    conn = get_db_connection()
+
+    daily = conn.execute(
+        "SELECT day, quality, reviews FROM ReviewDaily WHERE day >= ? ORDER BY day, quality",
+        (since_day,)
+    ).fetchall()
+    tags = conn.execute(
+        """
+        SELECT tg.name AS tag, SUM(d.reviews) AS reviews, SUM(d.correct) AS correct
+        FROM TagReviewDaily d
+        JOIN Tag tg ON tg.id = d.tag_id
+        WHERE d.day >= ?
+        GROUP BY d.tag_id
+        ORDER BY reviews DESC, tg.name
+        """,
+        (since_day,)
+    ).fetchall()
 
     conn.close()
 
+    return {"daily": [dict(row) for row in daily], "tags": [dict(row) for row in tags]}
+
 def get_all_tags_db() -> List[Dict[str, Any]]:
     """Retorna todas as tags do DB."""
 
@@ -0,0 +1,332 @@
+"""
+Eventos enviados aos clientes por SSE (GET /events), no lugar de consultas periódicas:
+
+topic_due        tópicos cuja next_review_date acabou de chegar ({"topic_ids": [...]})
+ingest_finished  um arquivo terminou de ser processado ({"file_id", "file_name", "extraction_status"})
+counts_changed   novos totais da biblioteca ({"files", "due"}), só quando mudam
+
+Os vencimentos vêm de uma roda de temporizadores em memória, carregada com os tópicos que vencem
+na próxima janela (pelo idx_topic_next_review) e atualizada a cada revisão ou extração feita neste
+processo; mudanças feitas por outro processo aparecem na recarga seguinte da janela. Sem clientes
+inscritos, o laço fica parado esperando uma inscrição, sem consultar o banco.
+
+REVISU_EVENTS_KEEPALIVE_SECONDS  intervalo dos comentários de keepalive no stream (padrão 15)
+REVISU_DUE_WINDOW_SECONDS        janela de vencimentos carregada na roda (padrão 3600)
+"""
+import os
+import sys
+import time
+import asyncio
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src import db
+from src.metrics import Counter
+
+KEEPALIVE_SECONDS = float(os.getenv("REVISU_EVENTS_KEEPALIVE_SECONDS", 15))
+DUE_WINDOW_SECONDS = int(os.getenv("REVISU_DUE_WINDOW_SECONDS", 3600))
+
+WHEEL_TICK_SECONDS = 1.0
+# Eventos guardados por cliente; um cliente que não lê a tempo perde os mais antigos.
+SUBSCRIBER_QUEUE_SIZE = 100
+# Espera antes de recontar, para juntar numa contagem só as mudanças que chegam em sequência.
+COUNTS_DEBOUNCE_SECONDS = 0.25
+# Espera antes de tentar de novo quando um passo do laço falha (ex.: erro no banco).
+NOTIFIER_RETRY_SECONDS = 5.0
+
+PUBLISHED_EVENTS = Counter("revisu_events_published_total", "Eventos enviados aos clientes inscritos em /events.", ("event",))
+
+def _timestamp(value: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+class TimerWheel:
+    """
+    Roda de temporizadores com `slots` posições de `tick` segundos: agendar, remover e avançar
+    custam O(1) por tópico. Só guarda vencimentos anteriores a `horizon` (uma volta da roda).
+    """
+
+    def __init__(self, start: float, slots: int, tick: float = WHEEL_TICK_SECONDS):
+        self._tick = tick
+        self._slots: List[Dict[int, float]] = [{} for _ in range(slots)]
+        self._slot_of: Dict[int, int] = {}
+        self._current = int(start // tick)
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    @property
+    def horizon(self) -> float:
+        return (self._current + len(self._slots)) * self._tick
+
+    def add(self, key: int, due: float) -> bool:
+        """Agenda (ou reagenda) `key` para `due` (epoch). Retorna False se o vencimento passar do horizonte."""
+
+        self.remove(key)
+        if due >= self.horizon:
+            return False
+
+        # Vencimentos já passados caem na posição atual e saem no próximo avanço.
+        slot = max(int(due // self._tick), self._current) % len(self._slots)
+        self._slots[slot][key] = due
+        self._slot_of[key] = slot
+        return True
+
+    def remove(self, key: int):
+        slot = self._slot_of.pop(key, None)
+        if slot is not None:
+            del self._slots[slot][key]
+
+    def advance(self, now: float) -> List[int]:
+        """Gira a roda até `now` e retorna as chaves vencidas, da mais antiga à mais recente."""
+
+        target = int(now // self._tick)
+        last = min(target, self._current + len(self._slots) - 1)
+
+        expired = []
+        for tick in range(self._current, last + 1):
+            slot = self._slots[tick % len(self._slots)]
+            for key, due in list(slot.items()):
+                if due <= now:
+                    expired.append((due, key))
+                    del slot[key]
+                    del self._slot_of[key]
+
+        self._current = max(self._current, target)
+        return [key for _, key in sorted(expired)]
+
+    def next_due(self) -> Optional[float]:
+        """Próximo vencimento guardado na roda, ou None se estiver vazia."""
+
+        if not self._slot_of:
+            return None
+        for offset in range(len(self._slots)):
+            slot = self._slots[(self._current + offset) % len(self._slots)]
+            if slot:
+                return min(slot.values())
+        return None
+
+def _put_latest(queue: asyncio.Queue, item):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
+
+class EventBroker:
+    """Entrega cada evento às filas asyncio dos clientes inscritos. `publish` pode ser chamado de qualquer thread."""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self._queue_size = queue_size
+        self._subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Cria a fila de um cliente (deve ser chamado dentro do event loop que vai lê-la)."""
+
+        queue: asyncio.Queue = asyncio.Queue(self._queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def publish(self, event: str, data: Any):
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(_put_latest, queue, (event, data))
+            except RuntimeError:
+                # Event loop já encerrado: o cliente não existe mais.
+                self.unsubscribe(queue)
+
+        if subscribers:
+            PUBLISHED_EVENTS.inc(event=event)
+
+def load_counts() -> Dict[str, int]:
+    """Totais enviados em counts_changed."""
+
+    return {"files": db.count_files_db(), "due": db.count_topics_for_review_db()}
+
+class DueNotifier:
+    """
+    Laço que publica os vencimentos da roda e os totais alterados. Os ganchos (topic_scheduled,
+    library_changed) são chamados de qualquer thread e apenas acordam o laço.
+    """
+
+    def __init__(self, broker: EventBroker, window_seconds: int = DUE_WINDOW_SECONDS):
+        self.broker = broker
+        self._window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._wheel: Optional[TimerWheel] = None
+        self._wheel_generation: Optional[int] = None
+        # Reagendamentos recebidos enquanto a janela é lida do banco, aplicados sobre a leitura.
+        self._pending: Optional[Dict[int, str]] = None
+        # Cada cliente recebe os totais ao se inscrever (em /events); o laço só publica mudanças.
+        self._counts_dirty = False
+        self._last_counts: Optional[Dict[str, int]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def wake(self):
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None:
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            pass
+
+    def topic_scheduled(self, topic_id: int, next_review_date: str):
+        """Um tópico ganhou uma nova next_review_date (revisão ou extração)."""
+
+        due = _timestamp(next_review_date)
+        with self._lock:
+            if self._pending is not None:
+                self._pending[topic_id] = next_review_date
+            if self._wheel is not None:
+                if due is None:
+                    self._wheel.remove(topic_id)
+                else:
+                    self._wheel.add(topic_id, due)
+            self._counts_dirty = True
+        self.wake()
+
+    def counts_changed(self):
+        with self._lock:
+            self._counts_dirty = True
+        self.wake()
+
+    def library_changed(self):
+        """Arquivos removidos ou importados: a janela é relida do banco e os totais recontados."""
+
+        with self._lock:
+            self._wheel = None
+            self._counts_dirty = True
+        self.wake()
+
+    def _load_window(self, now: float) -> TimerWheel:
+        with self._lock:
+            self._pending = {}
+
+        wheel = TimerWheel(now, max(1, int(self._window_seconds / WHEEL_TICK_SECONDS)))
+        generation = db.get_database_generation()
+        start = datetime.fromtimestamp(now).isoformat()
+        end = datetime.fromtimestamp(wheel.horizon - WHEEL_TICK_SECONDS).isoformat()
+        for topic_id, next_review_date in db.get_topics_due_between_db(start, end):
+            due = _timestamp(next_review_date)
+            if due is not None:
+                wheel.add(topic_id, due)
+
+        with self._lock:
+            for topic_id, next_review_date in self._pending.items():
+                due = _timestamp(next_review_date)
+                if due is None:
+                    wheel.remove(topic_id)
+                else:
+                    wheel.add(topic_id, due)
+            self._pending = None
+            self._wheel, self._wheel_generation = wheel, generation
+
+        return wheel
+
+    async def step(self) -> float:
+        """Publica o que venceu e os totais alterados. Retorna quantos segundos dormir até o próximo vencimento."""
+
+        now = time.time()
+        # library_changed (de outra thread) pode descartar self._wheel a qualquer momento:
+        # o passo usa a referência local, e a roda é relida no passo seguinte.
+        with self._lock:
+            wheel = self._wheel
+            stale = (
+                wheel is None
+                or now >= wheel.horizon
+                or self._wheel_generation != db.get_database_generation()
+            )
+        if stale:
+            wheel = await asyncio.to_thread(self._load_window, now)
+
+        with self._lock:
+            due_topics = wheel.advance(now)
+            if due_topics:
+                self._counts_dirty = True
+            next_wakeup = min(wheel.next_due() or wheel.horizon, wheel.horizon)
+
+        if due_topics:
+            self.broker.publish("topic_due", {"topic_ids": due_topics})
+
+        if self._counts_dirty:
+            await asyncio.sleep(COUNTS_DEBOUNCE_SECONDS)
+            with self._lock:
+                self._counts_dirty = False
+            counts = await asyncio.to_thread(load_counts)
+            if counts != self._last_counts:
+                self._last_counts = counts
+                self.broker.publish("counts_changed", counts)
+
+        return max(0.0, next_wakeup - time.time())
+
+    async def run(self):
+        """Laço do processo; sem clientes inscritos espera sem timeout (nenhuma consulta ao banco)."""
+
+        self._loop, self._wake = asyncio.get_running_loop(), asyncio.Event()
+        try:
+            while True:
+                timeout = None
+                if len(self.broker):
+                    try:
+                        timeout = await self.step()
+                    except Exception as e:
+                        print(f"Erro no laço de eventos: {e}", file=sys.stderr)
+                        timeout = NOTIFIER_RETRY_SECONDS
+                else:
+                    with self._lock:
+                        # A roda deixa de ser mantida; é relida quando alguém se inscrever.
+                        self._wheel = None
+
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+        finally:
+            self._loop, self._wake = None, None
+
+_broker = EventBroker()
+_notifier = DueNotifier(_broker)
+
+def subscribe() -> asyncio.Queue:
+    """Inscreve um cliente e acorda o laço de vencimentos."""
+
+    queue = _broker.subscribe()
+    _notifier.wake()
+    return queue
+
+def unsubscribe(queue: asyncio.Queue):
+    _broker.unsubscribe(queue)
+
+def publish(event: str, data: Any):
+    _broker.publish(event, data)
+
+def topic_scheduled(topic_id: int, next_review_date: str):
+    _notifier.topic_scheduled(topic_id, next_review_date)
+
+def library_changed():
+    _notifier.library_changed()
+
+def ingest_finished(file_id: int, file_name: Optional[str], extraction_status: str):
+    """Avisa os clientes que um arquivo terminou de ser processado (com ou sem tópicos)."""
+
+    _broker.publish("ingest_finished", {"file_id": file_id, "file_name": file_name, "extraction_status": extraction_status})
+    _notifier.counts_changed()
+
+async def run_notifier():
+    await _notifier.run()
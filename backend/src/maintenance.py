@@ -0,0 +1,107 @@
+"""
+Manutenção periódica do armazenamento: move o conteúdo original dos arquivos maduros para o
+banco frio (revisu_archive.db, anexado como `archive`), deixando o banco principal pequeno o
+bastante para caber no cache, e devolve as páginas livres com o vacuum incremental. Também
+calcula as impressões digitais de quase duplicatas dos arquivos gravados antes delas existirem.
+
+Cada lote é uma escrita curta no escritor único, então revisões e ingestões continuam sendo
+gravadas entre um passo e outro.
+
+REVISU_MAINTENANCE_INTERVAL_SECONDS  intervalo entre as rodadas automáticas (padrão 1 h; 0 desliga)
+REVISU_ARCHIVE_MIN_REPETITIONS       revisões mínimas de cada tópico para arquivar o arquivo (padrão 5)
+REVISU_ARCHIVE_MIN_INTERVAL_DAYS     intervalo mínimo atual de cada tópico, em dias (padrão 60)
+REVISU_ARCHIVE_BATCH                 arquivos movidos por escrita (padrão 50)
+REVISU_VACUUM_PAGES                  páginas liberadas por escrita (padrão 512)
+REVISU_FINGERPRINT_BATCH             impressões digitais calculadas por escrita (padrão 200)
+"""
+import os
+import time
+from typing import Any, Dict
+
+from src import db
+from src.metrics import Counter, Histogram
+from src.similarity import fingerprint
+
+MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("REVISU_MAINTENANCE_INTERVAL_SECONDS", 3600))
+ARCHIVE_MIN_REPETITIONS = int(os.getenv("REVISU_ARCHIVE_MIN_REPETITIONS", 5))
+ARCHIVE_MIN_INTERVAL_DAYS = float(os.getenv("REVISU_ARCHIVE_MIN_INTERVAL_DAYS", 60))
+ARCHIVE_BATCH = int(os.getenv("REVISU_ARCHIVE_BATCH", 50))
+VACUUM_PAGES = int(os.getenv("REVISU_VACUUM_PAGES", 512))
+FINGERPRINT_BATCH = int(os.getenv("REVISU_FINGERPRINT_BATCH", 200))
+
+ARCHIVED_FILES = Counter("revisu_archived_files_total", "Arquivos cujo conteúdo foi movido para o banco frio.")
+VACUUM_PAGES_FREED = Counter("revisu_vacuum_pages_total", "Páginas devolvidas pelo vacuum incremental.")
+MAINTENANCE_DURATION = Histogram("revisu_maintenance_duration_seconds", "Duração das rodadas de manutenção do armazenamento.")
+
+def backfill_fingerprints(batch: int = FINGERPRINT_BATCH) -> int:
+    """Calcula as impressões digitais que faltam, `batch` arquivos por escrita. Retorna quantas foram gravadas."""
+
+    written = 0
+    while True:
+        file_ids = db.get_files_without_fingerprint_db(batch)
+        fingerprints = []
+        for file_id in file_ids:
+            content = db.get_file_content_db(file_id)
+            if content is not None:
+                fingerprints.append((file_id, fingerprint(content)))
+
+        if fingerprints:
+            db.set_file_fingerprints_db(fingerprints)
+        written += len(fingerprints)
+        if len(file_ids) < batch:
+            break
+
+    return written
+
+def archive_mature_files(
+    min_repetitions: int = ARCHIVE_MIN_REPETITIONS,
+    min_interval_days: float = ARCHIVE_MIN_INTERVAL_DAYS,
+    batch: int = ARCHIVE_BATCH
+) -> int:
+    """Arquiva todos os arquivos maduros, `batch` por escrita. Retorna quantos foram arquivados."""
+
+    archived = 0
+    while True:
+        file_ids = db.archive_mature_files_db(min_repetitions, min_interval_days, batch)
+        archived += len(file_ids)
+        if len(file_ids) < batch:
+            break
+
+    ARCHIVED_FILES.inc(archived)
+    return archived
+
+def vacuum(pages: int = VACUUM_PAGES) -> int:
+    """Libera as páginas livres, `pages` por escrita. Retorna quantas foram liberadas."""
+
+    freed = 0
+    while True:
+        step = db.incremental_vacuum_db(pages)
+        freed += step
+        if not step:
+            break
+
+    VACUUM_PAGES_FREED.inc(freed)
+    return freed
+
+def run_maintenance() -> Dict[str, Any]:
+    """
+    Completa as impressões digitais, arquiva os arquivos maduros e em seguida devolve as
+    páginas que ficaram livres.
+    """
+
+    started = time.perf_counter()
+    try:
+        result = {
+            "fingerprinted": backfill_fingerprints(),
+            "archived": archive_mature_files(),
+            "vacuumed_pages": vacuum()
+        }
+    finally:
+        MAINTENANCE_DURATION.observe(time.perf_counter() - started)
+
+    if any(result.values()):
+        print(
+            f"INFO: Storage maintenance: {result['fingerprinted']} fingerprint(s), "
+            f"{result['archived']} file(s) archived, {result['vacuumed_pages']} page(s) freed."
+        )
+    return result
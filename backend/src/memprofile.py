@@ -0,0 +1,185 @@
+"""
+Profiler de memória em processo, baseado em tracemalloc. Desativado por padrão.
+
+REVISU_MEMPROFILE=peak      mede, por endpoint, o crescimento e o pico de memória alocada;
+REVISU_MEMPROFILE=snapshot  além disso, compara snapshots antes/depois de cada requisição
+                            e acumula os pontos de alocação que mais cresceram.
+REVISU_MEMPROFILE_FRAMES    profundidade das pilhas guardadas (padrão 10).
+
+Com requisições concorrentes, as alocações de uma podem aparecer na outra: os números
+servem para apontar caminhos de código, não para contabilidade exata.
+"""
+import os
+import threading
+import tracemalloc
+from collections import Counter as CounterDict
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MODES = ("peak", "snapshot")
+
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+# Quantos pontos de alocação manter por endpoint.
+SITES_PER_ENDPOINT = 50
+
+_mode: Optional[str] = None
+_lock = threading.Lock()
+_endpoints: Dict[str, Dict[str, Any]] = {}
+_endpoint_sites: Dict[str, CounterDict] = {}
+
+def start_from_env(env=os.environ) -> Optional[str]:
+    """Liga o profiler conforme REVISU_MEMPROFILE. Retorna o modo ativo (ou None)."""
+
+    mode = env.get("REVISU_MEMPROFILE", "").strip().lower()
+    if not mode or mode in ("0", "off", "false"):
+        return None
+    if mode in ("1", "on", "true"):
+        mode = "peak"
+    if mode not in MODES:
+        raise ValueError(f"Modo de profiling inválido: {mode}")
+
+    start(mode, frames=int(env.get("REVISU_MEMPROFILE_FRAMES", 10)))
+    return mode
+
+def start(mode: str = "peak", frames: int = 10):
+    global _mode
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    _mode = mode
+    print(f"INFO: Memory profiler enabled ({mode}, {frames} frames).")
+
+def stop():
+    global _mode
+
+    _mode = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    reset()
+
+def reset():
+    with _lock:
+        _endpoints.clear()
+        _endpoint_sites.clear()
+
+def is_enabled() -> bool:
+    return _mode is not None
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+class RequestMemory:
+    """Medição de uma requisição; o endpoint é definido depois que o roteamento acontece."""
+
+    def __init__(self):
+        self.endpoint = "unmatched"
+        self.size = 0
+
+@contextmanager
+def profile_request():
+    """Mede a memória alocada durante o bloco e acumula o resultado no endpoint informado em `endpoint`."""
+
+    measurement = RequestMemory()
+    if _mode is None:
+        yield measurement
+        return
+
+    before = _take_snapshot() if _mode == "snapshot" else None
+    current_before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+
+    try:
+        yield measurement
+    finally:
+        current_after, peak = tracemalloc.get_traced_memory()
+        growth = current_after - current_before
+        peak_above_start = max(0, peak - current_before)
+
+        sites = None
+        if before is not None:
+            sites = [
+                (str(stat.traceback[0]), stat.size_diff)
+                for stat in _take_snapshot().compare_to(before, "lineno")
+                if stat.size_diff > 0
+            ]
+
+        _record(measurement, growth, peak_above_start, sites)
+
+def _record(measurement: RequestMemory, growth: int, peak: int, sites):
+    with _lock:
+        stats = _endpoints.setdefault(measurement.endpoint, {
+            "requests": 0,
+            "growth_bytes_total": 0,
+            "growth_bytes_max": 0,
+            "peak_bytes_max": 0,
+            "peak_bytes_total": 0,
+            "largest_body_bytes": 0,
+        })
+        stats["requests"] += 1
+        stats["growth_bytes_total"] += growth
+        stats["growth_bytes_max"] = max(stats["growth_bytes_max"], growth)
+        stats["peak_bytes_max"] = max(stats["peak_bytes_max"], peak)
+        stats["peak_bytes_total"] += peak
+        stats["largest_body_bytes"] = max(stats["largest_body_bytes"], measurement.size)
+
+        if sites:
+            counter = _endpoint_sites.setdefault(measurement.endpoint, CounterDict())
+            counter.update(dict(sites))
+            if len(counter) > SITES_PER_ENDPOINT * 4:
+                _endpoint_sites[measurement.endpoint] = CounterDict(dict(counter.most_common(SITES_PER_ENDPOINT)))
+
+def top_allocation_sites(limit: int = 20, group_by: str = "lineno") -> List[Dict[str, Any]]:
+    """Pontos de alocação com mais memória viva no momento."""
+
+    if not tracemalloc.is_tracing():
+        return []
+
+    return [
+        {"site": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count}
+        for stat in _take_snapshot().statistics(group_by)[:limit]
+    ]
+
+def peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    # ru_maxrss é em KiB no Linux e em bytes no macOS.
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if os.uname().sysname == "Darwin" else maxrss * 1024
+
+def get_report(limit: int = 20) -> Dict[str, Any]:
+    """Relatório para o endpoint de debug: memória rastreada, pontos de alocação e estatísticas por endpoint."""
+
+    report: Dict[str, Any] = {"enabled": is_enabled(), "mode": _mode, "peak_rss_bytes": peak_rss_bytes()}
+    if not is_enabled():
+        return report
+
+    current, peak = tracemalloc.get_traced_memory()
+    report["traced_current_bytes"] = current
+    report["traced_peak_bytes"] = peak
+    report["top_sites"] = top_allocation_sites(limit)
+
+    with _lock:
+        endpoints = {}
+        for endpoint, stats in _endpoints.items():
+            entry = dict(stats)
+            entry["peak_bytes_mean"] = stats["peak_bytes_total"] // stats["requests"]
+            if endpoint in _endpoint_sites:
+                entry["growth_sites"] = [
+                    {"site": site, "size_diff_bytes": size}
+                    for site, size in _endpoint_sites[endpoint].most_common(limit)
+                ]
+            endpoints[endpoint] = entry
+    report["endpoints"] = endpoints
+
+    return report
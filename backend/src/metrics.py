@@ -0,0 +1,199 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+_INF_LABEL = 'le="+Inf"'
+
+_IGNORED_STATEMENTS = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA")
+
+class _Metric:
+    """Base das métricas em memória, renderizadas no formato texto do Prometheus."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(label, "")) for label in self.label_names)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{self._format_labels(key)} {_format_number(value)}")
+        return lines
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+        # Por conjunto de labels: [contagem por bucket (não cumulativa) + overflow, soma, total]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels: str) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    le_label = 'le="' + _format_number(bound) + '"'
+                    lines.append(f"{self.name}_bucket{self._format_labels(key, le_label)} {cumulative}")
+                lines.append(f"{self.name}_bucket{self._format_labels(key, _INF_LABEL)} {count}")
+                lines.append(f"{self.name}_sum{self._format_labels(key)} {_format_number(total)}")
+                lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+REGISTRY: List[_Metric] = []
+
+HTTP_REQUESTS = Counter("revisu_http_requests_total", "Requisições HTTP atendidas.", ("method", "route", "status"))
+HTTP_DURATION = Histogram("revisu_http_request_duration_seconds", "Duração das requisições HTTP.", ("method", "route"))
+STAGE_DURATION = Histogram("revisu_stage_duration_seconds", "Duração de cada etapa do processamento.", ("stage",))
+DB_QUERIES = Counter("revisu_db_queries_total", "Comandos SQL executados.")
+DB_QUERIES_PER_REQUEST = Histogram("revisu_db_queries_per_request", "Comandos SQL por requisição.", ("route",), buckets=COUNT_BUCKETS)
+LLM_REQUESTS = Counter("revisu_llm_requests_total", "Chamadas ao provedor de LLM.", ("provider", "outcome"))
+LLM_LATENCY = Histogram("revisu_llm_latency_seconds", "Latência das chamadas ao provedor de LLM.", ("provider",))
+LLM_FIRST_CHUNK = Histogram("revisu_llm_first_chunk_seconds", "Tempo até o primeiro pedaço das respostas em streaming do LLM.", ("provider",))
+LLM_TOKENS = Counter("revisu_llm_tokens_total", "Tokens enviados e recebidos do provedor de LLM.", ("provider", "direction"))
+
+class RequestTrace:
+    """Etapas e comandos SQL registrados durante uma requisição."""
+
+    __slots__ = ("stages", "queries")
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.queries = 0
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("revisu_request_trace", default=None)
+
+def start_trace() -> Tuple[RequestTrace, object]:
+    """Abre um trace para a requisição atual. Retorna o trace e o token para `end_trace`."""
+
+    trace = RequestTrace()
+    return trace, _current_trace.set(trace)
+
+def end_trace(token: object):
+    _current_trace.reset(token)
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+@contextmanager
+def stage(name: str):
+    """Mede a duração de uma etapa, acumulando-a no trace da requisição e no histograma global."""
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_DURATION.observe(elapsed, stage=name)
+
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.stages[name] = trace.stages.get(name, 0.0) + elapsed
+
+def record_query(statement: str):
+    """Callback de trace do sqlite3: conta os comandos SQL executados (ignora controle de transação)."""
+
+    if statement.lstrip()[:9].upper().startswith(_IGNORED_STATEMENTS):
+        return
+
+    DB_QUERIES.inc()
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.queries += 1
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa grosseira (~4 caracteres por token) para provedores que não informam o uso."""
+
+    return max(1, len(text) // 4) if text else 0
+
+def record_llm_call(provider: str, seconds: float, outcome: str):
+    LLM_REQUESTS.inc(provider=provider, outcome=outcome)
+    LLM_LATENCY.observe(seconds, provider=provider)
+
+def record_llm_first_chunk(provider: str, seconds: float):
+    LLM_FIRST_CHUNK.observe(seconds, provider=provider)
+
+def record_llm_tokens(provider: str, prompt_tokens: int, completion_tokens: int):
+    LLM_TOKENS.inc(prompt_tokens, provider=provider, direction="prompt")
+    LLM_TOKENS.inc(completion_tokens, provider=provider, direction="completion")
+
+def record_request(method: str, route: str, status: int, seconds: float, trace: RequestTrace):
+    HTTP_REQUESTS.inc(method=method, route=route, status=str(status))
+    HTTP_DURATION.observe(seconds, method=method, route=route)
+    DB_QUERIES_PER_REQUEST.observe(trace.queries, route=route)
+
+def server_timing_header(trace: RequestTrace, total_seconds: float) -> str:
+    """Monta o cabeçalho Server-Timing com as etapas, o total e a contagem de comandos SQL."""
+
+    entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in trace.stages.items()]
+    entries.append(f'sql;desc="{trace.queries} queries"')
+    entries.append(f"total;dur={total_seconds * 1000:.2f}")
+    return ", ".join(entries)
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import date, datetime
 from typing import List
 
 class TopicResponse(BaseModel):
@@ -20,6 +20,7 @@ class FileResponse(BaseModel):
     file_name: str
     file_type: str
     processed_at: datetime
+    extraction_status: str = "done"
     topics: List[TopicResponse] = []
 
 class TagResponse(BaseModel):
@@ -28,3 +29,51 @@ class TagResponse(BaseModel):
 
 class ReviewFeedback(BaseModel):
     quality: int = Field(..., ge=0, le=5)
+
+class ReviewIntervalPreview(BaseModel):
+    quality: int
+    interval_seconds: int
+    next_review_date: datetime
+    repetitions: int
+    ease_factor: float
+
+class ReviewSessionTopic(TopicResponse):
+    previews: List[ReviewIntervalPreview] = []
+
+class ReviewSessionResponse(BaseModel):
+    topics: List[ReviewSessionTopic]
+    due_total: int
+    generated_at: datetime
+
+class ReviewAnswer(BaseModel):
+    topic_id: int
+    quality: int = Field(..., ge=0, le=5)
+
+class ReviewAnswersRequest(BaseModel):
+    answers: List[ReviewAnswer] = Field(..., min_length=1, max_length=500)
+
+class DailyReviewStats(BaseModel):
+    day: date
+    reviews: int
+    correct: int
+    retention: float | None
+    by_quality: List[int]
+
+class QualityStats(BaseModel):
+    quality: int
+    reviews: int
+
+class TagAccuracy(BaseModel):
+    tag: str
+    reviews: int
+    correct: int
+    accuracy: float | None
+
+class StatsResponse(BaseModel):
+    days: int
+    reviews: int
+    correct: int
+    retention: float | None
+    daily: List[DailyReviewStats]
+    by_quality: List[QualityStats]
+    tags: List[TagAccuracy]
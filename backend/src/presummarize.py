@@ -0,0 +1,179 @@
+import os
+import re
+import zlib
+from typing import List, NamedTuple
+
+from src.metrics import Histogram, Counter
+
+# Orçamento de caracteres da nota enviada ao LLM.
+PROMPT_CHAR_BUDGET = int(os.getenv("REVISU_PROMPT_CHAR_BUDGET", 2000))
+
+# Dimensão dos vetores TF-IDF (hashing trick) e limite de sentenças ranqueadas por documento.
+HASH_DIMENSIONS = 2048
+MAX_SENTENCES = 1500
+
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+
+COMPRESSION_RATIO = Histogram(
+    "revisu_presummarize_compression_ratio",
+    "Razão entre o tamanho da nota enviada ao LLM e o original.",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 0.9, 1.0)
+)
+PRESUMMARIZE_CHARS = Counter("revisu_presummarize_chars_total", "Caracteres antes e depois da pré-sumarização.", ("direction",))
+
+STOPWORDS = frozenset("""
+a o as os um uma uns umas de do da dos das em no na nos nas por pelo pela pelos pelas para com sem
+e ou mas que se é são foi ser está estão como mais menos muito já não sim ao aos à às seu sua seus suas
+ele ela eles elas isso isto esse essa este esta aquele aquela há também quando onde qual quais
+the a an of to in on at by for with and or but is are was were be been it its this that these those
+as from not no yes do does did have has had will would can could should may might than then so
+""".split())
+
+_FRONT_MATTER = re.compile(r"\A---\s*\n.*?\n---\s*\n", re.DOTALL)
+_HTML_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_LINK = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+_MARKDOWN_PREFIX = re.compile(r"^\s*(?:#{1,6}\s+|>\s*|[-*+]\s+|\d+[.)]\s+)")
+_ONLY_SYMBOLS = re.compile(r"^[\W_]+$")
+_ONLY_URL_OR_EMAIL = re.compile(r"^(?:https?://\S+|www\.\S+|\S+@\S+\.\S+)$", re.IGNORECASE)
+_PAGE_NUMBER = re.compile(r"^(?:p[áa]gina|page|p\.)?\s*\d+(?:\s*(?:de|of|/)\s*\d+)?$", re.IGNORECASE)
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+(?=[^\s])")
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_WHITESPACE = re.compile(r"\s+")
+
+class Presummary(NamedTuple):
+    text: str
+    original_chars: int
+    output_chars: int
+    sentences_total: int
+    sentences_kept: int
+
+    @property
+    def compression_ratio(self) -> float:
+        return self.output_chars / self.original_chars if self.original_chars else 1.0
+
+def clean_lines(content: str) -> List[str]:
+    """Remove boilerplate (front matter, comentários, links, numeração de página, separadores) e linhas repetidas."""
+
+    content = _FRONT_MATTER.sub("", content)
+    content = _HTML_COMMENT.sub("", content)
+    content = _IMAGE.sub("", content)
+    content = _LINK.sub(r"\1", content)
+
+    seen = set()
+    lines = []
+    for raw_line in content.splitlines():
+        line = _MARKDOWN_PREFIX.sub("", raw_line).strip()
+        if not line or _ONLY_SYMBOLS.match(line) or _ONLY_URL_OR_EMAIL.match(line) or _PAGE_NUMBER.match(line):
+            continue
+
+        key = _WHITESPACE.sub(" ", line.lower())
+        if key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+
+    return lines
+
+def split_sentences(lines: List[str]) -> List[str]:
+    sentences = []
+    for line in lines:
+        sentences.extend(part.strip() for part in _SENTENCE_SPLIT.split(line) if part.strip())
+    return sentences
+
+def tokenize(text: str) -> List[str]:
+    """Termos em minúsculas, sem stopwords e sem tokens de um caractere."""
+
+    return [token for token in _TOKEN.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+def rank_sentences(sentences: List[str]):
+    """
+    Pontua as sentenças com TextRank sobre vetores TF-IDF (hashing trick, normalizados).
+    Retorna um array NumPy com uma pontuação por sentença.
+    """
+
+    import numpy as np
+
+    count = len(sentences)
+    matrix = np.zeros((count, HASH_DIMENSIONS), dtype=np.float32)
+    for row, sentence in enumerate(sentences):
+        for token in tokenize(sentence):
+            matrix[row, zlib.crc32(token.encode("utf-8")) % HASH_DIMENSIONS] += 1.0
+
+    # TF sublinear e IDF suavizado.
+    document_frequency = np.count_nonzero(matrix, axis=0)
+    idf = np.log((1 + count) / (1 + document_frequency)) + 1.0
+    np.log1p(matrix, out=matrix)
+    matrix *= idf.astype(np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0.0)
+
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    # Sentenças sem nenhuma similaridade distribuem seu peso igualmente (nó "pendente").
+    transition = np.where(row_sums > 0, similarity / np.where(row_sums > 0, row_sums, 1.0), 1.0 / count)
+
+    scores = np.full(count, 1.0 / count, dtype=np.float32)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - DAMPING) / count + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            scores = updated
+            break
+        scores = updated
+
+    return scores
+
+def presummarize(content: str, budget: int = PROMPT_CHAR_BUDGET) -> Presummary:
+    """
+    Reduz a nota ao orçamento de caracteres: limpa boilerplate, remove linhas repetidas e,
+    se ainda não couber, mantém as sentenças mais informativas (na ordem original).
+    """
+
+    lines = clean_lines(content)
+    cleaned = "\n".join(lines)
+    sentences = split_sentences(lines)
+
+    if len(cleaned) <= budget or len(sentences) <= 1:
+        text = cleaned[:budget]
+        return _report(Presummary(text, len(content), len(text), len(sentences), len(sentences)))
+
+    ranked = sentences[:MAX_SENTENCES]
+    scores = rank_sentences(ranked)
+
+    order = sorted(range(len(ranked)), key=lambda i: (-scores[i], i))
+    selected = []
+    used = 0
+    for index in order:
+        size = len(ranked[index]) + 1
+        if used + size > budget:
+            continue
+        selected.append(index)
+        used += size
+
+    if not selected:
+        # Nenhuma sentença cabe inteira (ex.: texto de PDF sem pontuação, blocos de código):
+        # vai a mais bem ranqueada, cortada no orçamento, em vez de uma nota vazia.
+        text = ranked[order[0]][:budget]
+        return _report(Presummary(text, len(content), len(text), len(sentences), 1))
+
+    text = " ".join(ranked[index] for index in sorted(selected))
+    return _report(Presummary(text, len(content), len(text), len(sentences), len(selected)))
+
+def _report(result: Presummary) -> Presummary:
+    COMPRESSION_RATIO.observe(result.compression_ratio)
+    PRESUMMARIZE_CHARS.inc(result.original_chars, direction="in")
+    PRESUMMARIZE_CHARS.inc(result.output_chars, direction="out")
+
+    if result.original_chars > result.output_chars:
+        print(
+            f"INFO: Pre-summarized note: {result.original_chars} -> {result.output_chars} chars "
+            f"(ratio {result.compression_ratio:.2f}, {result.sentences_kept}/{result.sentences_total} sentences)."
+        )
+
+    return result
@@ -0,0 +1,278 @@
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Iterator, Mapping, Optional
+
+from src.metrics import estimate_tokens, record_llm_tokens
+
+GEMINI_MODEL_NAME = 'gemini-2.5-flash-preview-04-17'
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal", "exponential")
+
+_STUB_VOCABULARY = [
+    "memória", "revisão", "conceito", "processo", "sistema", "modelo", "rede", "dados",
+    "algoritmo", "estrutura", "função", "análise", "protocolo", "teoria", "prática", "exemplo",
+    "método", "resultado", "hipótese", "definição", "propriedade", "contexto", "aplicação", "ciclo",
+]
+
+class ProviderError(Exception):
+    """Erro levantado por um provedor de extração."""
+
+class RetryableProviderError(ProviderError):
+    """Erro transitório (cota, indisponibilidade, timeout): a chamada pode ser repetida."""
+
+class ExtractionProvider(ABC):
+    """Interface para os backends de LLM usados na extração de tópicos."""
+
+    name: str = "base"
+
+    @abstractmethod
+    def generate(self, prompt: str) -> str:
+        """Envia o prompt ao modelo e retorna o texto gerado."""
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Envia o prompt ao modelo e retorna o texto gerado em pedaços, conforme chega."""
+
+        yield self.generate(prompt)
+
+class GeminiProvider(ExtractionProvider):
+    """Provedor baseado na API Gemini. O SDK é importado apenas na primeira chamada."""
+
+    name = "gemini"
+
+    def __init__(self, model_name: str = GEMINI_MODEL_NAME, api_key: Optional[str] = None):
+        self.model_name = model_name
+        self.api_key = api_key
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        """Importa e configura o cliente Gemini sob demanda, reaproveitando a instância."""
+
+        with self._lock:
+            if self._model is None:
+                started = time.perf_counter()
+
+                import google.generativeai as genai
+
+                genai.configure(api_key=self.api_key or os.getenv("GEMINI_API_KEY"))
+                self._model = genai.GenerativeModel(self.model_name)
+
+                print(f"INFO: Gemini client initialized in {(time.perf_counter() - started) * 1000:.1f} ms.")
+
+        return self._model
+
+    def _retryable_errors(self):
+        from google.api_core import exceptions as google_exceptions
+
+        retryable = (
+            google_exceptions.ResourceExhausted,
+            google_exceptions.TooManyRequests,
+            google_exceptions.ServiceUnavailable,
+            google_exceptions.DeadlineExceeded,
+            google_exceptions.InternalServerError,
+            ConnectionError,
+            TimeoutError,
+        )
+        return retryable, google_exceptions.GoogleAPIError
+
+    def _record_usage(self, response, prompt: str, text: str):
+        usage = getattr(response, "usage_metadata", None)
+        record_llm_tokens(
+            self.name,
+            getattr(usage, "prompt_token_count", None) or estimate_tokens(prompt),
+            getattr(usage, "candidates_token_count", None) or estimate_tokens(text)
+        )
+
+    def generate(self, prompt: str) -> str:
+        model = self._get_model()
+        retryable, api_error = self._retryable_errors()
+
+        try:
+            response = model.generate_content(prompt)
+            text = response.text
+        except retryable as e:
+            raise RetryableProviderError(str(e)) from e
+        except api_error as e:
+            raise ProviderError(str(e)) from e
+
+        self._record_usage(response, prompt, text)
+
+        return text
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        model = self._get_model()
+        retryable, api_error = self._retryable_errors()
+
+        parts = []
+        try:
+            response = model.generate_content(prompt, stream=True)
+            for chunk in response:
+                text = chunk.text
+                if text:
+                    parts.append(text)
+                    yield text
+        except retryable as e:
+            raise RetryableProviderError(str(e)) from e
+        except api_error as e:
+            raise ProviderError(str(e)) from e
+
+        self._record_usage(response, prompt, "".join(parts))
+
+class LocalStubProvider(ExtractionProvider):
+    """
+    Provedor local e determinístico para benchmarks e testes de carga offline.
+    Simula latência (com distribuição configurável), taxa de erro e tamanho da resposta.
+    O conteúdo gerado depende apenas do prompt; latências e erros vêm de um gerador com semente fixa.
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        latency_distribution: str = "constant",
+        error_rate: float = 0.0,
+        response_chars: int = 200,
+        stream_chunk_chars: int = 16,
+        stream_chunk_delay_ms: float = 0.0,
+        seed: int = 0,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Distribuição de latência inválida: {latency_distribution}")
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError("A taxa de erro deve estar entre 0 e 1.")
+
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.latency_distribution = latency_distribution
+        self.error_rate = error_rate
+        self.response_chars = response_chars
+        self.stream_chunk_chars = max(1, stream_chunk_chars)
+        self.stream_chunk_delay_ms = stream_chunk_delay_ms
+        self._sleep = sleep
+        # Geradores separados: a sequência de latências não depende da taxa de erro configurada.
+        self._latency_rng = random.Random(seed)
+        self._error_rng = random.Random(seed + 1)
+        self._lock = threading.Lock()
+
+    def sample_latency_ms(self) -> float:
+        """Sorteia a latência da próxima chamada, em milissegundos."""
+
+        mean, jitter = self.latency_ms, self.latency_jitter_ms
+
+        rng = self._latency_rng
+
+        with self._lock:
+            if self.latency_distribution == "uniform":
+                value = rng.uniform(mean - jitter, mean + jitter)
+            elif self.latency_distribution == "normal":
+                value = rng.gauss(mean, jitter)
+            elif self.latency_distribution == "lognormal":
+                # latency_ms é a mediana; o jitter é o desvio relativo (sigma = jitter / mediana).
+                sigma = jitter / mean if mean > 0 else 0.0
+                value = rng.lognormvariate(0.0, sigma) * mean
+            elif self.latency_distribution == "exponential":
+                value = rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+            else:
+                value = mean
+
+        return max(0.0, value)
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self._error_rng.random() < self.error_rate
+
+    def _build_response(self, prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        words = [_STUB_VOCABULARY[b % len(_STUB_VOCABULARY)] for b in digest]
+
+        summary = " ".join(words)
+        while len(summary) < self.response_chars:
+            summary = f"{summary} {summary}"
+
+        return json.dumps({
+            "titulo": " ".join(words[:3]).capitalize(),
+            "resumo": summary[:self.response_chars],
+            "tags": words[3:6],
+            "perguntas": [f"O que é {word}?" for word in words[6:9]]
+        }, ensure_ascii=False)
+
+    def generate(self, prompt: str) -> str:
+        latency = self.sample_latency_ms()
+        if latency > 0:
+            self._sleep(latency / 1000)
+
+        if self._should_fail():
+            raise RetryableProviderError("Erro simulado pelo provedor local.")
+
+        response = self._build_response(prompt)
+        record_llm_tokens(self.name, estimate_tokens(prompt), estimate_tokens(response))
+
+        return response
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """A latência sorteada vale até o primeiro pedaço; os demais chegam a cada `stream_chunk_delay_ms`."""
+
+        response = self.generate(prompt)
+        for start in range(0, len(response), self.stream_chunk_chars):
+            if start and self.stream_chunk_delay_ms > 0:
+                self._sleep(self.stream_chunk_delay_ms / 1000)
+            yield response[start:start + self.stream_chunk_chars]
+
+def create_provider_from_env(env: Mapping[str, str] = os.environ) -> ExtractionProvider:
+    """
+    Cria o provedor configurado por variáveis de ambiente:
+    REVISU_LLM_PROVIDER (gemini|stub) e, para o stub, REVISU_STUB_LATENCY_MS,
+    REVISU_STUB_LATENCY_JITTER_MS, REVISU_STUB_LATENCY_DISTRIBUTION, REVISU_STUB_ERROR_RATE,
+    REVISU_STUB_RESPONSE_CHARS, REVISU_STUB_STREAM_CHUNK_CHARS, REVISU_STUB_STREAM_CHUNK_DELAY_MS
+    e REVISU_STUB_SEED.
+    """
+
+    provider_name = env.get("REVISU_LLM_PROVIDER", "gemini").strip().lower()
+
+    if provider_name == "gemini":
+        return GeminiProvider(model_name=env.get("REVISU_GEMINI_MODEL", GEMINI_MODEL_NAME))
+
+    if provider_name == "stub":
+        return LocalStubProvider(
+            latency_ms=float(env.get("REVISU_STUB_LATENCY_MS", 0)),
+            latency_jitter_ms=float(env.get("REVISU_STUB_LATENCY_JITTER_MS", 0)),
+            latency_distribution=env.get("REVISU_STUB_LATENCY_DISTRIBUTION", "constant"),
+            error_rate=float(env.get("REVISU_STUB_ERROR_RATE", 0)),
+            response_chars=int(env.get("REVISU_STUB_RESPONSE_CHARS", 200)),
+            stream_chunk_chars=int(env.get("REVISU_STUB_STREAM_CHUNK_CHARS", 16)),
+            stream_chunk_delay_ms=float(env.get("REVISU_STUB_STREAM_CHUNK_DELAY_MS", 0)),
+            seed=int(env.get("REVISU_STUB_SEED", 0)),
+        )
+
+    raise ValueError(f"Provedor de LLM desconhecido: {provider_name}")
+
+_active_provider: Optional[ExtractionProvider] = None
+_provider_lock = threading.Lock()
+
+def get_provider() -> ExtractionProvider:
+    """Retorna o provedor ativo, criado na primeira chamada a partir do ambiente."""
+
+    global _active_provider
+
+    with _provider_lock:
+        if _active_provider is None:
+            _active_provider = create_provider_from_env()
+            print(f"INFO: Extraction provider: {_active_provider.name}.")
+
+        return _active_provider
+
+def set_provider(provider: Optional[ExtractionProvider]):
+    """Substitui o provedor ativo (ou limpa, com None, para recriá-lo a partir do ambiente)."""
+
+    global _active_provider
+
+    with _provider_lock:
+        _active_provider = provider
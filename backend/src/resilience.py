@@ -0,0 +1,242 @@
+import os
+import time
+import random
+import threading
+from typing import Callable, Mapping, Optional, TypeVar
+
+from src.metrics import Counter
+from src.providers import RetryableProviderError
+
+T = TypeVar("T")
+
+LLM_GUARD_EVENTS = Counter(
+    "revisu_llm_guard_events_total",
+    "Eventos do controle de chamadas ao LLM (retry, circuit_open, rate_limited).",
+    ("event",)
+)
+
+class CircuitOpenError(RetryableProviderError):
+    """O provedor está indisponível e o circuito está aberto: a chamada falha imediatamente."""
+
+class RateLimitTimeout(RetryableProviderError):
+    """Não houve vaga no limitador de taxa dentro do tempo de espera."""
+
+class TokenBucket:
+    """Limitador de taxa token bucket, seguro para threads."""
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Tenta consumir um token. Retorna 0 em caso de sucesso ou os segundos até o próximo token."""
+
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Bloqueia até conseguir um token (ou até `timeout` segundos). Retorna se conseguiu."""
+
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            self._sleep(wait)
+
+class CircuitBreaker:
+    """
+    Circuit breaker clássico: abre após `failure_threshold` falhas seguidas, rejeita chamadas
+    por `reset_timeout` segundos e então deixa uma chamada de teste passar (meio aberto).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Indica se uma chamada pode ser feita agora."""
+
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._clock() - self._opened_at < self.reset_timeout:
+                return False
+            # Meio aberto: apenas uma chamada de teste por vez.
+            if self._probe_in_flight:
+                return False
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """Libera a vaga de teste do estado meio aberto quando a chamada nem chegou a ser feita."""
+
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"Aviso: circuito do LLM aberto após {self._failures} falha(s).")
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+            self._probe_in_flight = False
+
+def backoff_delay(attempt: int, base: float, maximum: float, rng: random.Random) -> float:
+    """Backoff exponencial com jitter completo: sorteio uniforme em [0, min(max, base * 2^tentativa)]."""
+
+    return rng.uniform(0, min(maximum, base * (2 ** attempt)))
+
+class LLMGuard:
+    """Aplica limite de taxa, retentativas com backoff e circuit breaker às chamadas ao provedor."""
+
+    def __init__(
+        self,
+        bucket: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        rate_limit_timeout: float = 30.0,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Optional[random.Random] = None
+    ):
+        self.bucket = bucket
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limit_timeout = rate_limit_timeout
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+
+    def call(self, func: Callable[[], T]) -> T:
+        """
+        Executa `func` respeitando o limitador e o circuito. Erros `RetryableProviderError`
+        são repetidos com backoff; os demais erros são propagados imediatamente.
+        """
+
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                LLM_GUARD_EVENTS.inc(event="circuit_open")
+                raise CircuitOpenError("Provedor de LLM indisponível (circuito aberto).")
+
+            if self.bucket is not None and not self.bucket.acquire(timeout=self.rate_limit_timeout):
+                self.breaker.release_probe()
+                LLM_GUARD_EVENTS.inc(event="rate_limited")
+                raise RateLimitTimeout("Limite de taxa do provedor de LLM atingido.")
+
+            try:
+                result = func()
+            except RetryableProviderError:
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                LLM_GUARD_EVENTS.inc(event="retry")
+                self._sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max, self._rng))
+                attempt += 1
+                continue
+            except Exception:
+                self.breaker.release_probe()
+                raise
+
+            self.breaker.record_success()
+            return result
+
+def create_guard_from_env(env: Mapping[str, str] = os.environ) -> LLMGuard:
+    """
+    Cria o controle de chamadas a partir de REVISU_LLM_RATE_PER_MINUTE (0 desliga o limitador),
+    REVISU_LLM_BURST, REVISU_LLM_MAX_RETRIES, REVISU_LLM_BACKOFF_BASE_MS, REVISU_LLM_BACKOFF_MAX_MS,
+    REVISU_LLM_BREAKER_FAILURES e REVISU_LLM_BREAKER_RESET_SECONDS.
+    """
+
+    rate_per_minute = float(env.get("REVISU_LLM_RATE_PER_MINUTE", 60))
+    bucket = None
+    if rate_per_minute > 0:
+        bucket = TokenBucket(rate_per_minute / 60, float(env.get("REVISU_LLM_BURST", 5)))
+
+    return LLMGuard(
+        bucket=bucket,
+        breaker=CircuitBreaker(
+            failure_threshold=int(env.get("REVISU_LLM_BREAKER_FAILURES", 5)),
+            reset_timeout=float(env.get("REVISU_LLM_BREAKER_RESET_SECONDS", 30))
+        ),
+        max_retries=int(env.get("REVISU_LLM_MAX_RETRIES", 3)),
+        backoff_base=float(env.get("REVISU_LLM_BACKOFF_BASE_MS", 500)) / 1000,
+        backoff_max=float(env.get("REVISU_LLM_BACKOFF_MAX_MS", 8000)) / 1000,
+        rate_limit_timeout=float(env.get("REVISU_LLM_RATE_TIMEOUT_SECONDS", 30)),
+    )
+
+_active_guard: Optional[LLMGuard] = None
+_guard_lock = threading.Lock()
+
+def get_llm_guard() -> LLMGuard:
+    """Retorna o controle de chamadas ativo, criado na primeira chamada a partir do ambiente."""
+
+    global _active_guard
+
+    with _guard_lock:
+        if _active_guard is None:
+            _active_guard = create_guard_from_env()
+
+        return _active_guard
+
+def set_llm_guard(guard: Optional[LLMGuard]):
+    """Substitui o controle ativo (ou limpa, com None, para recriá-lo a partir do ambiente)."""
+
+    global _active_guard
+
+    with _guard_lock:
+        _active_guard = guard
@@ -1,90 +1,164 @@
 import os
 import json
-import google.generativeai as genai
+import time
+import asyncio
+import threading
+import itertools
+from concurrent.futures import Future
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterator, AsyncIterator, Optional, Tuple
 
 from dotenv import load_dotenv
 
 from src.db import (
-    insert_topic,
+    PASSING_QUALITY,
     insert_file,
-    get_or_create_tag,
-    link_topic_to_tag,
     get_file_by_id_db,
     get_all_files_db,
     get_topics_for_review_db,
-    get_topic_review_data_db,
-    update_topic_review_data_db,
-    get_all_tags_db
+    count_topics_for_review_db,
+    submit_topic_review_db,
+    get_review_stats_db,
+    get_all_tags_db,
+    update_file_extraction_db,
+    claim_file_extraction_db,
+    store_extraction_db,
+    get_pending_files_db,
+    delete_file_db,
+    update_file_content_db
 )
-from src.models import FileResponse, TopicResponse, TagResponse
+from src.models import (
+    FileResponse,
+    TopicResponse,
+    TagResponse,
+    ReviewIntervalPreview,
+    ReviewSessionTopic,
+    ReviewSessionResponse,
+    ReviewAnswer,
+    DailyReviewStats,
+    QualityStats,
+    TagAccuracy,
+    StatsResponse
+)
+from src.providers import get_provider
+from src.metrics import stage, record_llm_call, record_llm_first_chunk
+from src.presummarize import presummarize
+from src.resilience import get_llm_guard, CircuitBreaker, CircuitOpenError
+from src.streaming import IncrementalJsonFields
+from src.similarity import DuplicateMatch, fingerprint, find_near_duplicates, register_file, unregister_file
+from src.events import topic_scheduled, ingest_finished, library_changed
 
 load_dotenv()
 
-# Configuração da API Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel('gemini-2.5-flash-preview-04-17')
+# Após este número de falhas, o arquivo deixa de ser reprocessado automaticamente.
+MAX_EXTRACTION_ATTEMPTS = int(os.getenv("REVISU_EXTRACTION_MAX_ATTEMPTS", 5))
 
-def process_content_with_gemini(content: str) -> Dict[str, Any]:
-    """
-    Usa a IA para gerar título, resumo, perguntas e tags de um texto.
-    """
-    try:
-        prompt = f"""Gere JSON apenas com o seguinte modelo:
-            {{
-                "titulo": "título conciso",
-                "resumo": "resumo em 2-3 frases",
-                "tags": ["tag1", "tag2", "tag3"],
-                "perguntas": ["pergunta1?", "pergunta2?", "pergunta3?"]
-            }}
+_reprocess_lock = threading.Lock()
+
+# Campos da resposta do modelo enviados ao cliente durante o streaming, na ordem em que são gerados.
+STREAMED_FIELDS = {"titulo": "title", "resumo": "summary", "tags": "tags", "perguntas": "questions"}
 
-            Contexto: Idioma em português. Nota do usuário limitada por segurança. Revisão rápida e concisa.
+class ExtractionError(Exception):
+    """A extração de tópicos falhou; o arquivo fica marcado para reprocessamento."""
 
-            Propósito: Revisão espaçada, baseando-se na nota fornecida e preenchendo o JSON de acordo.
+def _build_prompt(content: str) -> str:
+    with stage("presummarize"):
+        note = presummarize(content).text
 
-            Com a seguinte nota: {content[:2000]}
-            """
+    return f"""Gere JSON apenas com o seguinte modelo:
+        {{
+            "titulo": "título conciso",
+            "resumo": "resumo em 2-3 frases",
+            "tags": ["tag1", "tag2", "tag3"],
+            "perguntas": ["pergunta1?", "pergunta2?", "pergunta3?"]
+        }}
 
-        response = model.generate_content(prompt)
-        generated_text = response.text
+        Contexto: Idioma em português. Nota do usuário limitada por segurança. Revisão rápida e concisa.
 
-        try:
+        Propósito: Revisão espaçada, baseando-se na nota fornecida e preenchendo o JSON de acordo.
+
+        Com a seguinte nota: {note}
+        """
+
+def _parse_generated_text(generated_text: str, content: str) -> Dict[str, Any]:
+    try:
+        with stage("parse"):
             json_str = generated_text.strip()
             if json_str.startswith('```'):
                 json_str = json_str.split('\n', 1)[1].rsplit('\n', 1)[0]
 
             parsed_data = json.loads(json_str)
+    except json.JSONDecodeError as e:
+        print(f"JSON inválido: {e}")
+        raise ExtractionError(f"Resposta inválida do modelo: {e}") from e
+
+    return {
+        "title": parsed_data.get("titulo", content.split('\n')[0][:50] if content else "Novo Tópico"),
+        "summary": parsed_data.get("resumo", "Resumo não disponível."),
+        "tags": parsed_data.get("tags", ["geral"])[:3],
+        "questions": parsed_data.get("perguntas", ["Revise o conteúdo."])[:5]
+    }
+
+def _llm_failure(provider_name: str, started: float, error: Exception) -> ExtractionError:
+    outcome = "circuit_open" if isinstance(error, CircuitOpenError) else "error"
+    record_llm_call(provider_name, time.perf_counter() - started, outcome)
+    print(f"Erro API: {error}")
+    return ExtractionError(f"Falha na API: {error}")
 
-            return {
-                "title": parsed_data.get("titulo", content.split('\n')[0][:50] if content else "Novo Tópico"),
-                "summary": parsed_data.get("resumo", "Resumo não disponível."),
-                "tags": parsed_data.get("tags", ["geral"])[:3],
-                "questions": parsed_data.get("perguntas", ["Revise o conteúdo."])[:5]
-            }
-
-        except json.JSONDecodeError as e:
-            print(f"JSON inválido: {e}")
-            return {
-                "title": "Título Manual",
-                "summary": "Erro no processamento.",
-                "tags": ["erro"],
-                "questions": ["Revisar nota?"]
-            }
+def process_content_with_gemini(content: str) -> Dict[str, Any]:
+    """
+    Usa a IA para gerar título, resumo, perguntas e tags de um texto.
+    Levanta ExtractionError se o provedor falhar (após as retentativas) ou responder algo inválido.
+    """
+    prompt = _build_prompt(content)
 
+    provider = get_provider()
+    started = time.perf_counter()
+    try:
+        with stage("llm"):
+            generated_text = get_llm_guard().call(lambda: provider.generate(prompt))
     except Exception as e:
-        print(f"Erro API: {e}")
-        return {
-            "title": "Erro",
-            "summary": "Falha na API.",
-            "tags": ["erro-api"],
-            "questions": ["Tentar novamente?"]
-        }
+        raise _llm_failure(provider.name, started, e) from e
+    record_llm_call(provider.name, time.perf_counter() - started, "success")
 
-def calculate_next_review(repetitions: int, ease_factor: float, quality: int) -> Tuple[datetime, int, float]:
+    return _parse_generated_text(generated_text, content)
+
+def stream_content_with_gemini(content: str) -> Iterator[Tuple[str, Any]]:
     """
-    Calcula a próxima data de revisão, fator de facilidade e repetições
-    usando o algoritmo SM-2 (SuperMemo 2).
+    Versão em streaming de process_content_with_gemini: gera ("field", {"name", "value"}) para cada
+    campo assim que o modelo termina de escrevê-lo e, ao final, ("result", dict) com o resultado completo.
+    As retentativas do controle de chamadas valem até o primeiro pedaço; falhas depois dele não são repetidas.
+    Levanta ExtractionError nos mesmos casos da versão sem streaming.
+    """
+    prompt = _build_prompt(content)
+
+    provider = get_provider()
+    started = time.perf_counter()
+
+    def open_stream():
+        chunks = provider.generate_stream(prompt)
+        return chunks, next(chunks, "")
+
+    parser = IncrementalJsonFields()
+    try:
+        with stage("llm"):
+            chunks, first_chunk = get_llm_guard().call(open_stream)
+            record_llm_first_chunk(provider.name, time.perf_counter() - started)
+
+            for chunk in itertools.chain((first_chunk,), chunks):
+                for key, value in parser.feed(chunk):
+                    if key in STREAMED_FIELDS:
+                        yield "field", {"name": STREAMED_FIELDS[key], "value": value}
+    except Exception as e:
+        raise _llm_failure(provider.name, started, e) from e
+    record_llm_call(provider.name, time.perf_counter() - started, "success")
+
+    yield "result", _parse_generated_text(parser.text, content)
+
+def schedule_review(repetitions: int, ease_factor: float, quality: int) -> Tuple[timedelta, int, float]:
+    """
+    Aplica o algoritmo SM-2 (SuperMemo 2): retorna o intervalo até a próxima revisão,
+    as novas repetições e o novo fator de facilidade.
     """
 
     if quality < 3:
@@ -103,104 +177,359 @@ def calculate_next_review(repetitions: int, ease_factor: float, quality: int) ->
     else:
         interval = timedelta(days=int(repetitions * ease_factor))
 
+    return interval, repetitions, ease_factor
+
+def calculate_next_review(repetitions: int, ease_factor: float, quality: int) -> Tuple[datetime, int, float]:
+    """
+    Calcula a próxima data de revisão, fator de facilidade e repetições
+    usando o algoritmo SM-2 (SuperMemo 2).
+    """
+
+    interval, repetitions, ease_factor = schedule_review(repetitions, ease_factor, quality)
+
     next_review = datetime.now() + interval
 
     return next_review, repetitions, ease_factor
 
+def preview_review_intervals(repetitions: int, ease_factor: float, now: datetime) -> List[ReviewIntervalPreview]:
+    """Resultado de uma revisão feita em `now` para cada qualidade de 0 a 5."""
+
+    previews = []
+    for quality in range(6):
+        interval, new_repetitions, new_ease_factor = schedule_review(repetitions, ease_factor, quality)
+        previews.append(ReviewIntervalPreview(
+            quality=quality,
+            interval_seconds=int(interval.total_seconds()),
+            next_review_date=now + interval,
+            repetitions=new_repetitions,
+            ease_factor=new_ease_factor
+        ))
+
+    return previews
+
+def _insert_new_file(file_name: str | None, file_type: str, original_content: str) -> int | None:
+    file_id = insert_file(file_name, file_name, file_type, original_content, fingerprint(original_content))
+    register_file(file_id, original_content)
+    return file_id
+
+def find_duplicate_service(original_content: str) -> Optional[DuplicateMatch]:
+    """
+    Procura entre os arquivos já processados uma versão quase igual da nota. Retorna a mais parecida.
+    """
+
+    with stage("similarity"):
+        matches = find_near_duplicates(original_content)
+
+    return matches[0] if matches else None
+
+def update_duplicate_file_service(file_id: int, file_name: str | None, file_type: str, original_content: str) -> FileResponse:
+    """
+    Grava a nova versão de uma nota sobre o arquivo existente, sem nova extração pela IA:
+    os tópicos e o agendamento de revisão continuam os mesmos.
+    """
+
+    with stage("db"):
+        if not update_file_content_db(file_id, file_name, file_type, original_content, fingerprint(original_content)):
+            raise ValueError(f"Arquivo {file_id} não encontrado.")
+    register_file(file_id, original_content)
+
+    file_response = get_file_details_service(file_id)
+    if file_response is None:
+        raise ValueError(f"Arquivo {file_id} não encontrado.")
+
+    ingest_finished(file_id, file_response.file_name, file_response.extraction_status)
+    return file_response
+
 async def process_new_file(file_name: str | None, file_type: str, original_content: str) -> FileResponse:
     """
     Orquestra o processamento de um novo arquivo:
     1. Salva o arquivo no DB.
-    2. Processa o conteúdo com a IA.
-    3. Salva os tópicos e tags no DB.
+    2. Processa o conteúdo com a IA (fora do event loop).
+    3. Salva os tópicos e tags no DB, ou marca o arquivo para reprocessamento se a IA falhar.
     4. Retorna o FileResponse completo.
     """
 
-    file_id = insert_file(file_name, file_name, file_type, original_content)
+    # As escritas esperam o commit fora do event loop: enquanto isso, outras requisições
+    # continuam enfileirando escritas, que o escritor junta no mesmo commit.
+    with stage("insert_file"):
+        file_id = await asyncio.to_thread(_insert_new_file, file_name, file_type, original_content)
 
-    gemini_result = process_content_with_gemini(original_content)
-    title = gemini_result["title"]
-    summary = gemini_result["summary"]
-    questions = gemini_result["questions"]
-    tags_to_add = gemini_result["tags"]
+    try:
+        gemini_result = await asyncio.to_thread(process_content_with_gemini, original_content)
+    except ExtractionError as e:
+        await asyncio.to_thread(update_file_extraction_db, file_id, "pending", str(e))
+        print(f"Aviso: extração do arquivo {file_id} adiada para reprocessamento: {e}")
+    else:
+        await asyncio.to_thread(_store_extraction, file_id, gemini_result)
 
-    initial_next_review_date = datetime.now() + timedelta(minutes=5)
+    with stage("load_file"):
+        file_data = await asyncio.to_thread(get_file_by_id_db, file_id)
+    if not file_data:
+        raise Exception("Arquivo não encontrado após o processamento.")
+    ingest_finished(file_id, file_name, file_data.get("extraction_status", "done"))
 
-    topic_id = insert_topic(
-        file_id=file_id,
-        title=title,
-        summary=summary,
-        questions_json=json.dumps(questions),
-        next_review_date=initial_next_review_date.isoformat(),
-        ease_factor=2.5,
-        repetitions=0,
-        last_reviewed=None
-    )
+    with stage("format"):
+        return _format_file_data_to_response(file_data)
+
+async def process_new_file_stream(file_name: str | None, file_type: str, original_content: str) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Versão em streaming de process_new_file, para SSE. Gera os eventos:
+    ("file", {...}) logo após salvar o arquivo; ("field", {"name", "value"}) a cada campo extraído;
+    ("done", FileResponse) ao final. Se a IA falhar, o arquivo é marcado para reprocessamento
+    e o "done" sai com extraction_status "pending", como em process_new_file.
+    """
 
-    for tag_name in tags_to_add:
-        tag_id = get_or_create_tag(tag_name)
-        link_topic_to_tag(topic_id, tag_id)
+    with stage("insert_file"):
+        file_id = await asyncio.to_thread(_insert_new_file, file_name, file_type, original_content)
+    yield "file", {"id": file_id, "file_name": file_name}
 
-    file_data = get_file_by_id_db(file_id)
+    events = stream_content_with_gemini(original_content)
+    gemini_result = None
+    try:
+        while True:
+            # Cada passo roda fora do event loop: o provedor bloqueia enquanto espera o próximo pedaço.
+            event = await asyncio.to_thread(next, events, None)
+            if event is None:
+                break
+            kind, data = event
+            if kind == "result":
+                gemini_result = data
+            else:
+                yield kind, data
+    except ExtractionError as e:
+        await asyncio.to_thread(update_file_extraction_db, file_id, "pending", str(e))
+        print(f"Aviso: extração do arquivo {file_id} adiada para reprocessamento: {e}")
+
+    if gemini_result is not None:
+        await asyncio.to_thread(_store_extraction, file_id, gemini_result)
+
+    with stage("load_file"):
+        file_data = await asyncio.to_thread(get_file_by_id_db, file_id)
     if not file_data:
         raise Exception("Arquivo não encontrado após o processamento.")
+    ingest_finished(file_id, file_name, file_data.get("extraction_status", "done"))
 
-    return _format_file_data_to_response(file_data)
+    with stage("format"):
+        yield "done", _format_file_data_to_response(file_data)
+
+def _store_extraction(file_id: int | None, gemini_result: Dict[str, Any]):
+    """
+    Salva o tópico e as tags extraídos e marca a extração do arquivo como concluída,
+    numa só escrita do escritor do banco.
+    """
+
+    initial_next_review_date = datetime.now() + timedelta(minutes=5)
+
+    with stage("store_extraction"):
+        topic_id = store_extraction_db(
+            file_id,
+            gemini_result["title"],
+            gemini_result["summary"],
+            json.dumps(gemini_result["questions"]),
+            initial_next_review_date.isoformat(),
+            gemini_result["tags"]
+        )
+    topic_scheduled(topic_id, initial_next_review_date.isoformat())
+
+def reprocess_pending_files_service(limit: int = 10) -> Dict[str, Any]:
+    """
+    Tenta novamente a extração dos arquivos adiados. Para cedo se o circuito do provedor abrir;
+    arquivos que esgotarem MAX_EXTRACTION_ATTEMPTS ficam como 'failed'.
+    """
+
+    result = {"processed": 0, "deferred": 0, "failed": 0, "running": False}
+
+    if not _reprocess_lock.acquire(blocking=False):
+        result["running"] = True
+        return result
+
+    try:
+        for file_data in get_pending_files_db(limit, MAX_EXTRACTION_ATTEMPTS):
+            if get_llm_guard().breaker.state == CircuitBreaker.OPEN:
+                break
+
+            file_id = file_data["id"]
+            # _reprocess_lock só vale dentro do processo: entre workers, quem pega o arquivo é o banco.
+            if not claim_file_extraction_db(file_id, file_data["extraction_status"], file_data["extraction_claimed_at"]):
+                continue
+            try:
+                gemini_result = process_content_with_gemini(file_data["original_content"])
+            except ExtractionError as e:
+                status = "failed" if file_data["extraction_attempts"] + 1 >= MAX_EXTRACTION_ATTEMPTS else "pending"
+                update_file_extraction_db(file_id, status, str(e))
+                result["failed" if status == "failed" else "deferred"] += 1
+                if status == "failed":
+                    ingest_finished(file_id, file_data["file_name"], status)
+                continue
+
+            _store_extraction(file_id, gemini_result)
+            ingest_finished(file_id, file_data["file_name"], "done")
+            result["processed"] += 1
+    finally:
+        _reprocess_lock.release()
+
+    return result
 
 def get_all_files_service(limit: Optional[int] = None) -> List[FileResponse]:
     """
     Busca todos os arquivos processados (opcionalmente limitado) e os formata.
     """
 
-    files_db_data = get_all_files_db(limit)
+    with stage("db"):
+        files_db_data = get_all_files_db(limit)
 
-    return [_format_file_data_to_response(file_data) for file_data in files_db_data]
+    with stage("format"):
+        return [_format_file_data_to_response(file_data) for file_data in files_db_data]
 
 def get_file_details_service(file_id: int) -> Optional[FileResponse]:
     """
     Busca os detalhes de um arquivo específico e os formata.
     """
 
-    file_db_data = get_file_by_id_db(file_id)
+    with stage("db"):
+        file_db_data = get_file_by_id_db(file_id)
     if file_db_data:
-        return _format_file_data_to_response(file_db_data)
+        with stage("format"):
+            return _format_file_data_to_response(file_db_data)
 
     return None
 
+def delete_file_service(file_id: int) -> bool:
+    """
+    Remove um arquivo com seus tópicos. Retorna False se o arquivo não existir.
+    """
+
+    with stage("db"):
+        deleted = delete_file_db(file_id)
+    unregister_file(file_id)
+    if deleted:
+        library_changed()
+
+    return deleted
+
 def get_topics_for_review_service() -> List[TopicResponse]:
     """
     Retorna a lista de tópicos prontos para revisão, formatados.
     """
 
-    topics_db_data = get_topics_for_review_db()
+    with stage("db"):
+        topics_db_data = get_topics_for_review_db()
 
-    return [_format_topic_data_to_response(topic_data) for topic_data in topics_db_data]
+    with stage("format"):
+        return [_format_topic_data_to_response(topic_data) for topic_data in topics_db_data]
 
 def review_topic_service(topic_id: int, quality: int) -> Dict[str, Any]:
     """
     Registra o feedback de revisão para um tópico e recalcula a próxima data.
     """
 
-    topic_current_data = get_topic_review_data_db(topic_id)
+    reviewed_at = datetime.now()
+    with stage("db"):
+        # Leitura, atualização e registro no histórico numa só transação do escritor.
+        next_review = submit_topic_review_db(topic_id, quality, _review_schedule(quality, reviewed_at), reviewed_at.isoformat()).result()
+    topic_scheduled(topic_id, next_review)
+
+    return {"message": "Revisão registrada com sucesso", "next_review": next_review}
 
-    if not topic_current_data:
-        raise ValueError("Tópico não encontrado.")
+def get_review_session_service(size: int) -> ReviewSessionResponse:
+    """
+    Retorna os próximos `size` tópicos a revisar, cada um com o resultado já calculado
+    para todas as qualidades, para a interface não depender de uma ida ao servidor por cartão.
+    """
 
-    repetitions = topic_current_data["repetitions"]
-    ease_factor = topic_current_data["ease_factor"]
+    with stage("db"):
+        topics_db_data = get_topics_for_review_db(limit=size)
+        due_total = count_topics_for_review_db()
 
-    new_next_review, new_repetitions, new_ease_factor = calculate_next_review(
-        repetitions, ease_factor, quality
-    )
+    now = datetime.now()
+    with stage("format"):
+        topics = [
+            ReviewSessionTopic(
+                **_format_topic_data_to_response(topic_data).model_dump(),
+                previews=preview_review_intervals(topic_data["repetitions"], topic_data["ease_factor"], now)
+            )
+            for topic_data in topics_db_data
+        ]
 
-    update_topic_review_data_db(
-        topic_id,
-        new_next_review.isoformat(),
-        new_repetitions,
-        new_ease_factor,
-        datetime.now().isoformat()
-    )
-    return {"message": "Revisão registrada com sucesso", "next_review": new_next_review.isoformat()}
+    return ReviewSessionResponse(topics=topics, due_total=due_total, generated_at=now)
+
+def submit_review_answers_service(answers: List[ReviewAnswer]) -> int:
+    """
+    Enfileira as revisões no escritor do banco e retorna sem esperar o commit.
+    Cada revisão é calculada com os dados atuais do tópico no momento da gravação;
+    falhas (ex.: tópico removido) são apenas registradas no log.
+    """
+
+    reviewed_at = datetime.now()
+
+    for answer in answers:
+        future = submit_topic_review_db(answer.topic_id, answer.quality, _review_schedule(answer.quality, reviewed_at), reviewed_at.isoformat())
+        future.add_done_callback(lambda f, topic_id=answer.topic_id: _review_written(topic_id, f))
+
+    return len(answers)
+
+def _review_schedule(quality: int, reviewed_at: datetime):
+    def schedule(repetitions: int, ease_factor: float) -> Tuple[str, int, float]:
+        interval, new_repetitions, new_ease_factor = schedule_review(repetitions, ease_factor, quality)
+        return (reviewed_at + interval).isoformat(), new_repetitions, new_ease_factor
+
+    return schedule
+
+def _review_written(topic_id: int, future: Future):
+    error = future.exception()
+    if error is not None:
+        print(f"Aviso: revisão do tópico {topic_id} não foi registrada: {error}")
+    else:
+        topic_scheduled(topic_id, future.result())
+
+def get_review_stats_service(days: int) -> StatsResponse:
+    """
+    Estatísticas de revisão dos últimos `days` dias (incluindo hoje), montadas só a partir dos
+    agregados diários: revisões e retenção por dia, distribuição das qualidades e acerto por tag.
+    """
+
+    today = datetime.now().date()
+    first_day = today - timedelta(days=days - 1)
+
+    with stage("db"):
+        rollups = get_review_stats_db(first_day.isoformat())
+
+    with stage("format"):
+        by_day: Dict[str, List[int]] = {}
+        for row in rollups["daily"]:
+            by_day.setdefault(row["day"], [0] * 6)[row["quality"]] += row["reviews"]
+
+        daily = []
+        for offset in range(days):
+            day = first_day + timedelta(days=offset)
+            counts = by_day.get(day.isoformat(), [0] * 6)
+            daily.append(DailyReviewStats(
+                day=day,
+                reviews=sum(counts),
+                correct=sum(counts[PASSING_QUALITY:]),
+                retention=_ratio(sum(counts[PASSING_QUALITY:]), sum(counts)),
+                by_quality=counts
+            ))
+
+        by_quality = [sum(stats.by_quality[quality] for stats in daily) for quality in range(6)]
+        reviews = sum(by_quality)
+        correct = sum(by_quality[PASSING_QUALITY:])
+
+        return StatsResponse(
+            days=days,
+            reviews=reviews,
+            correct=correct,
+            retention=_ratio(correct, reviews),
+            daily=daily,
+            by_quality=[QualityStats(quality=quality, reviews=count) for quality, count in enumerate(by_quality)],
+            tags=[
+                TagAccuracy(tag=row["tag"], reviews=row["reviews"], correct=row["correct"], accuracy=_ratio(row["correct"], row["reviews"]))
+                for row in rollups["tags"]
+            ]
+        )
+
+def _ratio(part: int, total: int) -> Optional[float]:
+    return round(part / total, 4) if total else None
 
 def get_all_tags_service() -> List[TagResponse]:
     """
@@ -256,5 +585,6 @@ def _format_file_data_to_response(file_data: Dict[str, Any]) -> FileResponse:
         file_name=file_data["file_name"],
         file_type=file_data["file_type"],
         processed_at=datetime.fromisoformat(file_data["processed_at"]) if isinstance(file_data["processed_at"], str) else file_data["processed_at"],
+        extraction_status=file_data.get("extraction_status", "done"),
         topics=topics_response
     )
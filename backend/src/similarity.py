@@ -0,0 +1,223 @@
+"""
+Detecção local de notas quase duplicadas, sem chamar o LLM.
+
+Cada arquivo tem uma impressão digital SimHash de 128 bits, calculada sobre o TF sublinear dos
+seus termos: a fração de bits diferentes entre duas impressões estima o ângulo entre os vetores,
+então cos(π · bits_diferentes / 128) aproxima o cosseno. O índice fica em memória como um array
+NumPy de uint64, e a busca é um XOR com contagem de bits sobre todas as notas (sub-milissegundo
+com 100 mil notas). Os candidatos são confirmados pelo cosseno exato entre os vetores de termos.
+
+REVISU_DUPLICATE_THRESHOLD  cosseno mínimo para considerar duas notas a mesma (padrão 0.9)
+"""
+import os
+import math
+import time
+import hashlib
+import threading
+from collections import Counter as TermCounter
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src import db
+from src.metrics import Histogram
+from src.presummarize import clean_lines, tokenize
+
+DUPLICATE_THRESHOLD = float(os.getenv("REVISU_DUPLICATE_THRESHOLD", 0.9))
+
+FINGERPRINT_BITS = 128
+FINGERPRINT_BYTES = FINGERPRINT_BITS // 8
+# Folga sobre o limiar na etapa aproximada, para não perder candidatos pelo erro do SimHash.
+CANDIDATE_MARGIN = 0.1
+MAX_CANDIDATES = 5
+
+SIMILARITY_SEARCH_SECONDS = Histogram(
+    "revisu_similarity_search_seconds",
+    "Duração da busca aproximada no índice de quase duplicatas.",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+)
+
+class DuplicateMatch(NamedTuple):
+    file_id: int
+    file_name: str
+    similarity: float
+
+@lru_cache(maxsize=16)
+def _analyze(content: str) -> Tuple[Dict[str, float], bytes]:
+    # A mesma nota é analisada na busca e depois na gravação: o cache evita o trabalho repetido.
+    counts = TermCounter(token for line in clean_lines(content) for token in tokenize(line))
+    weights = {term: 1.0 + math.log(count) for term, count in counts.items()}
+    return weights, _simhash(weights)
+
+def _simhash(weights: Dict[str, float]) -> bytes:
+    import numpy as np
+
+    if not weights:
+        return bytes(FINGERPRINT_BYTES)
+
+    digests = b"".join(hashlib.blake2b(term.encode("utf-8"), digest_size=FINGERPRINT_BYTES).digest() for term in weights)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(len(weights), FINGERPRINT_BYTES), axis=1)
+    signs = bits.astype(np.float32) * 2.0 - 1.0
+    projection = np.fromiter(weights.values(), dtype=np.float32, count=len(weights)) @ signs
+    return np.packbits(projection > 0).tobytes()
+
+def term_weights(content: str) -> Dict[str, float]:
+    """Vetor esparso de termos da nota (TF sublinear, sem stopwords nem boilerplate)."""
+
+    return _analyze(content)[0]
+
+def fingerprint(content: str) -> bytes:
+    """Impressão digital SimHash da nota, com FINGERPRINT_BYTES bytes."""
+
+    return _analyze(content)[1]
+
+def cosine_similarity(first: Dict[str, float], second: Dict[str, float]) -> float:
+    """Cosseno exato entre dois vetores esparsos de termos."""
+
+    if len(first) > len(second):
+        first, second = second, first
+
+    dot = sum(weight * second.get(term, 0.0) for term, weight in first.items())
+    norm = math.sqrt(sum(w * w for w in first.values())) * math.sqrt(sum(w * w for w in second.values()))
+    return dot / norm if norm else 0.0
+
+class SimilarityIndex:
+    """Índice em memória das impressões digitais, com busca por distância de Hamming."""
+
+    def __init__(self):
+        import numpy as np
+
+        self._np = np
+        self._ids = np.empty(0, dtype=np.int64)
+        # Uma linha contígua por palavra de 64 bits (e não uma linha por nota): a contagem de bits
+        # vira uma operação vetorial por palavra, sem a redução por linha, que é lenta no NumPy.
+        self._hashes = np.empty((FINGERPRINT_BYTES // 8, 0), dtype=np.uint64)
+        self._positions: Dict[int, int] = {}
+        self._size = 0
+        self.last_file_id = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, file_id: int, simhash: bytes):
+        """Adiciona (ou substitui) a impressão digital de um arquivo."""
+
+        np = self._np
+        row = np.frombuffer(simhash, dtype=np.uint64)
+
+        position = self._positions.get(file_id)
+        if position is None:
+            if self._size == len(self._ids):
+                # Capacidade dobrada: inserções em O(1) amortizado.
+                capacity = max(1024, 2 * len(self._ids))
+                self._ids = np.resize(self._ids, capacity)
+                hashes = np.empty((self._hashes.shape[0], capacity), dtype=np.uint64)
+                hashes[:, :self._size] = self._hashes[:, :self._size]
+                self._hashes = hashes
+            position = self._size
+            self._size += 1
+            self._positions[file_id] = position
+            self._ids[position] = file_id
+
+        self._hashes[:, position] = row
+
+    def remove(self, file_id: int):
+        """Remove um arquivo do índice (a última linha ocupa o lugar dele)."""
+
+        position = self._positions.pop(file_id, None)
+        if position is None:
+            return
+
+        last = self._size - 1
+        if position != last:
+            moved_id = int(self._ids[last])
+            self._ids[position] = moved_id
+            self._hashes[:, position] = self._hashes[:, last]
+            self._positions[moved_id] = position
+        self._size = last
+
+    def search(self, simhash: bytes, min_similarity: float, limit: int = MAX_CANDIDATES) -> List[Tuple[int, float]]:
+        """Até `limit` arquivos com cosseno estimado >= `min_similarity`, do mais parecido ao menos."""
+
+        np = self._np
+        if not self._size:
+            return []
+
+        query = np.frombuffer(simhash, dtype=np.uint64)
+        distances = np.zeros(self._size, dtype=np.uint8)
+        for word, value in zip(self._hashes[:, :self._size], query):
+            distances += np.bitwise_count(word ^ value)
+
+        max_distance = int(math.acos(max(-1.0, min(1.0, min_similarity))) / math.pi * FINGERPRINT_BITS)
+        matches = np.flatnonzero(distances <= max_distance)
+        if len(matches) > limit:
+            matches = matches[np.argpartition(distances[matches], limit)[:limit]]
+        matches = matches[np.argsort(distances[matches], kind="stable")]
+
+        return [
+            (int(self._ids[position]), math.cos(math.pi * int(distances[position]) / FINGERPRINT_BITS))
+            for position in matches
+        ]
+
+_index: Optional[SimilarityIndex] = None
+_index_generation: Optional[int] = None
+_index_lock = threading.Lock()
+
+def get_similarity_index() -> SimilarityIndex:
+    """
+    Índice do processo, carregado do banco na primeira busca. A cada chamada lê só as impressões
+    gravadas depois da última vista (ex.: por outro worker); é refeito se o banco mudar.
+    """
+
+    global _index, _index_generation
+
+    with _index_lock:
+        generation = db.get_database_generation()
+        if _index is None or _index_generation != generation:
+            _index, _index_generation = SimilarityIndex(), generation
+
+        # last_file_id só avança com o que foi lido do banco: uma nota registrada aqui não
+        # faz pular as gravadas por outro processo com ID menor.
+        for file_id, simhash in db.get_fingerprints_db(_index.last_file_id):
+            _index.add(file_id, simhash)
+            _index.last_file_id = file_id
+
+        return _index
+
+def register_file(file_id: int, content: str):
+    """Inclui no índice (se já carregado) a nota recém-gravada."""
+
+    with _index_lock:
+        if _index is not None and _index_generation == db.get_database_generation():
+            _index.add(file_id, fingerprint(content))
+
+def unregister_file(file_id: int):
+    """Tira do índice (se já carregado) um arquivo removido."""
+
+    with _index_lock:
+        if _index is not None:
+            _index.remove(file_id)
+
+def find_near_duplicates(content: str, threshold: float = DUPLICATE_THRESHOLD) -> List[DuplicateMatch]:
+    """Arquivos já gravados cujo cosseno com `content` é pelo menos `threshold`, do mais parecido ao menos."""
+
+    index = get_similarity_index()
+
+    started = time.perf_counter()
+    candidates = index.search(fingerprint(content), threshold - CANDIDATE_MARGIN)
+    SIMILARITY_SEARCH_SECONDS.observe(time.perf_counter() - started)
+
+    weights = term_weights(content)
+    matches = []
+    for file_id, _ in candidates:
+        candidate = db.get_file_content_db(file_id)
+        if candidate is None:
+            # Removido por outro processo depois de entrar no índice.
+            unregister_file(file_id)
+            continue
+
+        similarity = cosine_similarity(weights, term_weights(candidate))
+        if similarity >= threshold:
+            file_data = db.get_file_by_id_db(file_id)
+            matches.append(DuplicateMatch(file_id, file_data["file_name"] if file_data else "", round(similarity, 4)))
+
+    return sorted(matches, key=lambda match: match.similarity, reverse=True)
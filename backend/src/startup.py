@@ -0,0 +1,51 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+# Referência de início do processo: este módulo deve ser o primeiro importado por main.py.
+PROCESS_START = time.perf_counter()
+
+_import_timings: Dict[str, float] = {}
+_ready_at: Optional[float] = None
+_first_response_at: Optional[float] = None
+
+def _elapsed_ms(since: float, until: Optional[float] = None) -> float:
+    return round(((until if until is not None else time.perf_counter()) - since) * 1000, 2)
+
+@contextmanager
+def timed_import(name: str):
+    """Mede o tempo gasto em um bloco de imports durante a inicialização."""
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _import_timings[name] = _elapsed_ms(started)
+
+def mark_ready():
+    """Registra o momento em que o backend terminou a inicialização (startup)."""
+
+    global _ready_at
+
+    if _ready_at is None:
+        _ready_at = time.perf_counter()
+        print(f"INFO: Backend ready in {_elapsed_ms(PROCESS_START, _ready_at)} ms.")
+
+def mark_first_response():
+    """Registra o momento em que a primeira resposta HTTP foi enviada."""
+
+    global _first_response_at
+
+    if _first_response_at is None:
+        _first_response_at = time.perf_counter()
+        print(f"INFO: First response served {_elapsed_ms(PROCESS_START, _first_response_at)} ms after process start.")
+
+def get_startup_report() -> Dict[str, Any]:
+    """Retorna o detalhamento do tempo de inicialização."""
+
+    return {
+        "imports_ms": dict(_import_timings),
+        "ready_ms": _elapsed_ms(PROCESS_START, _ready_at) if _ready_at is not None else None,
+        "first_response_ms": _elapsed_ms(PROCESS_START, _first_response_at) if _first_response_at is not None else None,
+        "uptime_ms": _elapsed_ms(PROCESS_START),
+    }
@@ -0,0 +1,85 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+class IncrementalJsonFields:
+    """
+    Parser incremental para a resposta JSON do modelo: recebe o texto em pedaços e
+    devolve cada campo de primeiro nível assim que o seu valor termina de chegar.
+    Cercas de markdown (```json) antes do objeto são ignoradas.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start: Optional[int] = None
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self.finished = False
+
+    @property
+    def text(self) -> str:
+        return self._buffer
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Acrescenta um pedaço do texto e retorna os campos (chave, valor) completados por ele."""
+
+        self._buffer += chunk
+        fields = []
+        buffer = self._buffer
+
+        while self._position < len(buffer) and not self.finished:
+            index = self._position
+            char = buffer[index]
+            self._position += 1
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._value_start is None:
+                        self._last_string = buffer[self._string_start:index + 1]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._close_value(index, fields)
+                    self.finished = True
+            elif self._depth == 1:
+                if char == ":" and self._last_string is not None:
+                    self._key = json.loads(self._last_string)
+                    self._value_start = self._position
+                elif char == ",":
+                    self._close_value(index, fields)
+
+        return fields
+
+    def _close_value(self, end: int, fields: List[Tuple[str, Any]]):
+        if self._key is not None and self._value_start is not None:
+            raw_value = self._buffer[self._value_start:end].strip()
+            try:
+                fields.append((self._key, json.loads(raw_value)))
+            except json.JSONDecodeError:
+                # Valor malformado: o JSON completo será validado ao final da resposta.
+                pass
+
+        self._key = None
+        self._value_start = None
+        self._last_string = None
+
+def format_sse(event: str, data: Any) -> str:
+    """Formata um evento no protocolo Server-Sent Events, com os dados em JSON."""
+
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
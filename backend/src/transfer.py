@@ -0,0 +1,209 @@
+"""
+Exportação e importação da biblioteca inteira em streaming, com memória constante.
+
+NDJSON: uma linha de cabeçalho ({"type": "revisu-export", "version": 1, ...}) seguida de uma
+linha por arquivo ({"type": "file", ...}) com o conteúdo original, os tópicos, as tags e o
+estado de agendamento (SM-2). É o formato lido de volta por import_ndjson.
+
+Anki: texto separado por tabulações, um cartão por pergunta (frente: pergunta; verso: título e
+resumo do tópico), com as tags do tópico. Importável pelo Anki 2.1.55+; o agendamento não vai junto.
+
+REVISU_IMPORT_BATCH_FILES  arquivos gravados por transação na importação (padrão 200)
+"""
+import io
+import os
+import json
+import html
+import sqlite3
+from datetime import datetime
+from concurrent.futures import Future
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional
+
+from src import db
+from src.metrics import Counter
+from src.similarity import fingerprint
+
+EXPORT_VERSION = 1
+# Tamanho aproximado (em caracteres) de cada pedaço enviado ao cliente.
+EXPORT_CHUNK_CHARS = 64 * 1024
+IMPORT_BATCH_FILES = int(os.getenv("REVISU_IMPORT_BATCH_FILES", 200))
+
+TRANSFERRED_FILES = Counter("revisu_transfer_files_total", "Arquivos exportados e importados.", ("direction",))
+
+ANKI_HEADER = "#separator:tab\n#html:true\n#deck:Revisu\n#tags column:3\n"
+
+def _chunked(lines: Iterable[str]) -> Iterator[str]:
+    # Junta as linhas em pedaços maiores: cada pedaço atravessa o threadpool do servidor uma vez só.
+    buffer: List[str] = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_CHARS:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+def _questions(raw: str) -> List[str]:
+    # Mesmo tratamento de _format_topic_data_to_response: um registro inválido não interrompe a exportação.
+    try:
+        return json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return ["Erro ao carregar perguntas ou formato inválido."]
+
+def _topic_record(topic: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "title": topic["title"],
+        "summary": topic["summary"],
+        "questions": _questions(topic["questions"]),
+        "tags": topic["tags_names"].split(",") if topic["tags_names"] else [],
+        "next_review_date": topic["next_review_date"],
+        "ease_factor": topic["ease_factor"],
+        "repetitions": topic["repetitions"],
+        "last_reviewed": topic["last_reviewed"],
+    }
+
+def _ndjson_lines() -> Iterator[str]:
+    yield json.dumps({"type": "revisu-export", "version": EXPORT_VERSION, "exported_at": datetime.now().isoformat()}) + "\n"
+
+    for file_data in db.iter_library_db():
+        record = {
+            "type": "file",
+            "id": file_data["id"],
+            "file_path": file_data["file_path"],
+            "file_name": file_data["file_name"],
+            "file_type": file_data["file_type"],
+            "processed_at": file_data["processed_at"],
+            "extraction_status": file_data["extraction_status"],
+            "original_content": file_data["original_content"],
+            "topics": [_topic_record(topic) for topic in file_data["topics"]],
+        }
+        TRANSFERRED_FILES.inc(direction="export")
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+def export_ndjson() -> Iterator[str]:
+    """Gera a exportação NDJSON da biblioteca, em pedaços de ~EXPORT_CHUNK_CHARS caracteres."""
+
+    return _chunked(_ndjson_lines())
+
+def _anki_field(text: str) -> str:
+    return html.escape(text or "").replace("\t", " ").replace("\r\n", "<br>").replace("\n", "<br>")
+
+def _anki_lines() -> Iterator[str]:
+    yield ANKI_HEADER
+
+    for file_data in db.iter_library_db():
+        TRANSFERRED_FILES.inc(direction="export")
+        for topic in file_data["topics"]:
+            record = _topic_record(topic)
+            back = f"<b>{_anki_field(record['title'])}</b><br>{_anki_field(record['summary'])}"
+            # Tags do Anki são separadas por espaço.
+            tags = " ".join(tag.strip().replace(" ", "_") for tag in record["tags"] if tag.strip())
+            for question in record["questions"]:
+                yield f"{_anki_field(question)}\t{back}\t{tags}\n"
+
+def export_anki() -> Iterator[str]:
+    """Gera a exportação para o Anki (um cartão por pergunta), em pedaços."""
+
+    return _chunked(_anki_lines())
+
+def _required(record: Dict[str, Any], key: str) -> Any:
+    # Campos NOT NULL no banco: um null vira erro da linha, e não do lote inteiro no escritor.
+    value = record[key]
+    if value is None:
+        raise ValueError(f"campo nulo '{key}'")
+    return value
+
+def _parse_file_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    original_content = _required(record, "original_content")
+    file_name = _required(record, "file_name")
+    status = record.get("extraction_status") or "done"
+
+    return {
+        "file_path": record.get("file_path") or file_name,
+        "file_name": file_name,
+        "file_type": _required(record, "file_type"),
+        "original_content": original_content,
+        "processed_at": record.get("processed_at"),
+        # Uma extração que estava em andamento na exportação volta como adiada.
+        "extraction_status": "pending" if status == "processing" else status,
+        "fingerprint": fingerprint(original_content),
+        "topics": [
+            {
+                "title": topic.get("title"),
+                "summary": _required(topic, "summary"),
+                "questions": json.dumps(topic.get("questions") or [], ensure_ascii=False),
+                "next_review_date": _required(topic, "next_review_date"),
+                "ease_factor": float(topic.get("ease_factor", 2.5)),
+                "repetitions": int(topic.get("repetitions", 0)),
+                "last_reviewed": topic.get("last_reviewed"),
+                "tags": [str(tag) for tag in topic.get("tags") or []],
+            }
+            for topic in record.get("topics") or []
+        ],
+    }
+
+def import_ndjson(stream: IO[bytes], batch_files: int = IMPORT_BATCH_FILES) -> Dict[str, int]:
+    """
+    Importa uma exportação NDJSON lida de `stream` linha a linha, gravando `batch_files` arquivos
+    por transação. O lote seguinte é lido enquanto o anterior é gravado, com no máximo um lote
+    na fila do escritor. Retorna quantos arquivos e tópicos foram importados.
+    Uma linha inválida gera ValueError; os lotes anteriores a ela já ficam gravados.
+    """
+
+    result = {"files": 0, "topics": 0}
+    batch: List[Dict[str, Any]] = []
+    in_flight: Optional[Future] = None
+    in_flight_files = 0
+
+    def wait_in_flight():
+        nonlocal in_flight
+        if in_flight is not None:
+            try:
+                topics = in_flight.result()
+            except sqlite3.IntegrityError as e:
+                in_flight = None
+                raise ValueError(f"Lote rejeitado pelo banco ({e}); {result['files']} arquivo(s) já importado(s).")
+            result["topics"] += topics
+            result["files"] += in_flight_files
+            TRANSFERRED_FILES.inc(in_flight_files, direction="import")
+            in_flight = None
+
+    def flush():
+        nonlocal batch, in_flight, in_flight_files
+        wait_in_flight()
+        in_flight, in_flight_files = db.submit_import_files_db(batch), len(batch)
+        batch = []
+
+    reader = io.TextIOWrapper(stream, encoding="utf-8")
+    try:
+        for line_number, line in enumerate(reader, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+                if record.get("type") == "revisu-export":
+                    if record.get("version") != EXPORT_VERSION:
+                        raise ValueError(f"versão de exportação não suportada: {record.get('version')}")
+                    continue
+                if record.get("type") != "file":
+                    raise ValueError(f"tipo de registro desconhecido: {record.get('type')}")
+                batch.append(_parse_file_record(record))
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                wait_in_flight()
+                detail = f"campo ausente {e}" if isinstance(e, KeyError) else str(e)
+                raise ValueError(f"Linha {line_number} inválida ({detail}); {result['files']} arquivo(s) já importado(s).")
+
+            if len(batch) >= batch_files:
+                flush()
+    finally:
+        # O stream pertence a quem chamou: o wrapper não deve fechá-lo.
+        reader.detach()
+
+    if batch:
+        flush()
+    wait_in_flight()
+
+    return result
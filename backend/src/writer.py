@@ -0,0 +1,202 @@
+"""
+Escritor único do banco: todas as escritas de um processo passam por uma thread com
+uma só conexão. Escritas que chegam enquanto a anterior está sendo gravada são agrupadas
+na mesma transação (group commit), com um SAVEPOINT por operação para que a falha de
+uma não desfaça as outras.
+
+Entre processos (uvicorn com vários workers) a serialização fica por conta do SQLite:
+BEGIN IMMEDIATE pega o lock de escrita logo no início e o busy_timeout espera a vez,
+enquanto os leitores seguem em paralelo sobre o snapshot do WAL.
+"""
+import os
+import time
+import queue
+import sqlite3
+import threading
+import contextvars
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from src.metrics import Histogram, COUNT_BUCKETS, record_query
+
+WRITE_BATCH_SIZE = Histogram("revisu_db_write_batch_size", "Operações de escrita agrupadas em cada commit.", buckets=COUNT_BUCKETS)
+WRITE_COMMIT_SECONDS = Histogram("revisu_db_write_commit_seconds", "Duração das transações do escritor único.")
+
+_STOP = object()
+
+WriteOperation = Callable[[sqlite3.Connection], Any]
+
+class DatabaseWriter:
+    """Thread que executa as escritas enviadas por `submit`, agrupando-as em transações."""
+
+    def __init__(
+        self,
+        path: str,
+        connect: Optional[Callable[[], sqlite3.Connection]] = None,
+        max_batch: int = 256,
+        group_wait: float = 0.0
+    ):
+        self.path = path
+        self._connect_raw = connect or (lambda: sqlite3.connect(path, timeout=5.0))
+        self.max_batch = max_batch
+        self.group_wait = group_wait
+        self.pid = os.getpid()
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="revisu-db-writer", daemon=True)
+        self._started = threading.Event()
+        self._connect_error: Optional[BaseException] = None
+        self._closed = False
+        self._thread.start()
+        self._started.wait()
+
+        if self._connect_error is not None:
+            self._closed = True
+            raise self._connect_error
+
+    def submit(self, operation: WriteOperation) -> Future:
+        """
+        Enfileira `operation(conn)` e retorna um Future com o seu resultado. A operação roda no
+        contexto de quem a enviou (o trace da requisição continua contando os comandos SQL).
+        """
+
+        future: Future = Future()
+        if threading.current_thread() is self._thread:
+            # Chamada aninhada dentro de outra escrita: já estamos na transação.
+            future.set_result(operation(self._connection))
+            return future
+
+        if self._closed:
+            raise RuntimeError("O escritor do banco de dados foi encerrado.")
+
+        self._queue.put((operation, future, contextvars.copy_context()))
+        return future
+
+    def execute(self, operation: WriteOperation) -> Any:
+        """Enfileira a operação e espera o commit, retornando o seu resultado."""
+
+        return self.submit(operation).result()
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Grava o que já estiver na fila e encerra a thread."""
+
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = self._connect_raw()
+        conn.isolation_level = None
+        conn.row_factory = sqlite3.Row
+        conn.set_trace_callback(record_query)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _run(self):
+        try:
+            self._connection = self._connect()
+        except BaseException as e:
+            # Repassado ao __init__, que o levanta para quem criou o escritor.
+            self._connect_error = e
+            return
+        finally:
+            self._started.set()
+
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    try:
+                        self._write_batch(batch)
+                    except Exception as e:
+                        # A thread precisa sobreviver: sem ela, toda escrita seguinte esperaria para sempre.
+                        print(f"Erro no escritor do banco de dados: {e}")
+                        self._abort_batch(batch, e)
+                if stop:
+                    break
+        finally:
+            self._connection.close()
+
+    def _next_batch(self) -> Tuple[List[Tuple[WriteOperation, Future, contextvars.Context]], bool]:
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+
+        batch = [item]
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=self.group_wait) if self.group_wait else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    def _write_batch(self, batch: List[Tuple[WriteOperation, Future, contextvars.Context]]):
+        conn = self._connection
+        results: List[Tuple[Future, Any, Optional[BaseException]]] = []
+        started = time.perf_counter()
+
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            self._abort_batch(batch, e)
+            return
+
+        for operation, future, context in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            conn.execute("SAVEPOINT revisu_write")
+            try:
+                result = context.run(operation, conn)
+            except BaseException as e:
+                if not conn.in_transaction:
+                    # SQLITE_FULL, SQLITE_IOERR e SQLITE_NOMEM desfazem a transação inteira,
+                    # savepoint incluído: as escritas anteriores do lote também se perderam.
+                    print(f"Erro ao gravar lote de {len(batch)} escrita(s): {e}")
+                    self._abort_batch(batch, e)
+                    return
+                conn.execute("ROLLBACK TO revisu_write")
+                conn.execute("RELEASE revisu_write")
+                results.append((future, None, e))
+            else:
+                conn.execute("RELEASE revisu_write")
+                results.append((future, result, None))
+
+        try:
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"Erro ao gravar lote de {len(batch)} escrita(s): {e}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for future, _, error in results:
+                future.set_exception(error or e)
+            return
+        finally:
+            WRITE_BATCH_SIZE.observe(len(batch))
+            WRITE_COMMIT_SECONDS.observe(time.perf_counter() - started)
+
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def _abort_batch(self, batch: List[Tuple[WriteOperation, Future, contextvars.Context]], error: BaseException):
+        """Desfaz o que restar da transação e falha todas as escritas do lote ainda sem resultado."""
+
+        conn = self._connection
+        if conn.in_transaction:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error as e:
+                print(f"Erro ao desfazer lote de escritas: {e}")
+
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
@@ -0,0 +1,10 @@
+import pytest
+
+from src import db
+
+@pytest.fixture
+def memory_database():
+    db.configure_database(db.MEMORY_DATABASE)
+    db.init_db()
+    yield
+    db.configure_database(None)
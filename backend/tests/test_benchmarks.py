@@ -0,0 +1,41 @@
+import pytest
+
+from src import db
+from benchmarks.datagen import generate_database
+from benchmarks.run import measure
+from benchmarks.compare import compare
+
+@pytest.fixture
+def restore_database():
+    yield
+    db.configure_database(None)
+
+@pytest.mark.parametrize("in_memory", [False, True])
+def test_generate_database(tmp_path, restore_database, in_memory):
+    path = db.MEMORY_DATABASE if in_memory else str(tmp_path / "bench.db")
+
+    summary = generate_database(path, topics=50, topics_per_file=5, due_fraction=1.0)
+
+    conn = db.get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM File").fetchone()[0] == 10
+    assert conn.execute("SELECT COUNT(*) FROM Topic").fetchone()[0] == 50
+    assert conn.execute("SELECT COUNT(*) FROM TopicTag").fetchone()[0] == 150
+    conn.close()
+
+    assert summary["files"] == 10
+    assert len(db.get_topics_for_review_db()) == 50
+    assert len(db.get_file_by_id_db(1)["topics"]) == 5
+
+def test_measure_and_compare():
+    stats = measure(lambda: None, min_rounds=3, min_time=0)
+
+    assert stats["rounds"] >= 3
+    assert stats["min_ms"] <= stats["median_ms"] <= stats["max_ms"]
+
+    base = {"results": [{"scale": 10, "name": "case", "stats": {"median_ms": 1.0}}]}
+    new = {"results": [{"scale": 10, "name": "case", "stats": {"median_ms": 1.5}}]}
+
+    rows = compare(base, new, threshold=0.1)
+
+    assert rows[0]["ratio"] == 1.5
+    assert rows[0]["regression"] is True
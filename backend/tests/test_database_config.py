@@ -0,0 +1,58 @@
+import os
+import sys
+import sqlite3
+
+from src import db
+from src.backup import backup_database, create_snapshot, list_backups, rotate_backups
+
+def test_db_path_resolution(tmp_path, monkeypatch):
+    monkeypatch.delenv("REVISU_DB_PATH", raising=False)
+    assert db.get_db_path() == os.path.join(os.path.dirname(db.__file__), db.DATABASE_FILE)
+
+    monkeypatch.setenv("REVISU_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(sys, "frozen", True, raising=False)
+    assert db.get_db_path() == os.path.join(str(tmp_path), db.DATABASE_FILE)
+
+    monkeypatch.setenv("REVISU_DB_PATH", str(tmp_path / "custom.db"))
+    assert db.get_db_path() == str(tmp_path / "custom.db")
+
+def test_memory_database_is_shared_between_connections(memory_database):
+    file_id = db.insert_file("nota.md", "nota.md", "md", "Conteúdo.")
+    db.update_file_extraction_db(file_id, "done")
+
+    assert db.get_file_by_id_db(file_id)["extraction_status"] == "done"
+
+    db.configure_database(db.MEMORY_DATABASE)
+    db.init_db()
+    assert db.get_file_by_id_db(file_id) is None
+
+def test_backup_copies_in_page_steps(memory_database, tmp_path):
+    for i in range(200):
+        db.insert_file(f"nota-{i}.md", f"nota-{i}.md", "md", "x" * 2000)
+
+    result = backup_database(str(tmp_path / "snapshot.db"), pages=10, sleep=0.005)
+
+    assert result["steps"] > 1
+    # Uma pausa entre cada par de passos.
+    assert result["seconds"] >= (result["steps"] - 1) * 0.005
+    assert not os.path.exists(str(tmp_path / "snapshot.db.partial"))
+    conn = sqlite3.connect(result["path"])
+    assert conn.execute("SELECT COUNT(*) FROM File").fetchone()[0] == 200
+    conn.close()
+
+def test_snapshots_are_rotated(memory_database, tmp_path):
+    directory = str(tmp_path / "backups")
+
+    for _ in range(3):
+        create_snapshot(directory, keep=2)
+
+    backups = list_backups(directory)
+    assert len(backups) == 2
+
+    assert rotate_backups(directory, keep=1) == backups[:1]
+    assert list_backups(directory) == backups[1:]
+
+def test_snapshot_needs_a_directory_for_memory_databases(memory_database, monkeypatch):
+    monkeypatch.delenv("REVISU_BACKUP_DIR", raising=False)
+
+    assert create_snapshot() is None
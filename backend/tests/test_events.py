@@ -0,0 +1,142 @@
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from src import db
+from src import events
+from src.events import DueNotifier, EventBroker, TimerWheel
+
+def insert_topic_due_in(seconds):
+    file_id = db.insert_file("nota.md", "nota.md", "md", "Conteúdo.")
+    next_review_date = (datetime.now() + timedelta(seconds=seconds)).isoformat()
+    return db.insert_topic(file_id, "Tópico", "Resumo", '["P?"]', next_review_date, 2.5, 0)
+
+async def next_event(queue, event, timeout=3.0):
+    while True:
+        name, data = await asyncio.wait_for(queue.get(), timeout)
+        if name == event:
+            return data
+
+def test_timer_wheel_expires_in_due_order():
+    wheel = TimerWheel(start=1000.0, slots=60)
+    wheel.add(1, 1030.5)
+    wheel.add(2, 1010.0)
+    wheel.add(3, 1010.2)
+
+    assert wheel.next_due() == 1010.0
+    assert wheel.advance(1005.0) == []
+    assert wheel.advance(1010.1) == [2]
+    assert wheel.advance(1031.0) == [3, 1]
+    assert len(wheel) == 0
+
+def test_timer_wheel_reschedule_remove_and_horizon():
+    wheel = TimerWheel(start=1000.0, slots=60)
+    wheel.add(1, 1010.0)
+    wheel.add(1, 1050.0)
+    wheel.add(2, 1020.0)
+    wheel.remove(2)
+
+    assert wheel.add(3, 2000.0) is False
+    assert wheel.advance(1040.0) == []
+    # Um salto maior que uma volta inteira ainda entrega o que estava na roda.
+    assert wheel.advance(5000.0) == [1]
+    assert wheel.horizon == 5060.0
+
+def test_broker_delivers_across_threads_and_drops_oldest():
+    async def scenario():
+        broker = EventBroker(queue_size=2)
+        queue = broker.subscribe()
+
+        publisher = threading.Thread(target=lambda: [broker.publish("counts_changed", {"due": n}) for n in range(3)])
+        publisher.start()
+        publisher.join()
+        await asyncio.sleep(0)
+
+        received = [queue.get_nowait()[1]["due"] for _ in range(queue.qsize())]
+        broker.unsubscribe(queue)
+        return received, len(broker)
+
+    assert asyncio.run(scenario()) == ([1, 2], 0)
+
+@pytest.mark.asyncio
+async def test_notifier_publishes_due_topics_and_counts(memory_database):
+    broker = EventBroker()
+    notifier = DueNotifier(broker, window_seconds=60)
+    queue = broker.subscribe()
+    topic_id = insert_topic_due_in(0.5)
+    rescheduled_id = insert_topic_due_in(0.5)
+
+    task = asyncio.create_task(notifier.run())
+    try:
+        await asyncio.sleep(0.1)
+        # Revisado antes de vencer: sai da roda e não gera topic_due.
+        later = (datetime.now() + timedelta(days=3)).isoformat()
+        db.get_writer().execute(lambda conn: conn.execute("UPDATE Topic SET next_review_date = ? WHERE id = ?", (later, rescheduled_id)))
+        notifier.topic_scheduled(rescheduled_id, later)
+
+        assert await next_event(queue, "topic_due") == {"topic_ids": [topic_id]}
+        assert await next_event(queue, "counts_changed") == {"files": 2, "due": 1}
+    finally:
+        task.cancel()
+
+@pytest.mark.asyncio
+async def test_notifier_is_idle_without_subscribers(memory_database, monkeypatch):
+    queries = []
+    monkeypatch.setattr(db, "get_topics_due_between_db", lambda *args: queries.append(args) or [])
+
+    notifier = DueNotifier(EventBroker(), window_seconds=60)
+    task = asyncio.create_task(notifier.run())
+    try:
+        await asyncio.sleep(0.1)
+        notifier.topic_scheduled(1, datetime.now().isoformat())
+        await asyncio.sleep(0.1)
+    finally:
+        task.cancel()
+
+    assert queries == []
+
+@pytest.mark.asyncio
+async def test_notifier_step_survives_library_change_during_load(memory_database, monkeypatch):
+    broker = EventBroker()
+    notifier = DueNotifier(broker, window_seconds=60)
+    broker.subscribe()
+    load_window = notifier._load_window
+
+    def load_and_delete(now):
+        wheel = load_window(now)
+        # Um DELETE em outra thread descarta a roda logo depois de ela ser lida.
+        notifier.library_changed()
+        return wheel
+
+    monkeypatch.setattr(notifier, "_load_window", load_and_delete)
+
+    assert await notifier.step() >= 0
+
+@pytest.mark.asyncio
+async def test_notifier_keeps_running_after_a_failed_step(memory_database, monkeypatch):
+    broker = EventBroker()
+    notifier = DueNotifier(broker, window_seconds=60)
+    queue = broker.subscribe()
+    topic_id = insert_topic_due_in(0.3)
+    load_window = db.get_topics_due_between_db
+    calls = []
+
+    def failing_once(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return load_window(*args)
+
+    monkeypatch.setattr(db, "get_topics_due_between_db", failing_once)
+    monkeypatch.setattr(events, "NOTIFIER_RETRY_SECONDS", 0.05)
+
+    task = asyncio.create_task(notifier.run())
+    try:
+        assert await next_event(queue, "topic_due") == {"topic_ids": [topic_id]}
+    finally:
+        task.cancel()
+
+    assert len(calls) >= 2
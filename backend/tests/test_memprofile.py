@@ -0,0 +1,46 @@
+import pytest
+
+from src import memprofile
+
+@pytest.fixture
+def profiler():
+    memprofile.start("snapshot", frames=5)
+    yield memprofile
+    memprofile.stop()
+
+def test_profile_request_records_endpoint(profiler):
+    kept = []
+    with profiler.profile_request() as measurement:
+        measurement.endpoint = "POST /files/process"
+        measurement.size = 1024
+        kept.append(bytearray(512 * 1024))
+
+    report = profiler.get_report(limit=5)
+    stats = report["endpoints"]["POST /files/process"]
+
+    assert report["enabled"] is True
+    assert stats["requests"] == 1
+    assert stats["peak_bytes_max"] >= 512 * 1024
+    assert stats["growth_bytes_max"] >= 512 * 1024
+    assert stats["largest_body_bytes"] == 1024
+    assert any("test_memprofile.py" in site["site"] for site in stats["growth_sites"])
+
+def test_disabled_profiler_is_noop():
+    with memprofile.profile_request() as measurement:
+        measurement.endpoint = "GET /files"
+
+    report = memprofile.get_report()
+
+    assert report["enabled"] is False
+    assert "endpoints" not in report
+
+def test_start_from_env():
+    assert memprofile.start_from_env({}) is None
+
+    with pytest.raises(ValueError):
+        memprofile.start_from_env({"REVISU_MEMPROFILE": "tudo"})
+
+    try:
+        assert memprofile.start_from_env({"REVISU_MEMPROFILE": "1"}) == "peak"
+    finally:
+        memprofile.stop()
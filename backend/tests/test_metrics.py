@@ -0,0 +1,60 @@
+from src.metrics import (
+    Counter,
+    Histogram,
+    REGISTRY,
+    stage,
+    start_trace,
+    end_trace,
+    record_query,
+    server_timing_header,
+    render_prometheus
+)
+
+def test_counter_and_histogram_render():
+    counter = Counter("test_counter_total", "Contador de teste.", ("kind",))
+    histogram = Histogram("test_histogram_seconds", "Histograma de teste.", buckets=(0.1, 1.0))
+    try:
+        counter.inc(kind="a")
+        counter.inc(2, kind="a")
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        output = render_prometheus()
+
+        assert 'test_counter_total{kind="a"} 3' in output
+        assert 'test_histogram_seconds_bucket{le="0.1"} 1' in output
+        assert 'test_histogram_seconds_bucket{le="1"} 2' in output
+        assert 'test_histogram_seconds_bucket{le="+Inf"} 3' in output
+        assert "test_histogram_seconds_count 3" in output
+    finally:
+        REGISTRY.remove(counter)
+        REGISTRY.remove(histogram)
+
+def test_trace_collects_stages_and_queries():
+    trace, token = start_trace()
+    try:
+        with stage("llm"):
+            pass
+        with stage("llm"):
+            pass
+        record_query("SELECT * FROM File")
+        record_query("BEGIN ")
+        record_query("COMMIT")
+    finally:
+        end_trace(token)
+
+    assert list(trace.stages) == ["llm"]
+    assert trace.queries == 1
+
+    header = server_timing_header(trace, 0.0125)
+
+    assert header.startswith("llm;dur=")
+    assert 'sql;desc="1 queries"' in header
+    assert header.endswith("total;dur=12.50")
+
+def test_stage_without_trace_only_updates_histogram():
+    with stage("isolado"):
+        pass
+
+    assert 'revisu_stage_duration_seconds_count{stage="isolado"}' in render_prometheus()
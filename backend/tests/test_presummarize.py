@@ -0,0 +1,74 @@
+from src.presummarize import clean_lines, split_sentences, rank_sentences, presummarize
+
+def test_clean_lines_strips_boilerplate_and_duplicates():
+    content = """---
+title: Nota
+---
+# Fotossíntese
+![diagrama](img/diagrama.png)
+Veja a [documentação](https://exemplo.com) completa.
+-----
+https://exemplo.com/rodape
+Página 3 de 10
+A clorofila absorve luz.
+A clorofila absorve luz.
+"""
+
+    assert clean_lines(content) == [
+        "Fotossíntese",
+        "Veja a documentação completa.",
+        "A clorofila absorve luz.",
+    ]
+
+def test_split_sentences():
+    assert split_sentences(["Primeira frase. Segunda frase! Terceira?"]) == [
+        "Primeira frase.",
+        "Segunda frase!",
+        "Terceira?",
+    ]
+
+def test_rank_sentences_prefers_central_sentences():
+    sentences = [
+        "A fotossíntese converte luz em energia química nas plantas.",
+        "Nas plantas a fotossíntese ocorre nos cloroplastos com luz.",
+        "A energia química da fotossíntese sustenta as plantas.",
+        "O campeonato de futebol terminou empatado ontem.",
+    ]
+
+    scores = rank_sentences(sentences)
+
+    assert scores.argmin() == 3
+
+def test_presummarize_passes_short_notes_through():
+    result = presummarize("Nota curta.\nNota curta.", budget=2000)
+
+    assert result.text == "Nota curta."
+    assert result.sentences_kept == result.sentences_total == 1
+
+def test_presummarize_fits_budget_and_keeps_order():
+    relevant = [f"A fotossíntese nas plantas usa luz e clorofila, parte {i}." for i in range(20)]
+    noise = [f"Linha aleatória número {i} sobre xyz{i}." for i in range(20)]
+    content = "\n".join(line for pair in zip(relevant, noise) for line in pair)
+
+    result = presummarize(content, budget=400)
+
+    assert len(result.text) <= 400
+    assert result.original_chars == len(content)
+    assert result.compression_ratio < 0.5
+    assert 0 < result.sentences_kept < result.sentences_total
+    kept = [sentence for sentence in split_sentences(clean_lines(content)) if sentence in result.text]
+    assert result.text == " ".join(kept)
+
+def test_presummarize_truncates_when_no_sentence_fits():
+    # Texto extraído de PDF, sem pontuação: cada linha é uma sentença maior que o orçamento.
+    first = " ".join(f"fotossíntese clorofila luz{i % 7}" for i in range(150))
+    second = " ".join(f"parede celular membrana{i % 5}" for i in range(150))
+    content = f"{first}\n{second}"
+
+    result = presummarize(content, budget=2000)
+
+    assert len(first) > 2000 and len(second) > 2000
+    assert 0 < len(result.text) <= 2000
+    assert result.output_chars == len(result.text)
+    assert result.sentences_kept == 1
+    assert result.text in (first[:2000], second[:2000])
@@ -0,0 +1,69 @@
+import json
+import pytest
+
+from src.providers import (
+    LocalStubProvider,
+    GeminiProvider,
+    ProviderError,
+    create_provider_from_env
+)
+
+def test_stub_provider_is_deterministic():
+    first = LocalStubProvider(seed=1).generate("nota sobre redes")
+    second = LocalStubProvider(seed=2).generate("nota sobre redes")
+
+    assert first == second
+
+    parsed = json.loads(first)
+    assert parsed["titulo"]
+    assert len(parsed["tags"]) == 3
+    assert len(parsed["perguntas"]) == 3
+
+def test_stub_provider_response_size():
+    provider = LocalStubProvider(response_chars=1000)
+
+    parsed = json.loads(provider.generate("nota"))
+
+    assert len(parsed["resumo"]) == 1000
+
+def test_stub_provider_error_rate():
+    provider = LocalStubProvider(error_rate=1.0)
+
+    with pytest.raises(ProviderError):
+        provider.generate("nota")
+
+def test_stub_provider_latency_is_reproducible():
+    sleeps = []
+    provider = LocalStubProvider(
+        latency_ms=100,
+        latency_jitter_ms=50,
+        latency_distribution="lognormal",
+        seed=42,
+        sleep=sleeps.append
+    )
+    for _ in range(5):
+        provider.generate("nota")
+
+    expected = LocalStubProvider(latency_ms=100, latency_jitter_ms=50, latency_distribution="lognormal", seed=42)
+
+    assert sleeps == [expected.sample_latency_ms() / 1000 for _ in range(5)]
+    assert all(delay > 0 for delay in sleeps)
+
+def test_stub_provider_invalid_distribution():
+    with pytest.raises(ValueError):
+        LocalStubProvider(latency_distribution="bimodal")
+
+def test_create_provider_from_env():
+    stub = create_provider_from_env({
+        "REVISU_LLM_PROVIDER": "stub",
+        "REVISU_STUB_LATENCY_MS": "20",
+        "REVISU_STUB_ERROR_RATE": "0.1",
+    })
+
+    assert isinstance(stub, LocalStubProvider)
+    assert stub.latency_ms == 20
+    assert stub.error_rate == 0.1
+    assert isinstance(create_provider_from_env({}), GeminiProvider)
+
+    with pytest.raises(ValueError):
+        create_provider_from_env({"REVISU_LLM_PROVIDER": "desconhecido"})
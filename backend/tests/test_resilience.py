@@ -0,0 +1,105 @@
+import random
+import pytest
+
+from src.providers import RetryableProviderError, ProviderError
+from src.resilience import (
+    TokenBucket,
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimitTimeout,
+    LLMGuard,
+    backoff_delay
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def test_token_bucket_limits_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_second=2, capacity=2, clock=clock, sleep=clock.sleep)
+
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+    assert bucket.acquire() is True
+    assert clock.now == pytest.approx(0.5)
+    assert bucket.acquire(timeout=0.1) is False
+
+def test_circuit_breaker_opens_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow() is True
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow() is False
+
+    clock.now = 10
+    assert breaker.allow() is True
+    assert breaker.allow() is False  # apenas uma chamada de teste
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_backoff_delay_is_bounded():
+    rng = random.Random(0)
+
+    delays = [backoff_delay(attempt, 0.5, 4.0, rng) for attempt in range(10)]
+
+    assert all(0 <= delay <= 4.0 for delay in delays)
+    assert all(delay <= 0.5 * 2 ** attempt for attempt, delay in enumerate(delays))
+
+def test_guard_retries_then_gives_up():
+    sleeps = []
+    calls = []
+    guard = LLMGuard(breaker=CircuitBreaker(failure_threshold=10), max_retries=2, sleep=sleeps.append)
+
+    def failing():
+        calls.append(1)
+        raise RetryableProviderError("503")
+
+    with pytest.raises(RetryableProviderError):
+        guard.call(failing)
+
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+
+def test_guard_does_not_retry_permanent_errors():
+    calls = []
+    guard = LLMGuard(max_retries=3, sleep=lambda _: None)
+
+    def invalid():
+        calls.append(1)
+        raise ProviderError("400 invalid argument")
+
+    with pytest.raises(ProviderError):
+        guard.call(invalid)
+
+    assert len(calls) == 1
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+
+def test_guard_fails_fast_when_circuit_is_open():
+    guard = LLMGuard(breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60), max_retries=0, sleep=lambda _: None)
+
+    with pytest.raises(RetryableProviderError):
+        guard.call(lambda: (_ for _ in ()).throw(RetryableProviderError("quota")))
+
+    with pytest.raises(CircuitOpenError):
+        guard.call(lambda: "nunca chamado")
+
+def test_guard_rate_limit_timeout():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_second=0.001, capacity=1, clock=clock, sleep=clock.sleep)
+    guard = LLMGuard(bucket=bucket, rate_limit_timeout=1)
+
+    assert guard.call(lambda: "ok") == "ok"
+    with pytest.raises(RateLimitTimeout):
+        guard.call(lambda: "ok")
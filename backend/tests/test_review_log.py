@@ -0,0 +1,80 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from src import db
+from src.services import get_review_stats_service, review_topic_service
+
+def insert_topic_with_tags(*tags):
+    file_id = db.insert_file("nota.md", "nota.md", "md", "Conteúdo.")
+    topic_id = db.insert_topic(file_id, "Tópico", "Resumo", '["P?"]', datetime.now().isoformat(), 2.5, 0)
+    for tag in tags:
+        db.link_topic_to_tag(topic_id, db.get_or_create_tag(tag))
+    return topic_id
+
+def fetch_all(sql, *params):
+    conn = db.get_db_connection()
+    try:
+        return [tuple(row) for row in conn.execute(sql, params).fetchall()]
+    finally:
+        conn.close()
+
+def test_each_review_is_logged_with_the_previous_state(memory_database):
+    topic_id = insert_topic_with_tags("redes")
+
+    review_topic_service(topic_id, 5)
+    review_topic_service(topic_id, 1)
+
+    rows = fetch_all("SELECT quality, previous_repetitions, repetitions FROM ReviewLog WHERE topic_id = ? ORDER BY id", topic_id)
+    assert rows == [(5, 0, 1), (1, 1, 0)]
+
+def test_review_log_is_append_only(memory_database):
+    review_topic_service(insert_topic_with_tags(), 4)
+
+    def tamper(sql):
+        db.get_writer().execute(lambda conn: conn.execute(sql))
+
+    with pytest.raises(sqlite3.IntegrityError):
+        tamper("UPDATE ReviewLog SET quality = 5")
+    with pytest.raises(sqlite3.IntegrityError):
+        tamper("DELETE FROM ReviewLog")
+    assert fetch_all("SELECT quality FROM ReviewLog") == [(4,)]
+
+def test_rollups_match_the_log(memory_database):
+    networks = insert_topic_with_tags("redes", "prova")
+    biology = insert_topic_with_tags("biologia")
+    for topic_id, quality in [(networks, 5), (networks, 2), (biology, 3), (biology, 0), (networks, 4)]:
+        review_topic_service(topic_id, quality)
+
+    assert fetch_all("SELECT day, quality, reviews FROM ReviewDaily ORDER BY quality") == fetch_all(
+        "SELECT substr(reviewed_at, 1, 10), quality, COUNT(*) FROM ReviewLog GROUP BY 1, 2 ORDER BY quality"
+    )
+
+    stats = get_review_stats_service(days=7)
+    assert stats.reviews == 5
+    assert stats.correct == 3
+    assert stats.retention == pytest.approx(0.6)
+    assert [(row.quality, row.reviews) for row in stats.by_quality] == [(0, 1), (1, 0), (2, 1), (3, 1), (4, 1), (5, 1)]
+    assert {(tag.tag, tag.reviews, tag.correct) for tag in stats.tags} == {
+        ("redes", 3, 2), ("prova", 3, 2), ("biologia", 2, 1)
+    }
+
+def test_stats_fill_days_without_reviews(memory_database):
+    review_topic_service(insert_topic_with_tags(), 5)
+
+    stats = get_review_stats_service(days=3)
+
+    today = datetime.now().date()
+    assert [day.day for day in stats.daily] == [today - timedelta(days=2), today - timedelta(days=1), today]
+    assert [day.reviews for day in stats.daily] == [0, 0, 1]
+    assert stats.daily[0].retention is None
+    assert stats.daily[2].retention == 1.0
+    assert stats.daily[2].by_quality == [0, 0, 0, 0, 0, 1]
+
+def test_reviewing_a_missing_topic_logs_nothing(memory_database):
+    with pytest.raises(ValueError):
+        review_topic_service(9999, 4)
+
+    assert fetch_all("SELECT COUNT(*) FROM ReviewLog") == [(0,)]
+    assert get_review_stats_service(days=1).reviews == 0
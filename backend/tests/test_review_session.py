@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src import db
+from src.models import ReviewAnswer
+from src.services import (
+    calculate_next_review,
+    preview_review_intervals,
+    get_review_session_service,
+    submit_review_answers_service,
+)
+
+def insert_due_topic(title, overdue_days, repetitions=2, ease_factor=2.5):
+    file_id = db.insert_file("nota.md", "nota.md", "md", "Conteúdo.")
+    topic_id = db.insert_topic(
+        file_id, title, "Resumo", '["P?"]',
+        (datetime.now() - timedelta(days=overdue_days)).isoformat(), ease_factor, repetitions
+    )
+    db.link_topic_to_tag(topic_id, db.get_or_create_tag("tag"))
+    return topic_id
+
+def flush_writes():
+    db.get_writer().execute(lambda conn: None)
+
+def test_previews_match_calculate_next_review():
+    now = datetime(2025, 5, 27, 10, 0, 0)
+
+    previews = preview_review_intervals(2, 2.5, now)
+
+    assert [preview.quality for preview in previews] == [0, 1, 2, 3, 4, 5]
+    assert previews[0].interval_seconds == 60
+    assert previews[5].interval_seconds == 7 * 86400
+    for preview in previews:
+        next_review, repetitions, ease_factor = calculate_next_review(2, 2.5, preview.quality)
+        assert preview.repetitions == repetitions
+        assert preview.ease_factor == pytest.approx(ease_factor)
+        assert preview.next_review_date == now + timedelta(seconds=preview.interval_seconds)
+
+def test_review_session_returns_most_overdue_topics_first(memory_database):
+    insert_due_topic("Pouco atrasado", 1)
+    insert_due_topic("Muito atrasado", 10)
+    insert_due_topic("Atrasado", 5)
+
+    session = get_review_session_service(size=2)
+
+    assert session.due_total == 3
+    assert [topic.title for topic in session.topics] == ["Muito atrasado", "Atrasado"]
+    assert session.topics[0].tags == ["tag"]
+    assert len(session.topics[0].previews) == 6
+
+def test_review_answers_are_applied_in_the_background(memory_database):
+    topic_id = insert_due_topic("Tópico", 3)
+
+    accepted = submit_review_answers_service([
+        ReviewAnswer(topic_id=topic_id, quality=5),
+        ReviewAnswer(topic_id=9999, quality=3),
+    ])
+    flush_writes()
+
+    assert accepted == 2
+    data = db.get_topic_review_data_db(topic_id)
+    assert data["repetitions"] == 3
+    assert data["ease_factor"] == pytest.approx(2.6)
+    assert get_review_session_service(size=10).due_total == 0
+
+def test_topic_due_earlier_today_is_returned(memory_database):
+    file_id = db.insert_file("nota.md", "nota.md", "md", "Conteúdo.")
+    now = datetime.now()
+    due_id = db.insert_topic(file_id, "Vencido", "Resumo", '["P?"]', (now - timedelta(seconds=30)).isoformat(), 2.5, 0)
+    db.insert_topic(file_id, "Futuro", "Resumo", '["P?"]', (now + timedelta(hours=1)).isoformat(), 2.5, 0)
+
+    assert [topic["id"] for topic in db.get_topics_for_review_db()] == [due_id]
+    assert db.count_topics_for_review_db() == 1
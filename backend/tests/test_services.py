@@ -8,6 +8,10 @@ from src.services import (
     calculate_next_review,
     process_content_with_gemini,
     process_new_file,
+    process_new_file_stream,
+    reprocess_pending_files_service,
+    stream_content_with_gemini,
+    ExtractionError,
 )
 
 from src.services import (
@@ -15,7 +19,11 @@ from src.services import (
     _format_topic_data_to_response
 )
 
+from src import db
 from src.models import TopicResponse, FileResponse
+from src.providers import RetryableProviderError
+from src.resilience import LLMGuard
+from src.similarity import fingerprint
 
 def test_calculate_next_review_quality_5_initial():
     repetitions = 0
@@ -105,21 +113,20 @@ def test_calculate_next_review_edge_case_ease_factor_min():
         assert abs(new_ease_factor - 1.3) < 0.001
         assert next_review == datetime(2025, 5, 27, 10, 0, 0) + timedelta(minutes=1)
 
-@patch('src.services.model')
-def test_process_content_with_gemini_success(mock_gemini_model):
-    mock_response = MagicMock()
-    mock_response.text = json.dumps({
+@patch('src.services.get_provider')
+def test_process_content_with_gemini_success(mock_get_provider):
+    mock_provider = mock_get_provider.return_value
+    mock_provider.generate.return_value = json.dumps({
         "titulo": "Título de Teste",
         "resumo": "Este é um resumo de teste.",
         "tags": ["teste", "python", "gemini"],
         "perguntas": ["P1?", "P2?"]
     })
-    mock_gemini_model.generate_content.return_value = mock_response
 
     content = "Conteúdo de teste para a IA."
     result = process_content_with_gemini(content)
 
-    mock_gemini_model.generate_content.assert_called_once()
+    mock_provider.generate.assert_called_once()
 
     assert result["title"] == "Título de Teste"
     assert result["summary"] == "Este é um resumo de teste."
@@ -127,29 +134,40 @@ def test_process_content_with_gemini_success(mock_gemini_model):
     assert result["questions"] == ["P1?", "P2?"]
 
 
-@patch('src.services.model')
-def test_process_content_with_gemini_invalid_json(mock_gemini_model):
-    mock_response = MagicMock()
-    mock_response.text = "Isso não é um JSON válido."
-    mock_gemini_model.generate_content.return_value = mock_response
+@patch('src.services.get_provider')
+def test_process_content_with_gemini_invalid_json(mock_get_provider):
+    mock_get_provider.return_value.generate.return_value = "Isso não é um JSON válido."
 
     content = "Conteúdo de teste."
-    result = process_content_with_gemini(content)
+    with pytest.raises(ExtractionError) as exc_info:
+        process_content_with_gemini(content)
 
-    assert result["title"] == "Erro na IA - Título Padrão"
-    assert "Resumo gerado manualmente" in result["summary"]
-    assert "erro-ia" in result["tags"]
+    assert "Resposta inválida do modelo" in str(exc_info.value)
 
-@patch('src.services.model')
-def test_process_content_with_gemini_api_error(mock_gemini_model):
-    mock_gemini_model.generate_content.side_effect = Exception("Erro de conexão simulado")
+@patch('src.services.get_provider')
+def test_process_content_with_gemini_api_error(mock_get_provider):
+    mock_get_provider.return_value.generate.side_effect = Exception("Erro de conexão simulado")
 
     content = "Conteúdo de teste."
-    result = process_content_with_gemini(content)
+    with pytest.raises(ExtractionError) as exc_info:
+        process_content_with_gemini(content)
+
+    assert "Erro de conexão simulado" in str(exc_info.value)
+    mock_get_provider.return_value.generate.assert_called_once()
+
+@patch('src.services.get_llm_guard')
+@patch('src.services.get_provider')
+def test_process_content_with_gemini_retries_transient_errors(mock_get_provider, mock_get_guard):
+    mock_get_guard.return_value = LLMGuard(max_retries=2, sleep=lambda _: None)
+    mock_get_provider.return_value.generate.side_effect = [
+        RetryableProviderError("429 quota"),
+        json.dumps({"titulo": "T", "resumo": "R", "tags": ["a"], "perguntas": ["P?"]})
+    ]
+
+    result = process_content_with_gemini("Conteúdo de teste.")
 
-    assert result["title"] == "Erro na IA - Título Padrão"
-    assert result["summary"] == "Resumo gerado manualmente devido a erro geral na API."
-    assert "erro-api" in result["tags"]
+    assert result["title"] == "T"
+    assert mock_get_provider.return_value.generate.call_count == 2
 
 def test_format_topic_data_to_response_valid():
     topic_data = {
@@ -225,29 +243,26 @@ def test_format_file_data_to_response():
     assert response.processed_at == datetime(2025, 5, 27, 9, 0, 0)
 
 @pytest.mark.asyncio
+@patch('src.services.update_file_extraction_db')
 @patch('src.services.insert_file')
 @patch('src.services.process_content_with_gemini')
-@patch('src.services.insert_topic')
-@patch('src.services.get_or_create_tag')
-@patch('src.services.link_topic_to_tag')
+@patch('src.services.store_extraction_db')
 @patch('src.services.get_file_by_id_db')
 @patch('src.services._format_file_data_to_response')
 async def test_process_new_file_success(
     mock_format_file,
     mock_get_file_by_id,
-    mock_link_topic_tag,
-    mock_get_or_create_tag,
-    mock_insert_topic,
+    mock_store_extraction,
     mock_process_gemini,
-    mock_insert_file
+    mock_insert_file,
+    mock_update_extraction
 ):
     mock_insert_file.return_value = 1
     mock_process_gemini.return_value = {
         "title": "Título IA", "summary": "Resumo IA",
         "questions": ["Q1"], "tags": ["tag1", "tag2"]
     }
-    mock_insert_topic.return_value = 101
-    mock_get_or_create_tag.side_effect = [1, 2]
+    mock_store_extraction.return_value = 101
     mock_get_file_by_id.return_value = {"id": 1, "topics": []}
     mock_format_file.return_value = MagicMock(spec=FileResponse)
 
@@ -258,25 +273,113 @@ async def test_process_new_file_success(
     from src.services import process_new_file
     result = await process_new_file(file_name, file_type, content)
 
-    mock_insert_file.assert_called_once_with(file_name, file_name, file_type, content)
+    mock_insert_file.assert_called_once_with(file_name, file_name, file_type, content, fingerprint(content))
     mock_process_gemini.assert_called_once_with(content)
-    mock_insert_topic.assert_called_once_with(
-        file_id=1,
-        title="Título IA",
-        summary="Resumo IA",
-        questions_json=json.dumps(["Q1"]),
-        next_review_date=mock_insert_topic.call_args.kwargs['next_review_date'],
-        ease_factor=2.5,
-        repetitions=0,
-        last_reviewed=None
+    mock_store_extraction.assert_called_once_with(
+        1,
+        "Título IA",
+        "Resumo IA",
+        json.dumps(["Q1"]),
+        mock_store_extraction.call_args.args[4],
+        ["tag1", "tag2"]
     )
-
-    mock_get_or_create_tag.assert_any_call("tag1")
-    mock_get_or_create_tag.assert_any_call("tag2")
-    mock_link_topic_tag.assert_any_call(101, 1)
-    mock_link_topic_tag.assert_any_call(101, 2)
     mock_get_file_by_id.assert_called_once_with(1)
     mock_format_file.assert_called_once()
+    mock_update_extraction.assert_not_called()
 
     assert result is not None
     assert isinstance(result, MagicMock)
+
+@pytest.mark.asyncio
+@patch('src.services.update_file_extraction_db')
+@patch('src.services.insert_file')
+@patch('src.services.process_content_with_gemini')
+@patch('src.services.store_extraction_db')
+@patch('src.services.get_file_by_id_db')
+@patch('src.services._format_file_data_to_response')
+async def test_process_new_file_defers_failed_extraction(
+    mock_format_file,
+    mock_get_file_by_id,
+    mock_store_extraction,
+    mock_process_gemini,
+    mock_insert_file,
+    mock_update_extraction
+):
+    mock_insert_file.return_value = 7
+    mock_process_gemini.side_effect = ExtractionError("Falha na API: 429")
+    mock_get_file_by_id.return_value = {"id": 7, "topics": []}
+
+    await process_new_file("nota.md", "md", "Conteúdo.")
+
+    mock_store_extraction.assert_not_called()
+    mock_update_extraction.assert_called_once_with(7, "pending", "Falha na API: 429")
+    mock_format_file.assert_called_once()
+
+@patch('src.services.get_provider')
+def test_stream_content_with_gemini_emits_fields_in_order(mock_get_provider):
+    response = json.dumps({"titulo": "T", "resumo": "R", "tags": ["a", "b"], "perguntas": ["P?"]})
+    mock_provider = mock_get_provider.return_value
+    mock_provider.generate_stream.return_value = iter([response[i:i + 7] for i in range(0, len(response), 7)])
+
+    events = list(stream_content_with_gemini("Conteúdo de teste."))
+
+    assert events == [
+        ("field", {"name": "title", "value": "T"}),
+        ("field", {"name": "summary", "value": "R"}),
+        ("field", {"name": "tags", "value": ["a", "b"]}),
+        ("field", {"name": "questions", "value": ["P?"]}),
+        ("result", {"title": "T", "summary": "R", "tags": ["a", "b"], "questions": ["P?"]}),
+    ]
+
+@pytest.mark.asyncio
+@patch('src.services.update_file_extraction_db')
+@patch('src.services.insert_file')
+@patch('src.services.stream_content_with_gemini')
+@patch('src.services._store_extraction')
+@patch('src.services.get_file_by_id_db')
+@patch('src.services._format_file_data_to_response')
+async def test_process_new_file_stream_events(
+    mock_format_file,
+    mock_get_file_by_id,
+    mock_store_extraction,
+    mock_stream_gemini,
+    mock_insert_file,
+    mock_update_extraction
+):
+    result = {"title": "T", "summary": "R", "tags": [], "questions": []}
+    mock_insert_file.return_value = 3
+    mock_stream_gemini.return_value = iter([("field", {"name": "title", "value": "T"}), ("result", result)])
+    mock_get_file_by_id.return_value = {"id": 3, "topics": []}
+
+    events = [event async for event in process_new_file_stream("nota.md", "md", "Conteúdo.")]
+
+    assert [kind for kind, _ in events] == ["file", "field", "done"]
+    assert events[0][1] == {"id": 3, "file_name": "nota.md"}
+    mock_store_extraction.assert_called_once_with(3, result)
+    mock_update_extraction.assert_not_called()
+
+@patch('src.services.process_content_with_gemini')
+@patch('src.services.claim_file_extraction_db')
+@patch('src.services.get_pending_files_db')
+def test_reprocess_skips_files_claimed_by_another_worker(mock_get_pending, mock_claim, mock_process_gemini):
+    mock_get_pending.return_value = [{
+        "id": 4, "file_name": "nota.md", "original_content": "Conteúdo.",
+        "extraction_attempts": 1, "extraction_status": "pending", "extraction_claimed_at": None
+    }]
+    mock_claim.return_value = False
+
+    result = reprocess_pending_files_service()
+
+    mock_claim.assert_called_once_with(4, "pending", None)
+    mock_process_gemini.assert_not_called()
+    assert result["processed"] == result["deferred"] == result["failed"] == 0
+
+def test_pending_file_is_claimed_only_once(memory_database):
+    file_id = db.insert_file("nota.md", "nota.md", "md", "Conteúdo.")
+    db.update_file_extraction_db(file_id, "pending", "Falha na API: 429")
+    # Dois workers leem a mesma fila antes de qualquer um pegar o arquivo.
+    first, second = db.get_pending_files_db(10, 3), db.get_pending_files_db(10, 3)
+
+    assert db.claim_file_extraction_db(file_id, first[0]["extraction_status"], first[0]["extraction_claimed_at"]) is True
+    assert db.claim_file_extraction_db(file_id, second[0]["extraction_status"], second[0]["extraction_claimed_at"]) is False
+    assert db.get_pending_files_db(10, 3) == []
@@ -0,0 +1,108 @@
+import random
+from datetime import datetime
+
+import pytest
+
+from src import db
+from src.services import delete_file_service, find_duplicate_service, update_duplicate_file_service
+from src.similarity import (
+    FINGERPRINT_BYTES,
+    SimilarityIndex,
+    cosine_similarity,
+    fingerprint,
+    find_near_duplicates,
+    term_weights,
+)
+
+WORDS = (
+    "algoritmo revisão intervalo memória repetição espaçada qualidade lembrança facilidade fator "
+    "rede protocolo camada transporte pacote roteador endereço conexão fotossíntese energia "
+    "clorofila glicose luz planta célula membrana núcleo proteína enzima molécula"
+).split()
+
+def make_note(seed, words=400):
+    rng = random.Random(seed)
+    return " ".join(f"{rng.choice(WORDS)}{rng.randint(0, 300)}" for _ in range(words))
+
+def edit_note(note, changes, seed=0):
+    rng = random.Random(seed)
+    tokens = note.split()
+    for _ in range(changes):
+        tokens[rng.randrange(len(tokens))] = f"editado{rng.randint(0, 10_000)}"
+    return " ".join(tokens)
+
+def insert_note(content):
+    file_id = db.insert_file("nota.md", "nota.md", "md", content, fingerprint(content))
+    db.update_file_extraction_db(file_id, "done")
+    return file_id
+
+def test_fingerprint_is_deterministic():
+    note = make_note(1)
+
+    assert fingerprint(note) == fingerprint(note)
+    assert len(fingerprint(note)) == FINGERPRINT_BYTES
+    assert fingerprint("") == bytes(FINGERPRINT_BYTES)
+
+def test_cosine_similarity_of_edited_and_unrelated_notes():
+    note = make_note(1)
+
+    assert cosine_similarity(term_weights(note), term_weights(note)) == pytest.approx(1.0)
+    assert cosine_similarity(term_weights(note), term_weights(edit_note(note, 10))) > 0.9
+    assert cosine_similarity(term_weights(note), term_weights(make_note(2))) < 0.3
+
+def test_index_search_add_and_remove():
+    notes = {file_id: make_note(file_id) for file_id in range(1, 51)}
+    index = SimilarityIndex()
+    for file_id, note in notes.items():
+        index.add(file_id, fingerprint(note))
+
+    query = fingerprint(edit_note(notes[17], 10))
+    assert index.search(query, 0.8)[0][0] == 17
+
+    index.remove(17)
+    assert len(index) == 49
+    assert all(file_id != 17 for file_id, _ in index.search(query, 0.8))
+    assert index.search(fingerprint(notes[50]), 0.99)[0][0] == 50
+
+def test_near_duplicate_is_found_at_ingest(memory_database):
+    original = make_note(1)
+    original_id = insert_note(original)
+    insert_note(make_note(2))
+
+    matches = find_near_duplicates(edit_note(original, 10))
+
+    assert [match.file_id for match in matches] == [original_id]
+    assert matches[0].similarity >= 0.9
+    assert find_duplicate_service(make_note(3)) is None
+
+def test_index_sees_files_from_other_connections(memory_database):
+    insert_note(make_note(1))
+    assert find_duplicate_service(make_note(2)) is None
+
+    # Gravado sem passar pelo índice do processo (como faria outro worker).
+    other_id = insert_note(make_note(2))
+    assert find_duplicate_service(make_note(2)).file_id == other_id
+
+def test_update_duplicate_keeps_topics_and_replaces_content(memory_database):
+    original = make_note(1)
+    file_id = insert_note(original)
+    db.insert_topic(file_id, "Tópico", "Resumo", '["P?"]', datetime.now().isoformat(), 2.6, 3)
+
+    edited = edit_note(original, 10)
+    response = update_duplicate_file_service(file_id, "nota-v2.md", "md", edited)
+
+    assert response.id == file_id
+    assert response.file_name == "nota-v2.md"
+    assert [topic.repetitions for topic in response.topics] == [3]
+    assert db.get_file_content_db(file_id) == edited
+    assert db.get_fingerprints_db() == [(file_id, fingerprint(edited))]
+
+def test_deleted_files_leave_the_index(memory_database):
+    note = make_note(1)
+    file_id = insert_note(note)
+    assert find_duplicate_service(note).file_id == file_id
+
+    delete_file_service(file_id)
+
+    assert find_duplicate_service(note) is None
+    assert db.get_fingerprints_db() == []
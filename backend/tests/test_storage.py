@@ -0,0 +1,164 @@
+import shutil
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from src import db
+from src.maintenance import archive_mature_files, vacuum, run_maintenance
+from src.backup import create_snapshot, list_backups
+
+@pytest.fixture
+def database_path(tmp_path, monkeypatch):
+    monkeypatch.delenv("REVISU_ARCHIVE_PATH", raising=False)
+    path = str(tmp_path / "revisu.db")
+    db.configure_database(path)
+    db.init_db()
+    yield path
+    db.configure_database(None)
+
+def insert_file_with_topic(content, repetitions=0, interval_days=0, tag="tag"):
+    file_id = db.insert_file("nota.md", "nota.md", "md", content)
+    db.update_file_extraction_db(file_id, "done")
+
+    last_reviewed = datetime.now() if repetitions else None
+    next_review_date = datetime.now() + timedelta(days=interval_days)
+    topic_id = db.insert_topic(
+        file_id, "Tópico", "Resumo", '["P?"]', next_review_date.isoformat(), 2.5, repetitions,
+        last_reviewed.isoformat() if last_reviewed else None
+    )
+    db.link_topic_to_tag(topic_id, db.get_or_create_tag(tag))
+    return file_id
+
+def query(path, sql, *params):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql, params).fetchone()[0]
+    finally:
+        conn.close()
+
+def test_new_database_uses_incremental_auto_vacuum(database_path):
+    assert query(database_path, "PRAGMA auto_vacuum") == db.AUTO_VACUUM_INCREMENTAL
+
+def test_existing_database_is_converted_once(tmp_path):
+    path = str(tmp_path / "antigo.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE File (id INTEGER PRIMARY KEY AUTOINCREMENT, file_path TEXT NOT NULL, file_name TEXT NOT NULL, file_type TEXT NOT NULL, original_content TEXT NOT NULL, processed_at DATETIME DEFAULT CURRENT_TIMESTAMP)")
+    conn.execute("INSERT INTO File (file_path, file_name, file_type, original_content) VALUES ('a.md', 'a.md', 'md', 'Conteúdo.')")
+    conn.commit()
+    conn.close()
+
+    db.configure_database(path)
+    try:
+        db.init_db()
+        assert query(path, "PRAGMA auto_vacuum") == db.AUTO_VACUUM_INCREMENTAL
+        assert db.get_file_content_db(1) == "Conteúdo."
+    finally:
+        db.configure_database(None)
+
+def test_delete_cascades_to_topics_and_tags(database_path):
+    file_id = insert_file_with_topic("Conteúdo.")
+    other_id = insert_file_with_topic("Outro conteúdo.")
+
+    assert db.delete_file_db(file_id) is True
+    assert db.delete_file_db(file_id) is False
+
+    assert query(database_path, "SELECT COUNT(*) FROM Topic WHERE file_id = ?", file_id) == 0
+    assert query(database_path, "SELECT COUNT(*) FROM TopicTag") == 1
+    assert db.get_file_by_id_db(other_id) is not None
+
+def test_foreign_keys_are_enforced(database_path):
+    with pytest.raises(sqlite3.IntegrityError):
+        db.insert_topic(999, "Órfão", "Resumo", "[]", datetime.now().isoformat(), 2.5, 0)
+
+def test_mature_files_move_to_the_archive(database_path):
+    mature_id = insert_file_with_topic("Conteúdo maduro. " * 100, repetitions=6, interval_days=90)
+    young_id = insert_file_with_topic("Conteúdo novo.", repetitions=1, interval_days=1)
+
+    assert archive_mature_files(min_repetitions=5, min_interval_days=60, batch=1) == 1
+
+    assert query(database_path, "SELECT original_content FROM File WHERE id = ?", mature_id) == ""
+    assert db.get_file_content_db(mature_id) == "Conteúdo maduro. " * 100
+    assert db.get_file_content_db(young_id) == "Conteúdo novo."
+    assert db.get_file_by_id_db(mature_id)["archived_at"] is not None
+
+    archive_path = db.get_archive_path()
+    assert query(archive_path, "SELECT COUNT(*) FROM ArchivedContent") == 1
+
+    db.delete_file_db(mature_id)
+    assert query(archive_path, "SELECT COUNT(*) FROM ArchivedContent") == 0
+
+def test_vacuum_returns_free_pages(database_path):
+    file_ids = [insert_file_with_topic("x" * 4000) for _ in range(100)]
+    for file_id in file_ids:
+        db.delete_file_db(file_id)
+
+    free_pages = query(database_path, "PRAGMA freelist_count")
+    assert free_pages > 0
+
+    assert vacuum(pages=10) == free_pages
+    assert query(database_path, "PRAGMA freelist_count") == 0
+
+def test_archiving_resumes_after_copying_to_the_archive(database_path):
+    content = "Conteúdo maduro. " * 100
+    file_id = insert_file_with_topic(content, repetitions=6, interval_days=90)
+    # Estado de uma falha entre as duas escritas: a cópia já está no banco frio, o original ainda não foi apagado.
+    db.get_writer().execute(lambda conn: conn.execute(
+        "INSERT INTO archive.ArchivedContent (file_id, original_content) VALUES (?, ?)", (file_id, content)
+    ))
+
+    assert archive_mature_files(min_repetitions=5, min_interval_days=60) == 1
+
+    assert query(database_path, "SELECT original_content FROM File WHERE id = ?", file_id) == ""
+    assert query(db.get_archive_path(), "SELECT COUNT(*) FROM ArchivedContent") == 1
+    assert db.get_file_content_db(file_id) == content
+
+def test_vacuum_skips_an_archive_without_incremental_mode(tmp_path, monkeypatch):
+    archive_path = str(tmp_path / "arquivo-antigo.db")
+    conn = sqlite3.connect(archive_path)
+    conn.execute("CREATE TABLE ArchivedContent (file_id INTEGER PRIMARY KEY, original_content TEXT NOT NULL, archived_at DATETIME DEFAULT CURRENT_TIMESTAMP)")
+    conn.executemany("INSERT INTO ArchivedContent (file_id, original_content) VALUES (?, ?)", [(i, "x" * 4000) for i in range(100)])
+    conn.commit()
+    conn.execute("DELETE FROM ArchivedContent")
+    conn.commit()
+    conn.close()
+    assert query(archive_path, "PRAGMA freelist_count") > 0
+
+    monkeypatch.setenv("REVISU_ARCHIVE_PATH", archive_path)
+    db.configure_database(str(tmp_path / "revisu.db"))
+    try:
+        db.init_db()
+        assert vacuum(pages=10) == 0
+    finally:
+        db.configure_database(None)
+
+def test_memory_database_has_no_archive():
+    db.configure_database(db.MEMORY_DATABASE)
+    try:
+        db.init_db()
+        insert_file_with_topic("Conteúdo.", repetitions=6, interval_days=90)
+
+        assert db.get_archive_path() is None
+        assert run_maintenance()["archived"] == 0
+    finally:
+        db.configure_database(None)
+
+def test_snapshot_keeps_archived_content(database_path, tmp_path):
+    content = "Conteúdo maduro. " * 100
+    file_id = insert_file_with_topic(content, repetitions=6, interval_days=90)
+    archive_mature_files(min_repetitions=5, min_interval_days=60)
+
+    directory = str(tmp_path / "backups")
+    for _ in range(3):
+        result = create_snapshot(directory, keep=2)
+    assert result["archive_path"] is not None
+    assert len(list_backups(directory)) == 2
+    assert len(list((tmp_path / "backups").iterdir())) == 4
+
+    restored = tmp_path / "restaurado"
+    restored.mkdir()
+    shutil.copy(result["path"], restored / db.DATABASE_FILE)
+    shutil.copy(result["archive_path"], restored / db.ARCHIVE_FILE)
+
+    db.configure_database(str(restored / db.DATABASE_FILE))
+    assert db.get_file_content_db(file_id) == content
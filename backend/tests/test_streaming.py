@@ -0,0 +1,42 @@
+import json
+
+from src.streaming import IncrementalJsonFields, format_sse
+from src.providers import LocalStubProvider
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJsonFields()
+    fields = []
+    for start in range(0, len(text), size):
+        fields.extend(parser.feed(text[start:start + size]))
+    return parser, fields
+
+def test_incremental_parser_emits_each_field_once_complete():
+    text = '```json\n{"titulo": "Vírgula, \\"aspas\\" e {chaves}", "tags": ["a", "b,c"], "resumo": "R"}\n```'
+
+    for size in (1, 3, 16, len(text)):
+        parser, fields = feed_in_chunks(text, size)
+
+        assert fields == [("titulo", 'Vírgula, "aspas" e {chaves}'), ("tags", ["a", "b,c"]), ("resumo", "R")]
+        assert parser.finished
+        assert parser.text == text
+
+def test_incremental_parser_waits_for_the_value_to_finish():
+    parser = IncrementalJsonFields()
+
+    assert parser.feed('{"titulo": "Meio tít') == []
+    assert parser.feed('ulo", "tags": [') == [("titulo", "Meio título")]
+    assert parser.feed('"x"]}') == [("tags", ["x"])]
+
+def test_stub_provider_streams_the_same_response():
+    provider = LocalStubProvider(response_chars=120, stream_chunk_chars=10, seed=1)
+
+    chunks = list(provider.generate_stream("prompt"))
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == provider.generate("prompt")
+
+def test_format_sse():
+    assert format_sse("field", {"name": "title", "value": "Ação"}) == (
+        'event: field\ndata: {"name": "title", "value": "Ação"}\n\n'
+    )
+    assert json.loads(format_sse("done", {"id": 1}).split("data: ", 1)[1]) == {"id": 1}
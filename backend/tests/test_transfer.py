@@ -0,0 +1,112 @@
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from src import db
+from src.maintenance import archive_mature_files
+from src.transfer import ANKI_HEADER, export_anki, export_ndjson, import_ndjson
+
+def insert_library(files=3, topics_per_file=2):
+    now = datetime.now()
+    for i in range(files):
+        file_id = db.insert_file(f"nota-{i}.md", f"nota-{i}.md", "md", f"Conteúdo da nota {i}.\nSegunda linha.")
+        db.update_file_extraction_db(file_id, "done")
+        for j in range(topics_per_file):
+            topic_id = db.insert_topic(
+                file_id, f"Tópico {i}.{j}", f"Resumo\tcom tab {i}.{j}", json.dumps([f"Pergunta {i}.{j}?", "Outra?"]),
+                (now + timedelta(days=90)).isoformat(), 2.6, 6, now.isoformat()
+            )
+            for tag in (f"tag {i}", "comum"):
+                db.link_topic_to_tag(topic_id, db.get_or_create_tag(tag))
+
+def read_ndjson():
+    return [json.loads(line) for line in "".join(export_ndjson()).splitlines()]
+
+def test_ndjson_export_has_files_topics_and_schedule(memory_database):
+    insert_library()
+
+    header, *records = read_ndjson()
+
+    assert header["type"] == "revisu-export"
+    assert [record["file_name"] for record in records] == ["nota-0.md", "nota-1.md", "nota-2.md"]
+    topic = records[1]["topics"][0]
+    assert topic["questions"] == ["Pergunta 1.0?", "Outra?"]
+    assert sorted(topic["tags"]) == ["comum", "tag 1"]
+    assert topic["repetitions"] == 6 and topic["ease_factor"] == 2.6
+
+def test_export_reads_archived_content(tmp_path, monkeypatch):
+    monkeypatch.delenv("REVISU_ARCHIVE_PATH", raising=False)
+    db.configure_database(str(tmp_path / "revisu.db"))
+    try:
+        db.init_db()
+        insert_library(files=1)
+        assert archive_mature_files(min_repetitions=5, min_interval_days=60) == 1
+
+        _, record = read_ndjson()
+        assert record["original_content"] == "Conteúdo da nota 0.\nSegunda linha."
+    finally:
+        db.configure_database(None)
+
+def test_ndjson_round_trip(memory_database):
+    insert_library()
+    exported = "".join(export_ndjson()).encode("utf-8")
+
+    db.configure_database(db.MEMORY_DATABASE)
+    db.init_db()
+    result = import_ndjson(io.BytesIO(exported), batch_files=2)
+
+    assert result == {"files": 3, "topics": 6}
+    original = [json.loads(line) for line in exported.decode("utf-8").splitlines()][1:]
+    for before, after in zip(original, read_ndjson()[1:]):
+        before.pop("id"), after.pop("id")
+        for topic in before["topics"] + after["topics"]:
+            topic["tags"].sort()
+        assert before == after
+    assert db.get_fingerprints_db()
+
+def test_import_reports_the_invalid_line(memory_database):
+    lines = [
+        json.dumps({"type": "revisu-export", "version": 1}),
+        json.dumps({"type": "file", "file_name": "a.md", "file_type": "md", "original_content": "A", "topics": []}),
+        json.dumps({"type": "file", "file_name": "b.md"}),
+    ]
+
+    with pytest.raises(ValueError, match="Linha 3"):
+        import_ndjson(io.BytesIO("\n".join(lines).encode("utf-8")), batch_files=1)
+
+    assert len(db.get_all_files_db()) == 1
+
+def test_import_rejects_null_required_fields(memory_database):
+    lines = [
+        json.dumps({"type": "file", "file_name": "a.md", "file_type": "md", "original_content": "A", "topics": []}),
+        json.dumps({"type": "file", "file_name": None, "file_type": "md", "original_content": "B", "topics": []}),
+    ]
+
+    with pytest.raises(ValueError, match="Linha 2.*file_name"):
+        import_ndjson(io.BytesIO("\n".join(lines).encode("utf-8")), batch_files=1)
+
+    assert len(db.get_all_files_db()) == 1
+
+def test_export_tolerates_invalid_questions(memory_database):
+    insert_library(files=1, topics_per_file=1)
+    db.get_writer().execute(lambda conn: conn.execute("UPDATE Topic SET questions = 'não é json'"))
+
+    _, record = read_ndjson()
+
+    assert record["topics"][0]["questions"] == ["Erro ao carregar perguntas ou formato inválido."]
+    assert "".join(export_anki()).startswith(ANKI_HEADER)
+
+def test_anki_export_has_one_card_per_question(memory_database):
+    insert_library(files=2)
+
+    exported = "".join(export_anki())
+
+    assert exported.startswith(ANKI_HEADER)
+    cards = exported[len(ANKI_HEADER):].splitlines()
+    assert len(cards) == 2 * 2 * 2
+    front, back, tags = cards[0].split("\t")
+    assert front == "Pergunta 0.0?"
+    assert back == "<b>Tópico 0.0</b><br>Resumo com tab 0.0"
+    assert sorted(tags.split()) == ["comum", "tag_0"]
@@ -0,0 +1,139 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from src import db
+from src.metrics import start_trace, end_trace
+from src.writer import DatabaseWriter, WRITE_BATCH_SIZE
+
+@pytest.fixture
+def writer(tmp_path):
+    path = str(tmp_path / "writer.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE Item (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+    conn.commit()
+    conn.close()
+
+    db_writer = DatabaseWriter(path)
+    yield db_writer
+    db_writer.close()
+
+def count_items(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM Item").fetchone()[0]
+    finally:
+        conn.close()
+
+def insert(name):
+    return lambda conn: conn.execute("INSERT INTO Item (name) VALUES (?)", (name,)).lastrowid
+
+def block_writer(writer):
+    """Ocupa o escritor até o evento retornado ser liberado."""
+
+    running, release = threading.Event(), threading.Event()
+
+    def blocker(conn):
+        running.set()
+        return release.wait(5)
+
+    future = writer.submit(blocker)
+    running.wait(5)
+    return future, release
+
+def test_writer_groups_queued_writes_in_one_commit(writer):
+    batches_before = WRITE_BATCH_SIZE.count()
+
+    blocker, release = block_writer(writer)
+    futures = [writer.submit(insert(f"item-{i}")) for i in range(10)]
+    release.set()
+
+    assert blocker.result() is True
+    assert sorted(future.result() for future in futures) == list(range(1, 11))
+    assert WRITE_BATCH_SIZE.count() - batches_before == 2
+    assert count_items(writer.path) == 10
+
+def test_failed_write_rolls_back_only_itself(writer):
+    _, release = block_writer(writer)
+    first = writer.submit(insert("a"))
+    duplicate = writer.submit(insert("a"))
+    second = writer.submit(insert("b"))
+    release.set()
+
+    assert first.result() == 1
+    with pytest.raises(sqlite3.IntegrityError):
+        duplicate.result()
+    assert second.result() == 2
+    assert count_items(writer.path) == 2
+
+def test_concurrent_writers_do_not_hit_database_locked(writer):
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda i: writer.execute(insert(f"item-{i}")), range(200)))
+
+    assert len(set(results)) == 200
+    assert count_items(writer.path) == 200
+
+def test_writes_are_counted_in_the_request_trace(writer):
+    trace, token = start_trace()
+    try:
+        writer.execute(insert("traced"))
+    finally:
+        end_trace(token)
+
+    assert trace.queries == 1
+
+def test_nested_write_runs_in_the_same_transaction(writer):
+    def outer(conn):
+        conn.execute("INSERT INTO Item (name) VALUES ('outer')")
+        return writer.execute(insert("inner"))
+
+    assert writer.execute(outer) == 2
+
+def test_lost_transaction_fails_the_batch_and_keeps_the_writer(writer):
+    def disk_full(conn):
+        # Simula SQLITE_FULL: o SQLite desfaz a transação inteira, não só o savepoint.
+        conn.execute("ROLLBACK")
+        raise sqlite3.OperationalError("database or disk is full")
+
+    _, release = block_writer(writer)
+    before = writer.submit(insert("a"))
+    failing = writer.submit(disk_full)
+    after = writer.submit(insert("b"))
+    release.set()
+
+    for future in (before, failing, after):
+        with pytest.raises(sqlite3.OperationalError, match="disk is full"):
+            future.result(timeout=5)
+    assert writer.submit(insert("c")).result(timeout=5) == 1
+    assert count_items(writer.path) == 1
+
+def test_connection_failure_is_raised_to_the_caller(tmp_path):
+    def failing_connect():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    with pytest.raises(sqlite3.OperationalError, match="unable to open"):
+        DatabaseWriter(str(tmp_path / "writer.db"), failing_connect)
+
+def test_closed_writer_rejects_writes(writer):
+    writer.close()
+
+    with pytest.raises(RuntimeError):
+        writer.submit(insert("late"))
+
+def test_extraction_is_stored_in_one_write(memory_database):
+    file_id = db.insert_file("nota.md", "nota.md", "md", "Conteúdo.")
+    db.get_or_create_tag("existente")
+    batches_before = WRITE_BATCH_SIZE.count()
+
+    topic_id = db.store_extraction_db(
+        file_id, "Título", "Resumo", '["P?"]', datetime.now().isoformat(), ["existente", "nova"]
+    )
+
+    assert WRITE_BATCH_SIZE.count() - batches_before == 1
+    file_data = db.get_file_by_id_db(file_id)
+    assert file_data["extraction_status"] == "done"
+    assert [topic["id"] for topic in file_data["topics"]] == [topic_id]
+    assert sorted(tag["name"] for tag in db.get_all_tags_db()) == ["existente", "nova"]
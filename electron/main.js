@@ -2,9 +2,14 @@ const { app, BrowserWindow } = require('electron');
 const path = require('path');
 const { spawn } = require('child_process');
 const fs = require('fs'); // Adicionar esta linha para usar fs.existsSync
+const http = require('http');
 
 let pythonProcess = null;
 
+const BACKEND_HEALTH_URL = 'http://127.0.0.1:8000/health';
+const BACKEND_HEALTH_INTERVAL_MS = 100;
+const BACKEND_HEALTH_TIMEOUT_MS = 30000;
+
 // Função para obter o caminho do executável do backend
 const getBackendExecutablePath = () => {
   let backendExecutable;
@@ -36,6 +41,8 @@ const startPythonBackend = () => {
     stdio: 'inherit', // Permite que a saída do Python apareça no terminal do Electron
     detached: false,  // Garante que o processo Python morra com o Electron
     cwd: path.join(__dirname, '..', 'backend'), // Define o diretório de trabalho para o backend, pode ser útil
+    // O banco fica na pasta de dados do usuário, não dentro do executável empacotado.
+    env: { ...process.env, REVISU_DATA_DIR: app.getPath('userData') },
   });
 
   pythonProcess.on('error', (err) => {
@@ -50,6 +57,38 @@ const startPythonBackend = () => {
   console.log('Backend Python iniciado.');
 };
 
+// Consulta o endpoint /health até o backend responder, em vez de adivinhar quando ele está no ar.
+const waitForBackend = () => {
+  const startedAt = Date.now();
+
+  return new Promise((resolve) => {
+    const poll = () => {
+      const request = http.get(BACKEND_HEALTH_URL, (res) => {
+        res.resume();
+        if (res.statusCode === 200) {
+          console.log(`Backend pronto em ${Date.now() - startedAt} ms.`);
+          resolve(true);
+        } else {
+          retry();
+        }
+      });
+      request.on('error', retry);
+      request.setTimeout(BACKEND_HEALTH_INTERVAL_MS * 10, () => request.destroy());
+    };
+
+    const retry = () => {
+      if (Date.now() - startedAt >= BACKEND_HEALTH_TIMEOUT_MS) {
+        console.error(`Backend não respondeu em ${BACKEND_HEALTH_TIMEOUT_MS} ms.`);
+        resolve(false);
+        return;
+      }
+      setTimeout(poll, BACKEND_HEALTH_INTERVAL_MS);
+    };
+
+    poll();
+  });
+};
+
 const stopPythonBackend = () => {
   if (pythonProcess) {
     console.log('Encerrando backend Python...');
@@ -88,8 +127,9 @@ function createWindow() {
   }
 }
 
-app.whenReady().then(() => {
+app.whenReady().then(async () => {
   startPythonBackend();
+  await waitForBackend();
   createWindow();
 });
 
@@ -24,6 +24,7 @@ interface ProcessedFile {
   file_name: string;
   file_type: string;
   processed_at: string;
+  extraction_status: "processing" | "pending" | "done" | "failed";
   topics: ProcessedTopic[];
 }
 
@@ -108,7 +109,11 @@ export default function FileDetailsPage() {
       </h2>
       {fileDetails.topics.length === 0 ? (
         <p className="text-gray-500">
-          Nenhum tópico encontrado para este arquivo.
+          {fileDetails.extraction_status === "pending"
+            ? "A IA está indisponível no momento. Os tópicos deste arquivo serão gerados automaticamente em breve."
+            : fileDetails.extraction_status === "failed"
+              ? "Não foi possível gerar tópicos para este arquivo."
+              : "Nenhum tópico encontrado para este arquivo."}
         </p>
       ) : (
         <div className="space-y-6">
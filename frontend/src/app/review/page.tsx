@@ -1,6 +1,6 @@
 "use client";
 
-import React, { useState, useEffect, useCallback } from "react";
+import React, { useState, useEffect, useCallback, useRef } from "react";
 import axios from "axios";
 import { Button } from "@/components/ui/button";
 import {
@@ -13,6 +13,15 @@ import {
 } from "@/components/ui/card";
 import { Badge } from "@/components/ui/badge";
 import { useRouter } from "next/navigation";
+import { useServerEvents } from "@/lib/useServerEvents";
+
+interface ReviewIntervalPreview {
+  quality: number;
+  interval_seconds: number;
+  next_review_date: string;
+  repetitions: number;
+  ease_factor: number;
+}
 
 interface ProcessedTopic {
   id: number;
@@ -25,8 +34,26 @@ interface ProcessedTopic {
   repetitions: number;
   last_reviewed: string | null;
   tags: string[];
+  previews: ReviewIntervalPreview[];
+}
+
+interface ReviewSession {
+  topics: ProcessedTopic[];
+  due_total: number;
+  generated_at: string;
 }
 
+// Tamanho de cada lote da sessão e quantos cartões restantes disparam a busca do próximo.
+const SESSION_SIZE = 20;
+const PREFETCH_THRESHOLD = 5;
+
+const formatInterval = (seconds: number) => {
+  if (seconds < 3600) return `${Math.round(seconds / 60)} min`;
+  if (seconds < 86400) return `${Math.round(seconds / 3600)} h`;
+  const days = Math.round(seconds / 86400);
+  return days === 1 ? "1 dia" : `${days} dias`;
+};
+
 export default function ReviewPage() {
   const router = useRouter();
   const [topics, setTopics] = useState<ProcessedTopic[]>([]);
@@ -42,23 +69,35 @@ export default function ReviewPage() {
   const API_BASE_URL =
     process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
+  // Tópicos já respondidos nesta sessão: a gravação é assíncrona, então um lote
+  // buscado logo depois ainda pode trazê-los.
+  const answeredIds = useRef<Set<number>>(new Set());
+  const isPrefetching = useRef(false);
+
+  const fetchSession = useCallback(
+    () =>
+      axios.get<ReviewSession>(`${API_BASE_URL}/review/session`, {
+        params: { size: SESSION_SIZE },
+      }),
+    [API_BASE_URL],
+  );
+
   const fetchTopicsForReview = useCallback(async () => {
     setIsLoading(true);
     setError(null);
     setMessage(null);
 
     try {
-      const response = await axios.get<ProcessedTopic[]>(
-        `${API_BASE_URL}/topics/for-review`,
-      );
+      const response = await fetchSession();
 
-      setTopics(response.data);
-      setInitialTotalTopics(response.data.length);
+      answeredIds.current = new Set();
+      setTopics(response.data.topics);
+      setInitialTotalTopics(response.data.due_total);
       setReviewedCount(0);
       setCurrentTopicIndex(0);
       setShowAnswer(false);
 
-      if (response.data.length === 0) {
+      if (response.data.topics.length === 0) {
         setMessage(
           "🎉 Nenhum tópico para revisar no momento! Volte mais tarde.",
         );
@@ -77,53 +116,99 @@ export default function ReviewPage() {
     } finally {
       setIsLoading(false);
     }
-  }, [API_BASE_URL]);
+  }, [fetchSession]);
 
   useEffect(() => {
     fetchTopicsForReview();
   }, [fetchTopicsForReview]);
 
-  const handleReview = async (quality: number) => {
-    if (!topics[currentTopicIndex]) return;
+  // Tópicos que vencem com a página aberta chegam por /events, sem consultas periódicas:
+  // com a fila vazia a sessão é recarregada; no meio dela, entram no próximo lote.
+  useServerEvents({
+    topic_due: ({ topic_ids }) => {
+      if (isLoading) return;
+      if (topics.length === 0) {
+        fetchTopicsForReview();
+      } else {
+        setInitialTotalTopics((prev) => prev + topic_ids.length);
+      }
+    },
+  });
+
+  // Busca o próximo lote em segundo plano quando restam poucos cartões.
+  useEffect(() => {
+    if (
+      isLoading ||
+      isPrefetching.current ||
+      topics.length > PREFETCH_THRESHOLD ||
+      reviewedCount + topics.length >= initialTotalTopics
+    ) {
+      return;
+    }
 
-    const topicId = topics[currentTopicIndex].id;
+    isPrefetching.current = true;
+    fetchSession()
+      .then((response) => {
+        setTopics((current) => {
+          const known = new Set(current.map((topic) => topic.id));
+          const fresh = response.data.topics.filter(
+            (topic) =>
+              !known.has(topic.id) && !answeredIds.current.has(topic.id),
+          );
+          return [...current, ...fresh];
+        });
+      })
+      .catch((err) => console.error("Error prefetching review session:", err))
+      .finally(() => {
+        isPrefetching.current = false;
+      });
+  }, [topics.length, reviewedCount, initialTotalTopics, isLoading, fetchSession]);
+
+  const handleReview = (quality: number) => {
+    const topic = topics[currentTopicIndex];
+    if (!topic) return;
+
+    // O cartão avança na hora; o servidor confirma a gravação em segundo plano.
+    answeredIds.current.add(topic.id);
+    axios
+      .post(`${API_BASE_URL}/review/answers`, {
+        answers: [{ topic_id: topic.id, quality }],
+      })
+      .catch((err) => {
+        if (axios.isAxiosError(err) && err.response) {
+          setError(
+            `Erro ao registrar revisão: ${err.response.status} - ${err.response.data.detail || err.message}`,
+          );
+        } else {
+          setError(
+            `Ocorreu um erro inesperado ao revisar: ${err instanceof Error ? err.message : String(err)}`,
+          );
+        }
+        console.error("Error reviewing topic:", err);
+      });
+
+    const preview = topic.previews.find((item) => item.quality === quality);
     setMessage(
-      `Registrando revisão para "${topics[currentTopicIndex].title}"...`,
+      preview
+        ? `"${topic.title}" volta em ${formatInterval(preview.interval_seconds)}.`
+        : "Revisão registrada com sucesso!",
     );
+    setReviewedCount((prev) => prev + 1);
 
-    try {
-      await axios.post(`${API_BASE_URL}/topics/${topicId}/review`, { quality });
-      setMessage("Revisão registrada com sucesso!");
-      setReviewedCount((prev) => prev + 1);
-
-      const updatedTopics = topics.filter(
-        (_, idx) => idx !== currentTopicIndex,
-      );
-      setTopics(updatedTopics);
+    const updatedTopics = topics.filter((_, idx) => idx !== currentTopicIndex);
+    setTopics(updatedTopics);
 
-      setShowAnswer(false);
+    setShowAnswer(false);
 
-      if (updatedTopics.length > 0) {
-        if (currentTopicIndex >= updatedTopics.length) {
-          setCurrentTopicIndex(0);
-        }
-      } else {
-        setMessage("✅ Sessão de revisão concluída! Redirecionando...");
-        setTimeout(() => {
-          router.push("/files");
-        }, 3000);
-      }
-    } catch (err) {
-      if (axios.isAxiosError(err) && err.response) {
-        setError(
-          `Erro ao registrar revisão: ${err.response.status} - ${err.response.data.detail || err.message}`,
-        );
-      } else {
-        setError(
-          `Ocorreu um erro inesperado ao revisar: ${err instanceof Error ? err.message : String(err)}`,
-        );
+    if (updatedTopics.length > 0) {
+      if (currentTopicIndex >= updatedTopics.length) {
+        setCurrentTopicIndex(0);
       }
-      console.error("Error reviewing topic:", err);
+    } else {
+      setMessage("✅ Sessão de revisão concluída! Redirecionando...");
+      setTimeout(() => {
+        router.push("/files");
+      }, 3000);
     }
   };
 
@@ -265,7 +350,11 @@ export default function ReviewPage() {
                 Qualidade da Lembrança (0=Esqueci, 5=Perfeito):
               </p>
               <div className="flex gap-2 flex-wrap">
-                {[0, 1, 2, 3, 4, 5].map((quality) => (
+                {[0, 1, 2, 3, 4, 5].map((quality) => {
+                  const preview = currentTopic.previews.find(
+                    (item) => item.quality === quality,
+                  );
+                  return (
                   <Button
                     key={quality}
                     onClick={() => handleReview(quality)}
@@ -284,8 +373,14 @@ export default function ReviewPage() {
                     }
                   >
                     {quality}
+                    {preview && (
+                      <span className="ml-1 text-xs opacity-80">
+                        · {formatInterval(preview.interval_seconds)}
+                      </span>
+                    )}
                   </Button>
-                ))}
+                  );
+                })}
                 <Button
                   onClick={handleSkip}
                   disabled={isLoading}
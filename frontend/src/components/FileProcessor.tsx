@@ -1,7 +1,6 @@
 "use client";
 
 import React, { useState, ChangeEvent } from "react";
-import axios from "axios";
 import { useRouter } from "next/navigation";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
@@ -28,6 +27,72 @@ interface ProcessedFile {
   topics: ProcessedTopic[];
 }
 
+interface PartialTopic {
+  title?: string;
+  summary?: string;
+  tags?: string[];
+  questions?: string[];
+}
+
+// Lê uma resposta text/event-stream e chama onEvent para cada evento recebido.
+async function readEventStream(
+  response: Response,
+  onEvent: (event: string, data: unknown) => void,
+) {
+  const reader = response.body!.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+
+      let event = "message";
+      let data = "";
+      for (const line of rawEvent.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      onEvent(event, data ? JSON.parse(data) : null);
+    }
+  }
+}
+
+type DuplicateAction = "ask" | "update" | "create";
+
+interface DuplicateDetail {
+  message: string;
+  file_id: number;
+  file_name: string;
+  similarity: number;
+}
+
+// Pergunta o que fazer com uma nota quase igual a um arquivo já processado; null cancela o envio.
+function chooseDuplicateAction(
+  duplicate: DuplicateDetail,
+): DuplicateAction | null {
+  const similarity = Math.round(duplicate.similarity * 100);
+
+  if (
+    window.confirm(
+      `This note is ${similarity}% similar to "${duplicate.file_name}". ` +
+        "Update the existing note (keeping its topics and review schedule)?",
+    )
+  ) {
+    return "update";
+  }
+  if (window.confirm("Process it as a new note instead?")) {
+    return "create";
+  }
+  return null;
+}
+
 export default function FileProcessor() {
   const [selectedFile, setSelectedFile] = useState<File | null>(null);
   const [isLoading, setIsLoading] = useState(false);
@@ -35,6 +100,7 @@ export default function FileProcessor() {
   const [processingFileName, setProcessingFileName] = useState<string | null>(
     null,
   );
+  const [partialTopic, setPartialTopic] = useState<PartialTopic>({});
 
   const router = useRouter();
   const API_BASE_URL =
@@ -55,43 +121,74 @@ export default function FileProcessor() {
 
     setIsLoading(true);
     setProcessingFileName(selectedFile.name);
+    setPartialTopic({});
     setError(null);
 
-    const formData = new FormData();
+    const send = (onDuplicate: DuplicateAction) => {
+      const formData = new FormData();
 
-    formData.append("file", selectedFile);
+      formData.append("file", selectedFile);
 
-    formData.append(
-      "file_type",
-      selectedFile.name.split(".").pop() || "unknown",
-    );
+      formData.append(
+        "file_type",
+        selectedFile.name.split(".").pop() || "unknown",
+      );
+      formData.append("on_duplicate", onDuplicate);
+
+      return fetch(`${API_BASE_URL}/files/process/stream`, {
+        method: "POST",
+        body: formData,
+        headers: { Accept: "text/event-stream" },
+      });
+    };
 
     try {
-      const response = await axios.post<ProcessedFile>(
-        `${API_BASE_URL}/files/process`,
-        formData,
-        {
-          headers: {
-            "Content-Type": "multipart/form-data",
-          },
-        },
-      );
+      let response = await send("ask");
 
-      console.log("File processed successfully:", response.data);
-      router.push(`/files/${response.data.id}`);
-    } catch (err) {
-      if (axios.isAxiosError(err) && err.response) {
-        const errorDetail = err.response.data.detail
-          ? JSON.stringify(err.response.data.detail, null, 2)
-          : err.message;
+      if (response.status === 409) {
+        const body = await response.json();
+        const action = chooseDuplicateAction(body.detail as DuplicateDetail);
+        if (action === null) return;
+        response = await send(action);
+      }
+
+      if (!response.ok || !response.body) {
+        const body = await response.json().catch(() => null);
+        const errorDetail = body?.detail
+          ? JSON.stringify(body.detail, null, 2)
+          : response.statusText;
 
         setError(`Error while processing file: ${errorDetail}`);
-        console.error("Error:", err.response.data);
-      } else {
-        setError(
-          `An error occurred: ${err instanceof Error ? err.message : String(err)}`,
-        );
+        console.error("Error:", body);
+        return;
       }
+
+      const result: { file?: ProcessedFile } = {};
+
+      await readEventStream(response, (event, data) => {
+        if (event === "field") {
+          const field = data as {
+            name: keyof PartialTopic;
+            value: PartialTopic[keyof PartialTopic];
+          };
+          setPartialTopic((current) => ({ ...current, [field.name]: field.value }));
+        } else if (event === "done") {
+          result.file = data as ProcessedFile;
+        } else if (event === "error") {
+          setError(
+            `Error while processing file: ${(data as { detail: string }).detail}`,
+          );
+        }
+      });
+
+      if (result.file) {
+        console.log("File processed successfully:", result.file);
+        router.push(`/files/${result.file.id}`);
+      }
+    } catch (err) {
+      setError(
+        `An error occurred: ${err instanceof Error ? err.message : String(err)}`,
+      );
       console.error("Error while processing file:", err);
     } finally {
       setIsLoading(false);
@@ -130,9 +227,30 @@ export default function FileProcessor() {
         </svg>
         <p className="text-xl font-semibold mb-2">Processando arquivo...</p>
         {processingFileName && <p className="text-lg">{processingFileName}</p>}
-        <p className="text-sm text-gray-500 dark:text-gray-400 mt-2">
-          Isso pode levar alguns instantes.
-        </p>
+        {partialTopic.title ? (
+          <div className="mt-4 max-w-xl px-6 text-left">
+            <p className="text-lg font-semibold">{partialTopic.title}</p>
+            {partialTopic.summary && (
+              <p className="text-sm mt-2">{partialTopic.summary}</p>
+            )}
+            {partialTopic.tags && (
+              <p className="text-xs mt-2 text-blue-600 dark:text-blue-300">
+                {partialTopic.tags.map((tag) => `#${tag}`).join(" ")}
+              </p>
+            )}
+            {partialTopic.questions && (
+              <ul className="list-disc list-inside text-sm mt-2">
+                {partialTopic.questions.map((question) => (
+                  <li key={question}>{question}</li>
+                ))}
+              </ul>
+            )}
+          </div>
+        ) : (
+          <p className="text-sm text-gray-500 dark:text-gray-400 mt-2">
+            Isso pode levar alguns instantes.
+          </p>
+        )}
       </div>
     );
   }
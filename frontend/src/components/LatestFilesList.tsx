@@ -1,9 +1,10 @@
 "use client";
 
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useCallback } from "react";
 import axios from "axios";
 import { useRouter } from "next/navigation";
 import { Button } from "@/components/ui/button";
+import { useLibraryChanged } from "@/lib/useLibraryChanged";
 
 interface ProcessedTopic {
   id: number;
@@ -36,35 +37,37 @@ export default function LatestFilesList() {
   const API_BASE_URL =
     process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
-  useEffect(() => {
-    const fetchFiles = async () => {
-      try {
-        const response = await axios.get<ProcessedFile[]>(
-          `${API_BASE_URL}/files?limit=5`,
+  const fetchFiles = useCallback(async () => {
+    try {
+      const response = await axios.get<ProcessedFile[]>(
+        `${API_BASE_URL}/files?limit=5`,
+      );
+      setFiles(response.data);
+    } catch (err) {
+      if (axios.isAxiosError(err) && err.response) {
+        setError(
+          `Erro ao carregar arquivos: ${err.response.status} - ${
+            err.response.data.detail || err.message
+          }`,
+        );
+      } else {
+        setError(
+          `Ocorreu um erro inesperado: ${
+            err instanceof Error ? err.message : String(err)
+          }`,
         );
-        setFiles(response.data);
-      } catch (err) {
-        if (axios.isAxiosError(err) && err.response) {
-          setError(
-            `Erro ao carregar arquivos: ${err.response.status} - ${
-              err.response.data.detail || err.message
-            }`,
-          );
-        } else {
-          setError(
-            `Ocorreu um erro inesperado: ${
-              err instanceof Error ? err.message : String(err)
-            }`,
-          );
-        }
-        console.error("Error loading files:", err);
-      } finally {
-        setIsLoading(false);
       }
-    };
+      console.error("Error loading files:", err);
+    } finally {
+      setIsLoading(false);
+    }
+  }, [API_BASE_URL]);
 
+  useEffect(() => {
     fetchFiles();
-  }, [API_BASE_URL]);
+  }, [fetchFiles]);
+
+  useLibraryChanged(fetchFiles);
 
   if (isLoading) {
     return (
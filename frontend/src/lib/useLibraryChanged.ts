@@ -0,0 +1,43 @@
+"use client";
+
+import { useEffect, useRef } from "react";
+import { useServerEvents } from "@/lib/useServerEvents";
+
+// Uma ingestão gera ingest_finished e, ~0,25 s depois (debounce do servidor), counts_changed:
+// os avisos que chegam dentro desta janela viram uma única chamada.
+const LIBRARY_CHANGED_DEBOUNCE_MS = 500;
+
+// Chama `onChange` quando a lista de arquivos muda: um arquivo terminou de ser processado
+// (inclusive no reprocessamento, que não muda o total) ou o total de arquivos mudou.
+export function useLibraryChanged(onChange: () => void) {
+  const onChangeRef = useRef(onChange);
+  onChangeRef.current = onChange;
+
+  const lastFilesCount = useRef<number | null>(null);
+  const timer = useRef<ReturnType<typeof setTimeout> | null>(null);
+
+  const schedule = () => {
+    if (timer.current !== null) return;
+    timer.current = setTimeout(() => {
+      timer.current = null;
+      onChangeRef.current();
+    }, LIBRARY_CHANGED_DEBOUNCE_MS);
+  };
+
+  useEffect(
+    () => () => {
+      if (timer.current !== null) clearTimeout(timer.current);
+    },
+    [],
+  );
+
+  useServerEvents({
+    ingest_finished: schedule,
+    counts_changed: ({ files }) => {
+      if (lastFilesCount.current !== null && lastFilesCount.current !== files) {
+        schedule();
+      }
+      lastFilesCount.current = files;
+    },
+  });
+}
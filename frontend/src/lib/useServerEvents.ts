@@ -0,0 +1,61 @@
+"use client";
+
+import { useEffect, useRef } from "react";
+
+export interface CountsChangedEvent {
+  files: number;
+  due: number;
+}
+
+export interface TopicDueEvent {
+  topic_ids: number[];
+}
+
+export interface IngestFinishedEvent {
+  file_id: number;
+  file_name: string | null;
+  extraction_status: string;
+}
+
+export interface ServerEventHandlers {
+  counts_changed?: (data: CountsChangedEvent) => void;
+  topic_due?: (data: TopicDueEvent) => void;
+  ingest_finished?: (data: IngestFinishedEvent) => void;
+}
+
+const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
+
+// Uma conexão SSE com /events por componente, no lugar de consultas periódicas.
+// O navegador reconecta sozinho; ao reconectar, o servidor reenvia os totais atuais.
+export function useServerEvents(handlers: ServerEventHandlers) {
+  // Os handlers mudam a cada render: a conexão lê sempre os mais recentes, sem reconectar.
+  const handlersRef = useRef(handlers);
+  handlersRef.current = handlers;
+
+  useEffect(() => {
+    if (typeof EventSource === "undefined") return;
+
+    const source = new EventSource(`${API_BASE_URL}/events`);
+    const names: (keyof ServerEventHandlers)[] = [
+      "counts_changed",
+      "topic_due",
+      "ingest_finished",
+    ];
+
+    for (const name of names) {
+      source.addEventListener(name, (event) => {
+        const handler = handlersRef.current[name] as
+          | ((data: unknown) => void)
+          | undefined;
+        if (!handler) return;
+        try {
+          handler(JSON.parse((event as MessageEvent).data));
+        } catch (err) {
+          console.error(`Error handling server event ${name}:`, err);
+        }
+      });
+    }
+
+    return () => source.close();
+  }, []);
+}